@@ -0,0 +1,176 @@
+import os
+from datetime import timedelta
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from clinica.models import Consulta, Mascota
+from clinica.services.resumen_consultas_service import ResumenConsultasService
+from clinica.tests import crear_cliente, crear_mascota, crear_usuario
+from clinica.views.consulta_views import ConsultaViewSet
+from usuarios.models import Rol
+from .pagination import PaginacionKeyset
+from .rendimiento import medir, reportar
+
+
+class BenchmarkConexionesPorSolicitud(TransactionTestCase):
+    """Costo de la conexión por solicitud según CONN_MAX_AGE. Simula el ciclo de una
+    solicitud: close_old_connections al empezar y al terminar (las señales
+    request_started/request_finished) y una consulta en medio. Con SQLite abrir una
+    conexión es barato; con MySQL se suma el handshake de red y la autenticación."""
+    SOLICITUDES = 2000
+
+    def setUp(self):
+        self.addCleanup(
+            self._configurar, connection.settings_dict['CONN_MAX_AGE'],
+            connection.settings_dict['CONN_HEALTH_CHECKS']
+        )
+        self.conexiones = 0
+        connection_created.connect(self._contar_conexion)
+        self.addCleanup(connection_created.disconnect, self._contar_conexion)
+
+    def _contar_conexion(self, sender, **kwargs):
+        self.conexiones += 1
+
+    def _configurar(self, max_age, health_checks):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+
+    def _solicitud(self):
+        close_old_connections()
+        Rol.objects.exists()
+        close_old_connections()
+
+    def test_conexion_por_solicitud(self):
+        mediciones, conexiones = {}, {}
+        for nombre, max_age, health_checks in [
+            ('CONN_MAX_AGE=0 (antes)', 0, False),
+            ('CONN_MAX_AGE=60', 60, False),
+            ('CONN_MAX_AGE=60 + health', 60, True),
+        ]:
+            self._configurar(max_age, health_checks)
+            self.conexiones = 0
+            mediciones[nombre] = medir(self._solicitud, repeticiones=self.SOLICITUDES, calentamiento=0)
+            conexiones[nombre] = self.conexiones
+
+        reportar(f'{self.SOLICITUDES} ciclos de solicitud con una consulta', mediciones)
+        print('  Conexiones abiertas: ' + ', '.join(f'{n}: {c}' for n, c in conexiones.items()))
+        # medir() abre una conexión al capturar las consultas; luego, una por solicitud
+        self.assertEqual(conexiones['CONN_MAX_AGE=0 (antes)'], self.SOLICITUDES + 1)
+        self.assertEqual(conexiones['CONN_MAX_AGE=60'], 1)
+        self.assertEqual(conexiones['CONN_MAX_AGE=60 + health'], 1)
+
+
+class BenchmarkPaginacionProfunda(TestCase):
+    """Páginas de 50 consultas a distintas profundidades: LIMIT/OFFSET frente al cursor
+    de PaginacionKeyset con la ordenación de ConsultaViewSet. Hay 1000 consultas por
+    día, así el cursor resuelve empates en la fecha."""
+    FILAS = 100_000
+    POR_DIA = 1000
+    TAMANO_PAGINA = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+        for inicio in range(0, cls.FILAS, 5000):
+            Consulta.objects.bulk_create([
+                Consulta(mascota=mascota, veterinario=veterinario, motivo='Control',
+                         diagnostico='Sano', costo='100.00')
+                for _ in range(5000)
+            ])
+        primera = Consulta.objects.order_by('pk').values_list('pk', flat=True).first()
+        hoy = timezone.now().date()
+        for dia in range(cls.FILAS // cls.POR_DIA):
+            desde = primera + dia * cls.POR_DIA
+            Consulta.objects.filter(pk__gte=desde, pk__lt=desde + cls.POR_DIA).update(
+                fecha_consulta=hoy - timedelta(days=dia)
+            )
+
+    def setUp(self):
+        self.vista = ConsultaViewSet()
+        self.orden = ConsultaViewSet.orden_paginacion
+        self.paginacion = PaginacionKeyset()
+        self.fabrica = APIRequestFactory()
+
+    def _offset(self, posicion):
+        def pagina():
+            return list(Consulta.objects.order_by(*self.orden)[posicion:posicion + self.TAMANO_PAGINA])
+        return pagina
+
+    def _keyset(self, posicion):
+        parametros = {'page_size': self.TAMANO_PAGINA}
+        if posicion:
+            anterior = Consulta.objects.order_by(*self.orden)[posicion - 1]
+            parametros['cursor'] = self.paginacion.codificar_cursor(
+                [anterior.fecha_consulta, anterior.pk], False
+            )
+        request = Request(self.fabrica.get('/api/clinica/consultas/', parametros))
+
+        def pagina():
+            return self.paginacion.paginate_queryset(Consulta.objects.all(), request, self.vista)
+        return pagina
+
+    def test_latencia_por_profundidad(self):
+        mediciones = {}
+        for posicion in (0, 25_000, 50_000, 99_000):
+            offset, keyset = self._offset(posicion), self._keyset(posicion)
+            self.assertEqual(offset(), keyset())
+            mediciones[f'fila {posicion}: OFFSET'] = medir(offset, repeticiones=50)
+            mediciones[f'fila {posicion}: keyset'] = medir(keyset, repeticiones=50)
+
+        reportar(f'Página de {self.TAMANO_PAGINA} consultas ({self.FILAS} filas)', mediciones)
+
+
+class BenchmarkDashboard(TransactionTestCase):
+    """GET /api/dashboard/ frente a las tres acciones estadisticas pedidas en serie,
+    como hacía el frontend. Es TransactionTestCase porque el dashboard consulta desde
+    su pool de hilos, que solo ve datos confirmados."""
+    MASCOTAS = 50_000
+    CONSULTAS = 50_000
+    URLS = (
+        '/api/clinica/consultas/estadisticas/',
+        '/api/clinica/mascotas/estadisticas/',
+        '/api/facturacion/facturas/estadisticas/',
+    )
+
+    def setUp(self):
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        cliente = crear_cliente('dueno@correo.com')
+        especies = ('Perro', 'Gato', 'Conejo', 'Ave', 'Pez')
+        Mascota.objects.bulk_create([
+            Mascota(nombre=f'Mascota {i}', especie=especies[i % 5], raza='Mestiza', edad=3,
+                    sexo='M', dueño=cliente, estado=i % 10 != 0)
+            for i in range(self.MASCOTAS)
+        ], batch_size=5000)
+        mascota = Mascota.objects.first()
+        Consulta.objects.bulk_create([
+            Consulta(mascota=mascota, veterinario=veterinario, motivo='Control',
+                     diagnostico='Sano', costo='100.00')
+            for _ in range(self.CONSULTAS)
+        ], batch_size=5000)
+        ResumenConsultasService().reconstruir()
+        self.client = APIClient()
+        self.client.force_login(veterinario)
+        self.client.force_authenticate(veterinario)
+
+    def _en_serie(self):
+        for url in self.URLS:
+            assert self.client.get(url).status_code == 200
+
+    def _dashboard(self):
+        assert self.client.get('/api/dashboard/').status_code == 200
+
+    def test_dashboard_frente_a_tres_solicitudes(self):
+        en_serie = medir(self._en_serie, repeticiones=50)
+        dashboard = medir(self._dashboard, repeticiones=50)
+
+        reportar(f'Estadísticas del dashboard ({self.MASCOTAS} mascotas, {self.CONSULTAS} consultas)', {
+            'tres endpoints en serie': en_serie,
+            'dashboard (paralelo)': dashboard,
+        })
+        # Las consultas del pool no pasan por la captura: SQL/op del dashboard es solo el hilo principal
+        print(f'  Núcleos disponibles: {len(os.sched_getaffinity(0))}; el paralelismo solo rinde con más de uno')
@@ -0,0 +1,150 @@
+"""
+Caché de respuestas para endpoints de catálogo (datos que cambian poco).
+
+Cada modelo tiene un número de versión en el caché de Django que se incrementa en
+post_save/post_delete; la clave de cada respuesta incluye las versiones de sus
+modelos, así un cambio deja obsoletas todas las respuestas que dependen de él sin
+tener que buscarlas. Las respuestas llevan ETag y responden 304 a If-None-Match.
+"""
+import functools
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from rest_framework import status
+from rest_framework.response import Response
+
+_modelos_registrados = set()
+
+
+def _clave_version(modelo):
+    return f'respuesta:version:{modelo._meta.label_lower}'
+
+
+def invalidar_modelo(sender, **kwargs):
+    """Receptor de señales: nueva versión para el modelo modificado"""
+    clave = _clave_version(sender)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, time.time_ns(), timeout=None)
+
+
+def registrar_modelos(modelos):
+    for modelo in modelos:
+        if modelo in _modelos_registrados:
+            continue
+        uid = f'respuesta_cache:{modelo._meta.label_lower}'
+        post_save.connect(invalidar_modelo, sender=modelo, weak=False, dispatch_uid=uid)
+        post_delete.connect(invalidar_modelo, sender=modelo, weak=False, dispatch_uid=uid)
+        _modelos_registrados.add(modelo)
+
+
+def _versiones(modelos):
+    claves = [_clave_version(m) for m in modelos]
+    versiones = cache.get_many(claves)
+    for clave in claves:
+        if clave not in versiones:
+            # Un valor inicial único evita reutilizar respuestas si la versión se pierde del caché
+            cache.add(clave, time.time_ns(), timeout=None)
+            versiones[clave] = cache.get(clave)
+    return [str(versiones[c]) for c in claves]
+
+
+def _rol_de_cache(request):
+    from usuarios.roles import obtener_roles
+    usuario = getattr(request, 'user', None)
+    if not usuario or not usuario.is_authenticated:
+        return 'anonimo'
+    return ','.join(sorted(obtener_roles(usuario))) or 'sin_rol'
+
+
+def _clave_respuesta(request, modelos):
+    parametros = sorted((k, request.query_params.getlist(k)) for k in request.query_params)
+    partes = [
+        request.path,
+        json.dumps(parametros),
+        _rol_de_cache(request),
+        *_versiones(modelos),
+    ]
+    return 'respuesta:' + hashlib.sha256('|'.join(partes).encode()).hexdigest()
+
+
+def _etag(data):
+    contenido = json.dumps(data, sort_keys=True, default=str).encode()
+    return '"' + hashlib.md5(contenido).hexdigest() + '"'
+
+
+def _ttl(ttl):
+    return ttl if ttl is not None else getattr(settings, 'CACHE_RESPUESTAS_TTL', 3600)
+
+
+def _respuesta_condicional(request, data, etag):
+    if etag in [e.strip() for e in request.headers.get('If-None-Match', '').split(',')]:
+        respuesta = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        respuesta = Response(data)
+    respuesta['ETag'] = etag
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
+def obtener_o_calcular(request, ttl, modelos, calcular):
+    """Devuelve la respuesta en caché o ejecuta `calcular` y guarda su resultado"""
+    if request.method not in ('GET', 'HEAD'):
+        return calcular()
+
+    clave = _clave_respuesta(request, modelos)
+    guardado = cache.get(clave)
+    if guardado is not None:
+        return _respuesta_condicional(request, guardado['data'], guardado['etag'])
+
+    respuesta = calcular()
+    if respuesta.status_code != status.HTTP_200_OK or not hasattr(respuesta, 'data'):
+        return respuesta
+    etag = _etag(respuesta.data)
+    cache.set(clave, {'data': respuesta.data, 'etag': etag}, timeout=_ttl(ttl))
+    return _respuesta_condicional(request, respuesta.data, etag)
+
+
+def respuesta_en_cache(modelos, ttl=None):
+    """Decorador para acciones de viewset o vistas @api_view (colocarlo debajo de @api_view)"""
+    registrar_modelos(modelos)
+
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            # En métodos el primer argumento es la vista; el request es el siguiente
+            request = args[1] if len(args) > 1 and hasattr(args[1], 'query_params') else args[0]
+            return obtener_o_calcular(request, ttl, modelos, lambda: vista(*args, **kwargs))
+        return envoltura
+    return decorador
+
+
+class RespuestaCacheMixin:
+    """Mixin de viewset: list y retrieve se sirven desde caché.
+
+    cache_ttl: segundos en caché (por defecto CACHE_RESPUESTAS_TTL)
+    cache_modelos: modelos cuyos cambios invalidan la respuesta (por defecto el del queryset)
+    """
+    cache_ttl = None
+    cache_modelos = None
+
+    def _modelos_cache(self):
+        modelos = self.cache_modelos or [self.get_queryset().model]
+        registrar_modelos(modelos)
+        return modelos
+
+    def list(self, request, *args, **kwargs):
+        return obtener_o_calcular(
+            request, self.cache_ttl, self._modelos_cache(),
+            lambda: super(RespuestaCacheMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return obtener_o_calcular(
+            request, self.cache_ttl, self._modelos_cache(),
+            lambda: super(RespuestaCacheMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -0,0 +1,74 @@
+"""
+GET condicional (ETag / Last-Modified) para viewsets de modelos con AuditoriaMixin.
+
+El validador de un listado sale de una sola consulta: Max('fecha_modificacion') y el
+número de filas del queryset filtrado (el conteo detecta borrados, que no mueven el
+máximo). Si el cliente ya tiene esa versión se responde 304 sin serializar nada.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class GetCondicionalMixin:
+    """Mixin de viewset: ETag y Last-Modified en list y retrieve.
+
+    condicional_campos: fechas que invalidan la respuesta; admite rutas a modelos
+    relacionados cuyo contenido también se serializa (p. ej. 'pago__fecha_modificacion')
+    """
+    condicional_campos = ('fecha_modificacion',)
+
+    def _validadores(self, ultima, total):
+        partes = [
+            self.request.get_full_path(),
+            str(getattr(self.request.user, 'pk', None)),
+            ultima.isoformat() if ultima else '',
+            str(total),
+        ]
+        etag = 'W/"' + hashlib.md5('|'.join(partes).encode()).hexdigest() + '"'
+        return etag, ultima
+
+    def _no_modificado(self, etag, ultima):
+        si_no_coincide = self.request.headers.get('If-None-Match')
+        if si_no_coincide:
+            # Comparación débil: se ignora el prefijo W/
+            etags = [e.removeprefix('W/') for e in parse_etags(si_no_coincide)]
+            return '*' in etags or etag.removeprefix('W/') in etags
+        desde = parse_http_date_safe(self.request.headers.get('If-Modified-Since', ''))
+        return desde is not None and ultima is not None and int(ultima.timestamp()) <= desde
+
+    def _condicional(self, etag, ultima, generar):
+        if self._no_modificado(etag, ultima):
+            respuesta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            respuesta = generar()
+            if respuesta.status_code != status.HTTP_200_OK:
+                return respuesta
+        respuesta['ETag'] = etag
+        if ultima:
+            respuesta['Last-Modified'] = http_date(ultima.timestamp())
+        return respuesta
+
+    def _version(self, queryset):
+        agregados = {f'ultima_{i}': Max(campo) for i, campo in enumerate(self.condicional_campos)}
+        resultado = queryset.order_by().aggregate(total=Count('pk', distinct=True), **agregados)
+        fechas = [resultado[clave] for clave in agregados if resultado[clave]]
+        return self._validadores(max(fechas, default=None), resultado['total'])
+
+    def list(self, request, *args, **kwargs):
+        etag, ultima = self._version(self.filter_queryset(self.get_queryset()))
+        return self._condicional(
+            etag, ultima, lambda: super(GetCondicionalMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instancia = self.get_object()
+        if tuple(self.condicional_campos) == ('fecha_modificacion',):
+            etag, ultima = self._validadores(instancia.fecha_modificacion, 1)
+        else:
+            etag, ultima = self._version(type(instancia)._default_manager.filter(pk=instancia.pk))
+        return self._condicional(
+            etag, ultima, lambda: Response(self.get_serializer(instancia).data)
+        )
@@ -0,0 +1,80 @@
+"""
+Endpoint asíncrono del dashboard: reúne en una sola respuesta las estadísticas de
+consultas, mascotas y facturación, con las mismas funciones de servicio que usan las
+acciones estadisticas de cada viewset.
+
+Cada agregado es independiente, así que bajo ASGI se lanzan a la vez en un pool de
+hilos acotado (DASHBOARD_HILOS) en lugar de tres peticiones que bloquean un worker
+cada una con sus consultas en serie. El tiempo total es el del agregado más lento.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from clinica.services.consulta_service import ConsultaService
+from clinica.services.mascota_service import MascotaService
+from facturacion.services.factura_service import FacturaService
+from .db_router import lectura_replica
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DASHBOARD_HILOS', 4),
+                thread_name_prefix='dashboard'
+            )
+        return _pool
+
+
+def _en_pool(funcion):
+    """Versión awaitable de una función del ORM que corre en el pool del dashboard"""
+    @lectura_replica
+    def tarea():
+        # Los hilos del pool no pasan por request_started/finished: se descartan aquí
+        # las conexiones vencidas según CONN_MAX_AGE
+        close_old_connections()
+        return funcion()
+    return sync_to_async(tarea, thread_sensitive=False, executor=_obtener_pool())
+
+
+def estadisticas_consultas():
+    return ConsultaService().obtener_estadisticas()
+
+
+def estadisticas_facturacion():
+    return FacturaService().obtener_estadisticas()
+
+
+async def obtener_dashboard():
+    consultas, mascotas, especies, facturacion = await asyncio.gather(
+        _en_pool(estadisticas_consultas)(),
+        _en_pool(MascotaService.obtener_totales)(),
+        _en_pool(MascotaService.obtener_especies)(),
+        _en_pool(estadisticas_facturacion)(),
+    )
+    # Mismo resultado que MascotaService.obtener_estadisticas, con sus dos consultas en paralelo
+    mascotas['especies_stats'] = especies
+    return {
+        'consultas': consultas,
+        'mascotas': mascotas,
+        'facturacion': facturacion,
+    }
+
+
+async def dashboard(request):
+    """GET /api/dashboard/: estadísticas del dashboard en una sola respuesta"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+    # request.user puede ser perezoso (sesión): se resuelve fuera del event loop
+    autenticado = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not autenticado:
+        return JsonResponse({'error': 'Autenticación requerida'}, status=401)
+    return JsonResponse(await obtener_dashboard())
@@ -0,0 +1,61 @@
+"""
+Configuración de bases de datos a partir de variables de entorno.
+
+Variables (valores por defecto entre paréntesis):
+    DB_ENGINE (django.db.backends.mysql), MYSQL_DATABASE (veterinaria),
+    MYSQL_USER (veterinaria_user), MYSQL_PASSWORD (veterinaria_pass),
+    DB_HOST (db), DB_PORT (3306)
+    DB_CONN_MAX_AGE (60): segundos que se reutiliza una conexión; 0 = una por solicitud
+    DB_CONN_HEALTH_CHECKS (true): verifica la conexión reutilizada antes de usarla
+    DB_REPLICA_HOST: si se define, agrega el alias 'replica' para lecturas
+    DB_REPLICA_PORT, DB_REPLICA_USER, DB_REPLICA_PASSWORD: por defecto los del primario
+
+El backend de MySQL de Django no tiene pool de conexiones (el nativo es solo de
+PostgreSQL): cada hilo de cada worker reutiliza su propia conexión durante
+DB_CONN_MAX_AGE segundos y la verifica antes de usarla. El máximo de conexiones
+abiertas es workers × hilos por base, que debe quedar bajo max_connections de MySQL.
+"""
+import os
+
+ALIAS_REPLICA = 'replica'
+
+
+def _bool(nombre, defecto=False):
+    return os.getenv(nombre, str(defecto)).strip().lower() in ['1', 'true', 'si', 'yes']
+
+
+def _base_de_datos(host, port, user, password):
+    return {
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.mysql'),
+        'NAME': os.getenv('MYSQL_DATABASE', 'veterinaria'),
+        'USER': user,
+        'PASSWORD': password,
+        'HOST': host,
+        'PORT': port,
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': _bool('DB_CONN_HEALTH_CHECKS', True),
+    }
+
+
+def configurar_bases_de_datos():
+    """Devuelve el diccionario DATABASES (primario y, opcionalmente, réplica de lectura)"""
+    user = os.getenv('MYSQL_USER', 'veterinaria_user')
+    password = os.getenv('MYSQL_PASSWORD', 'veterinaria_pass')
+    port = os.getenv('DB_PORT', '3306')
+
+    bases = {
+        'default': _base_de_datos(os.getenv('DB_HOST', 'db'), port, user, password),
+    }
+
+    replica_host = os.getenv('DB_REPLICA_HOST')
+    if replica_host:
+        bases[ALIAS_REPLICA] = _base_de_datos(
+            replica_host,
+            os.getenv('DB_REPLICA_PORT', port),
+            os.getenv('DB_REPLICA_USER', user),
+            os.getenv('DB_REPLICA_PASSWORD', password),
+        )
+        # En pruebas la réplica apunta al mismo contenido que el primario
+        bases[ALIAS_REPLICA]['TEST'] = {'MIRROR': 'default'}
+
+    return bases
@@ -0,0 +1,109 @@
+import functools
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.core import signing
+from .database import ALIAS_REPLICA
+
+# Activo mientras una acción de viewset marcada como de solo lectura se ejecuta
+usar_replica = ContextVar('usar_replica', default=False)
+# Activo en solicitudes de escritura y en la ventana de la cookie tras una (lo fija
+# ReplicaStickyMiddleware): garantiza leer lo que uno mismo acaba de escribir aunque
+# la réplica vaya atrasada
+forzar_primario = ContextVar('forzar_primario', default=False)
+
+COOKIE_PRIMARIO = 'usar_primario_hasta'
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_disponible():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Envía las lecturas a la réplica solo cuando la solicitud actual lo permite.
+
+    No modifica estado: decidir cuándo leer del primario es tarea del middleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        if usar_replica.get() and not forzar_primario.get() and replica_disponible():
+            return ALIAS_REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario y réplica tienen el mismo contenido
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def lectura_replica(funcion):
+    """Decorador: las lecturas dentro de la función (p. ej. una @action) van a la réplica"""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        token = usar_replica.set(True)
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            usar_replica.reset(token)
+    return envoltura
+
+
+class LecturaReplicaMixin:
+    """Mixin de viewset: las acciones de acciones_replica leen desde la réplica"""
+
+    acciones_replica = ('list', 'retrieve', 'estadisticas')
+
+    def initial(self, request, *args, **kwargs):
+        self._token_replica = None
+        if request.method in METODOS_LECTURA and self.action in self.acciones_replica:
+            self._token_replica = usar_replica.set(True)
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_token_replica', None)
+        if token is not None:
+            usar_replica.reset(token)
+            self._token_replica = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickyMiddleware:
+    """Fija las lecturas al primario en las solicitudes de escritura y durante
+    REPLICA_SEGUNDOS_PRIMARIO después de una.
+
+    La marca viaja en una cookie firmada, así la siguiente solicitud del mismo cliente
+    (p. ej. el listado tras crear una cita) no lee de una réplica atrasada.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_disponible():
+            return self.get_response(request)
+
+        escritura = request.method not in METODOS_LECTURA
+        hasta = request.get_signed_cookie(COOKIE_PRIMARIO, default=None, salt=COOKIE_PRIMARIO)
+        fijado = escritura or (bool(hasta) and float(hasta) > time.time())
+        token_primario = forzar_primario.set(fijado)
+        token_replica = usar_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            # Los ContextVar persisten en el hilo: se restauran para la próxima solicitud
+            usar_replica.reset(token_replica)
+            forzar_primario.reset(token_primario)
+
+        if escritura and response.status_code < 400:
+            segundos = getattr(settings, 'REPLICA_SEGUNDOS_PRIMARIO', 5)
+            response.set_signed_cookie(
+                COOKIE_PRIMARIO, str(time.time() + segundos), salt=COOKIE_PRIMARIO,
+                max_age=segundos, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,235 @@
+"""
+Instrumentación por solicitud: cantidad y tiempo de SQL, tiempo total y tamaño de la
+respuesta, con presupuestos de consultas por acción y un endpoint /metrics.
+
+Las mediciones se guardan en un anillo de tamaño fijo por proceso (METRICAS_VENTANA
+solicitudes); /metrics las agrega al momento en formato de texto de Prometheus. Con
+varios workers cada proceso reporta su propia ventana (etiqueta pid). /metrics exige
+METRICAS_TOKEN; si no está configurado no expone nada.
+
+Los presupuestos se declaran en el viewset:
+
+    presupuesto_consultas = {'list': 5, 'retrieve': 3}
+
+o como un entero para todas sus acciones. Al excederse se registra una advertencia;
+con PRESUPUESTO_CONSULTAS_ESTRICTO = True (en tests) la solicitud falla.
+"""
+import hmac
+import itertools
+import logging
+import os
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+CUANTILES = (0.5, 0.95, 0.99)
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """Una acción ejecutó más consultas SQL que las declaradas en su presupuesto"""
+
+
+class AnilloMetricas:
+    """Últimas N mediciones del proceso, sin locks.
+
+    Cada escritura toma su posición de un itertools.count (next() es atómico bajo el
+    GIL) y reemplaza la tupla de esa ranura; los lectores copian la lista completa.
+    Como mucho se lee una medición vieja en una ranura que se estaba pisando.
+    """
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self._ranuras = [None] * capacidad
+        self._secuencia = itertools.count()
+        self.total = 0
+
+    def agregar(self, medicion):
+        indice = next(self._secuencia)
+        self._ranuras[indice % self.capacidad] = medicion
+        # Solo crece: una carrera entre dos escrituras puede dejarlo atrás por una
+        self.total = max(self.total, indice + 1)
+
+    def mediciones(self):
+        return [m for m in list(self._ranuras) if m is not None]
+
+
+anillo = AnilloMetricas(getattr(settings, 'METRICAS_VENTANA', 2048))
+
+
+class _ContadorSQL:
+    """execute_wrapper que acumula cantidad y duración de las consultas"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def _endpoint(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return 'sin_ruta'
+    # Nombre de la ruta (p. ej. 'cita-list') o ruta de la función si no tiene nombre
+    return coincidencia.view_name
+
+
+def _presupuesto(request):
+    """Máximo de consultas de la acción resuelta, o None si no declara uno"""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return None
+    vista = coincidencia.func
+    clase = getattr(vista, 'cls', None)
+    presupuesto = getattr(clase or vista, 'presupuesto_consultas', None)
+    if isinstance(presupuesto, dict):
+        # as_view() de un ViewSet deja el mapeo método → acción en vista.actions
+        acciones = getattr(vista, 'actions', None) or {}
+        metodo = request.method.lower()
+        accion = acciones.get(metodo) or (acciones.get('get') if metodo == 'head' else None)
+        presupuesto = presupuesto.get(accion)
+    if presupuesto is None:
+        presupuesto = getattr(settings, 'PRESUPUESTO_CONSULTAS_DEFECTO', None)
+    return presupuesto
+
+
+def _tamano(response):
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class MetricasMiddleware:
+    """Mide cada solicitud y aplica el presupuesto de consultas de la acción.
+
+    Solo cuenta las consultas del hilo de la solicitud; las de pools propios (p. ej.
+    el dashboard o los PDFs de facturas) quedan fuera.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == '/metrics':
+            return self.get_response(request)
+
+        contador = _ContadorSQL()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(contador))
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        endpoint = _endpoint(request)
+        presupuesto = _presupuesto(request)
+        excedido = presupuesto is not None and contador.consultas > presupuesto
+        anillo.agregar((
+            endpoint, request.method, response.status_code, contador.consultas,
+            contador.segundos, duracion, _tamano(response), excedido
+        ))
+
+        if excedido:
+            mensaje = (
+                f'{request.method} {endpoint} ejecutó {contador.consultas} consultas SQL '
+                f'(presupuesto {presupuesto})'
+            )
+            if getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False):
+                raise PresupuestoConsultasExcedido(mensaje)
+            logger.warning(mensaje)
+        return response
+
+
+def _cuantil(valores_ordenados, q):
+    return valores_ordenados[min(len(valores_ordenados) - 1, int(q * len(valores_ordenados)))]
+
+
+def _escapar_etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(**etiquetas):
+    return '{' + ','.join(f'{nombre}="{_escapar_etiqueta(valor)}"' for nombre, valor in etiquetas.items()) + '}'
+
+
+def texto_prometheus(mediciones=None, total=None):
+    """Resumen de la ventana en formato de exposición de Prometheus"""
+    mediciones = anillo.mediciones() if mediciones is None else mediciones
+    total = anillo.total if total is None else total
+    pid = os.getpid()
+
+    grupos = {}
+    for endpoint, metodo, estado, consultas, sql, duracion, tamano, excedido in mediciones:
+        grupos.setdefault((endpoint, metodo), []).append(
+            (estado, consultas, sql, duracion, tamano, excedido)
+        )
+
+    lineas = [
+        '# HELP veterinaria_solicitudes_total Solicitudes atendidas por el proceso desde su inicio.',
+        '# TYPE veterinaria_solicitudes_total counter',
+        f'veterinaria_solicitudes_total{_etiquetas(pid=pid)} {total}',
+    ]
+    series = (
+        ('veterinaria_solicitud_segundos', 'Duración total de la solicitud', 3),
+        ('veterinaria_sql_segundos', 'Tiempo en SQL por solicitud', 2),
+        ('veterinaria_sql_consultas', 'Consultas SQL por solicitud', 1),
+        ('veterinaria_respuesta_bytes', 'Tamaño del cuerpo de la respuesta', 4),
+    )
+    for nombre, ayuda, columna in series:
+        lineas += [
+            f'# HELP {nombre} {ayuda} (cuantiles sobre la ventana reciente).',
+            f'# TYPE {nombre} gauge',
+        ]
+        for (endpoint, metodo), filas in sorted(grupos.items()):
+            valores = sorted(fila[columna] for fila in filas)
+            for q in CUANTILES:
+                etiquetas = _etiquetas(pid=pid, endpoint=endpoint, metodo=metodo, quantile=q)
+                lineas.append(f'{nombre}{etiquetas} {_cuantil(valores, q):g}')
+
+    lineas += [
+        '# HELP veterinaria_ventana_solicitudes Solicitudes en la ventana reciente por estado HTTP.',
+        '# TYPE veterinaria_ventana_solicitudes gauge',
+    ]
+    for (endpoint, metodo), filas in sorted(grupos.items()):
+        por_estado = {}
+        for fila in filas:
+            por_estado[fila[0]] = por_estado.get(fila[0], 0) + 1
+        for estado, cantidad in sorted(por_estado.items()):
+            etiquetas = _etiquetas(pid=pid, endpoint=endpoint, metodo=metodo, estado=estado)
+            lineas.append(f'veterinaria_ventana_solicitudes{etiquetas} {cantidad}')
+
+    lineas += [
+        '# HELP veterinaria_ventana_presupuesto_excedido Solicitudes de la ventana que excedieron su presupuesto de consultas.',
+        '# TYPE veterinaria_ventana_presupuesto_excedido gauge',
+    ]
+    for (endpoint, metodo), filas in sorted(grupos.items()):
+        excedidas = sum(1 for fila in filas if fila[5])
+        if excedidas:
+            etiquetas = _etiquetas(pid=pid, endpoint=endpoint, metodo=metodo)
+            lineas.append(f'veterinaria_ventana_presupuesto_excedido{etiquetas} {excedidas}')
+    return '\n'.join(lineas) + '\n'
+
+
+def metricas(request):
+    """GET /metrics con Authorization: Bearer <METRICAS_TOKEN>.
+
+    Sin METRICAS_TOKEN configurado responde 403: los nombres de endpoint y los tiempos
+    no se publican por omisión.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if not token:
+        return HttpResponse('METRICAS_TOKEN no configurado\n', status=403, content_type='text/plain')
+    autorizacion = request.headers.get('Authorization', '').encode()
+    if not hmac.compare_digest(autorizacion, f'Bearer {token}'.encode()):
+        return HttpResponse('No autorizado\n', status=401, content_type='text/plain')
+    return HttpResponse(texto_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
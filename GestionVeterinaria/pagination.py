@@ -0,0 +1,158 @@
+"""
+Paginación por clave (keyset) para todos los listados de la API.
+
+A diferencia de LIMIT/OFFSET, cada página filtra a partir de los valores de la última
+fila (WHERE (a, b) < (x, y)) y el índice de la ordenación la resuelve sin recorrer
+las filas anteriores: la página 1000 cuesta lo mismo que la primera. El cursor guarda
+los valores de todas las columnas de la ordenación, no solo de la primera como
+CursorPagination de DRF, así los empates (varias facturas del mismo día) no
+degeneran en un OFFSET.
+
+Cada viewset declara su ordenación en `orden_paginacion` (o `get_orden_paginacion()`),
+terminada en la clave primaria para que sea total y los cursores sean estables.
+"""
+import base64
+import json
+from datetime import date, time
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class _CodificadorCursor(json.JSONEncoder):
+    """Fechas con precisión completa: DjangoJSONEncoder recorta los microsegundos"""
+
+    def default(self, o):
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        if isinstance(o, Decimal):
+            return str(o)
+        return super().default(o)
+
+
+class PaginacionKeyset(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    orden_por_defecto = ('-pk',)
+    mensaje_cursor_invalido = 'Cursor de paginación inválido'
+
+    @property
+    def page_size(self):
+        return settings.REST_FRAMEWORK.get('PAGE_SIZE') or 50
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'PAGINACION_TAMANO_MAXIMO', 200)
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(tamano, self.max_page_size))
+
+    def get_ordering(self, view):
+        if hasattr(view, 'get_orden_paginacion'):
+            return tuple(view.get_orden_paginacion())
+        return tuple(getattr(view, 'orden_paginacion', self.orden_por_defecto))
+
+    def codificar_cursor(self, valores, atras):
+        texto = json.dumps({'v': valores, 'a': atras}, cls=_CodificadorCursor, separators=(',', ':'))
+        return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+    def decodificar_cursor(self, request, columnas):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            valores, atras = datos['v'], bool(datos['a'])
+        except (ValueError, TypeError, KeyError):
+            raise NotFound(self.mensaje_cursor_invalido)
+        if not isinstance(valores, list) or len(valores) != len(columnas):
+            raise NotFound(self.mensaje_cursor_invalido)
+        return valores, atras
+
+    @staticmethod
+    def _despues_de(columnas, valores):
+        """Q de las filas que van después de `valores` en el orden (a, b, ...) indicado.
+
+        (a, b) > (x, y) se expande como a > x OR (a = x AND b > y); la condición
+        redundante a >= x delante permite al optimizador usar un rango sobre el índice
+        compuesto, que con el OR solo no siempre reconoce.
+        """
+        condicion = Q()
+        iguales = Q()
+        for (campo, descendente), valor in zip(columnas, valores):
+            operador = 'lt' if descendente else 'gt'
+            condicion |= iguales & Q(**{f'{campo}__{operador}': valor})
+            iguales &= Q(**{campo: valor})
+        (primero, descendente), valor = columnas[0], valores[0]
+        return Q(**{f'{primero}__{"lte" if descendente else "gte"}': valor}) & condicion
+
+    @staticmethod
+    def _valor(objeto, campo):
+        for parte in campo.split('__'):
+            objeto = getattr(objeto, parte)
+        return objeto
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Un queryset ya recortado (p. ej. un top-N) no admite más filtros
+        if queryset.query.is_sliced:
+            return None
+
+        self.request = request
+        self.tamano = self.get_page_size(request)
+        orden = self.get_ordering(view)
+        columnas = [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+        valores, atras = self.decodificar_cursor(request, columnas)
+
+        # Hacia atrás se recorre en el orden inverso y luego se invierte la página
+        recorrido = [(campo, descendente != atras) for campo, descendente in columnas]
+        queryset = queryset.order_by(*[('-' if d else '') + c for c, d in recorrido])
+        if valores is not None:
+            queryset = queryset.filter(self._despues_de(recorrido, valores))
+
+        filas = list(queryset[:self.tamano + 1])
+        hay_mas = len(filas) > self.tamano
+        filas = filas[:self.tamano]
+        if atras:
+            filas.reverse()
+
+        def cursor(objeto, hacia_atras):
+            return self.codificar_cursor([self._valor(objeto, c) for c, _ in columnas], hacia_atras)
+
+        # Hay página siguiente si quedan filas adelante o si venimos desde atrás (y viceversa)
+        hay_siguiente = hay_mas if not atras else valores is not None
+        hay_anterior = hay_mas if atras else valores is not None
+        self.siguiente = cursor(filas[-1], False) if filas and hay_siguiente else None
+        self.anterior = cursor(filas[0], True) if filas and hay_anterior else None
+        return filas
+
+    def _enlace(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._enlace(self.siguiente),
+            'previous': self._enlace(self.anterior),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
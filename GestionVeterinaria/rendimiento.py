@@ -0,0 +1,100 @@
+"""
+Utilidades para los benchmarks de las apps (módulos benchmarks.py):
+
+    python manage.py test --settings=GestionVeterinaria.settings_test --pattern="benchmarks.py"
+
+Cada benchmark es un TestCase que mide con medir() e imprime una tabla con
+reportar(); las aserciones solo verifican lo que no depende de la máquina
+(cantidad de consultas, resultados iguales), nunca tiempos absolutos.
+"""
+import json
+import os
+import resource
+import time
+import traceback
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class Medicion:
+    def __init__(self, duraciones, consultas, cpu=0.0):
+        self.duraciones = sorted(duraciones)
+        self.consultas = consultas
+        self.cpu = cpu
+
+    @property
+    def repeticiones(self):
+        return len(self.duraciones)
+
+    def percentil(self, p):
+        return self.duraciones[min(len(self.duraciones) - 1, int(p / 100 * len(self.duraciones)))]
+
+    @property
+    def por_segundo(self):
+        return self.repeticiones / sum(self.duraciones)
+
+    @property
+    def consultas_por_repeticion(self):
+        return self.consultas / self.repeticiones
+
+    @property
+    def cpu_por_repeticion(self):
+        """Segundos de CPU del proceso por repetición"""
+        return self.cpu / self.repeticiones
+
+
+def medir(funcion, repeticiones=200, calentamiento=5):
+    """Ejecuta `funcion` varias veces; devuelve la duración de cada una, las consultas SQL
+    y el tiempo de CPU total"""
+    for _ in range(calentamiento):
+        funcion()
+    duraciones = []
+    cpu = time.process_time()
+    with CaptureQueriesContext(connection) as consultas:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            duraciones.append(time.perf_counter() - inicio)
+    return Medicion(duraciones, len(consultas), time.process_time() - cpu)
+
+
+def reportar(titulo, mediciones):
+    """Imprime {nombre: Medicion} como tabla: por segundo, p50, p99, CPU (ms) y consultas"""
+    print(f'\n{titulo}')
+    print(f'  {"":<28}{"op/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"CPU ms":>10}{"SQL/op":>8}')
+    for nombre, m in mediciones.items():
+        print(
+            f'  {nombre:<28}{m.por_segundo:>10.0f}{m.percentil(50) * 1000:>10.2f}'
+            f'{m.percentil(99) * 1000:>10.2f}{m.cpu_por_repeticion * 1000:>10.2f}'
+            f'{m.consultas_por_repeticion:>8.1f}'
+        )
+
+
+def crecimiento_rss(funcion):
+    """Ejecuta `funcion` en un proceso hijo (fork) y devuelve (MB que creció su RSS
+    máximo, valor devuelto por `funcion`). Cada medición parte de la memoria actual del
+    proceso y no hereda el pico de la anterior. Solo Unix; el hijo abre sus propias
+    conexiones, así que los datos deben estar confirmados (TransactionTestCase)."""
+    lectura, escritura = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(lectura)
+        codigo = 1
+        try:
+            connections.close_all()
+            inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            resultado = funcion()
+            final = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            os.write(escritura, json.dumps([(final - inicial) / 1024, resultado]).encode())
+            codigo = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(codigo)
+    os.close(escritura)
+    with os.fdopen(lectura) as canal:
+        datos = canal.read()
+    _, estado = os.waitpid(pid, 0)
+    if estado:
+        raise RuntimeError('La medición falló en el proceso hijo')
+    return tuple(json.loads(datos))
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import datetime
 import os
 from pathlib import Path
 
@@ -47,13 +48,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Primero: mide la solicitud completa, incluidas las consultas de sesión
+    'GestionVeterinaria.metricas.MetricasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     #'django.middleware.csrf.CsrfViewMiddleware',
-    'usuarios.api.JWTAuthenticationMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',  
-    'usuarios.middleware.DebugAuthMiddleware',  
+    'usuarios.api.JWTAuthenticationMiddleware',
+    'GestionVeterinaria.db_router.ReplicaStickyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -98,16 +101,14 @@ WSGI_APPLICATION = 'GestionVeterinaria.wsgi.application'
 #    }
 #} 
 #else: (sqlLite, pero no usare )
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'veterinaria',
-        'USER': 'veterinaria_user',
-        'PASSWORD': 'veterinaria_pass',
-        'HOST': 'db',  
-        'PORT': '3306',
-    }
-}
+from .database import configurar_bases_de_datos
+
+# Conexiones persistentes con verificación de salud y réplica opcional (ver database.py).
+# Con MySQL no hay pool: solo CONN_MAX_AGE y CONN_HEALTH_CHECKS por hilo de cada worker
+DATABASES = configurar_bases_de_datos()
+DATABASE_ROUTERS = ['GestionVeterinaria.db_router.ReplicaRouter']
+# Segundos que un cliente lee del primario después de escribir (retraso de la réplica)
+REPLICA_SEGUNDOS_PRIMARIO = 5
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -128,6 +129,64 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Hashing de contraseñas: el primero de la lista es el preferido; los hashes con
+# otro algoritmo o menos iteraciones se regeneran en el siguiente login correcto
+# Solo hashers sin dependencias extra (Argon2 y BCrypt requieren argon2-cffi y bcrypt)
+PASSWORD_PBKDF2_ITERACIONES = int(os.getenv('PASSWORD_PBKDF2_ITERACIONES', '1000000'))
+PASSWORD_HASHERS = list(dict.fromkeys([
+    os.getenv('PASSWORD_HASHER_PREFERIDO', 'usuarios.hashers.PBKDF2PasswordHasherAjustable'),
+    'usuarios.hashers.PBKDF2PasswordHasherAjustable',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]))
+
+# Límite de intentos de login (ver usuarios.throttling.LimitadorLogin). Los contadores
+# viven en el caché de Django: sin CACHE_URL cada worker tiene los suyos (usuarios.E001)
+LOGIN_THROTTLE = {
+    'ALMACEN': 'usuarios.throttling.AlmacenCache',
+    'MAX_POR_IP': 30,
+    'MAX_POR_CUENTA': 5,
+    'VENTANA': 300,
+}
+
+
+# Caché: locmem por defecto (desarrollo y tests); en producción CACHE_URL apunta a
+# un Redis compartido para que todos los workers vean las mismas invalidaciones
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL'),
+    } if os.getenv('CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Segundos que se conserva cada respuesta de catálogo (ver GestionVeterinaria.cache)
+CACHE_RESPUESTAS_TTL = int(os.getenv('CACHE_RESPUESTAS_TTL', '3600'))
+
+# PDFs de facturas: directorio de la caché en disco e hilos del pool local
+# (0 deja la cola solo para el comando procesar_pdfs_facturas)
+FACTURAS_PDF_DIR = os.getenv('FACTURAS_PDF_DIR', str(BASE_DIR / 'media' / 'facturas'))
+FACTURAS_PDF_WORKERS = int(os.getenv('FACTURAS_PDF_WORKERS', '2'))
+
+# Índice de disponibilidad de citas (clinica.services.disponibilidad_service): cada fecha se
+# recarga de la base tras estos segundos para ver las reservas de otros workers, y se
+# conservan como mucho estas fechas por proceso
+CLINICA_INDICE_DISPONIBILIDAD_TTL = int(os.getenv('CLINICA_INDICE_DISPONIBILIDAD_TTL', '30'))
+CLINICA_INDICE_DISPONIBILIDAD_MAX_FECHAS = int(os.getenv('CLINICA_INDICE_DISPONIBILIDAD_MAX_FECHAS', '120'))
+
+# Hilos del pool que calcula en paralelo los agregados del dashboard (GestionVeterinaria.dashboard)
+DASHBOARD_HILOS = int(os.getenv('DASHBOARD_HILOS', '4'))
+
+# Instrumentación (GestionVeterinaria.metricas): solicitudes recientes que agrega /metrics,
+# token para leerlo (sin token /metrics responde 403) y presupuesto de consultas de las
+# acciones que no declaran uno.
+# Los tests activan PRESUPUESTO_CONSULTAS_ESTRICTO para que exceder un presupuesto falle.
+METRICAS_VENTANA = int(os.getenv('METRICAS_VENTANA', '2048'))
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+PRESUPUESTO_CONSULTAS_DEFECTO = int(os.getenv('PRESUPUESTO_CONSULTAS_DEFECTO', '0')) or None
+PRESUPUESTO_CONSULTAS_ESTRICTO = os.getenv('PRESUPUESTO_CONSULTAS_ESTRICTO', '') == '1'
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -186,14 +245,38 @@ AUTHENTICATION_BACKENDS = [
 AUTH_USER_MODEL = "usuarios.Usuario"
 
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'usuarios.authentication.JWTAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # Paginación por clave en todos los listados (ver GestionVeterinaria.pagination)
+    'DEFAULT_PAGINATION_CLASS': 'GestionVeterinaria.pagination.PaginacionKeyset',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '50')),
 }
+PAGINACION_TAMANO_MAXIMO = int(os.getenv('API_PAGE_SIZE_MAX', '200'))
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
 CORS_ALLOW_ALL_ORIGINS = True  # Solo para desarrollo
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# Autenticación JWT: los usuarios se guardan en un caché LRU por proceso. La versión
+# de token está en Usuario.version_token; otros workers ven una revocación cuando
+# vence su entrada del caché (JWT_CACHE_USUARIOS_TTL)
+JWT_HORAS_VALIDEZ = 24
+JWT_CACHE_USUARIOS_TTL = 300  # segundos
+JWT_CACHE_USUARIOS_MAX = 1000
+
+# Roles de cada usuario para HasRole: caché LRU por proceso, se invalida al cambiar UsuarioRol
+ROLES_CACHE_TTL = 300  # segundos
+ROLES_CACHE_MAX = 1000
+
+# Tokens de simplejwt (CustomTokenObtainPairView): la clave primaria es id_usuario;
+# los valida usuarios.authentication.JWTAuthentication igual que los de generar_token
+SIMPLE_JWT = {
+    'USER_ID_FIELD': 'id_usuario',
+    'ACCESS_TOKEN_LIFETIME': datetime.timedelta(hours=JWT_HORAS_VALIDEZ),
+}
@@ -0,0 +1,48 @@
+"""
+Configuración para ejecutar los tests y benchmarks sin MySQL:
+
+    python manage.py test --settings=GestionVeterinaria.settings_test
+
+Usa dos bases SQLite en archivos temporales, 'default' y 'replica', para poder
+probar el enrutamiento a la réplica y la concurrencia entre hilos (una base en
+memoria compartida bloquea la tabla completa ante escrituras concurrentes).
+"""
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+
+def _sqlite(nombre):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), f'veterinaria_{nombre}.sqlite3'),
+        # BEGIN IMMEDIATE: las transacciones toman el lock de escritura al iniciar y
+        # esperan su turno en lugar de fallar al intentar escribir
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), f'test_veterinaria_{nombre}.sqlite3')},
+    }
+
+
+DATABASES = {
+    'default': _sqlite('default'),
+    'replica': _sqlite('replica'),
+}
+# Sin router: los tests usan el primario salvo los de enrutamiento, que activan
+# ReplicaRouter con override_settings
+DATABASE_ROUTERS = []
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+# Los tests corren en un solo proceso: el caché local alcanza (ver usuarios.checks)
+SILENCED_SYSTEM_CHECKS = ['usuarios.E001']
+
+FACTURAS_PDF_DIR = os.path.join(tempfile.gettempdir(), 'veterinaria_facturas_test')
+FACTURAS_PDF_WORKERS = 0
+DASHBOARD_HILOS = 2
+
+METRICAS_TOKEN = 'token-de-prueba'
+PRESUPUESTO_CONSULTAS_ESTRICTO = True
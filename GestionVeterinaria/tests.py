@@ -0,0 +1,256 @@
+from django.core.cache import cache
+import json
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from clinica.models import ResumenConsultasDiario
+from clinica.services.disponibilidad_service import indice_disponibilidad
+from clinica.tests import crear_cliente, crear_consulta, crear_mascota, crear_usuario, proximo_dia_habil
+from facturacion.models import Factura
+from facturacion.tests import crear_facturas
+from usuarios.models import Usuario
+from facturacion.views.factura_views import FacturaViewSet
+from .db_router import COOKIE_PRIMARIO, ReplicaRouter, forzar_primario
+from .metricas import AnilloMetricas, PresupuestoConsultasExcedido, anillo
+
+
+@override_settings(DATABASE_ROUTERS=['GestionVeterinaria.db_router.ReplicaRouter'])
+class ReplicaRouterTests(TestCase):
+    """Primario y réplica son dos bases SQLite distintas: el resumen de consultas solo
+    existe en la réplica, así la respuesta muestra de qué base se leyó"""
+    databases = {'default', 'replica'}
+    URL = '/api/clinica/consultas/estadisticas/'
+
+    def setUp(self):
+        cache.clear()
+        indice_disponibilidad.invalidar()
+        veterinario_replica = Usuario.objects.using('replica').create(
+            email='vet@replica.com', username='vet@replica.com', nombre='Vet', apellido='Réplica'
+        )
+        ResumenConsultasDiario.objects.using('replica').create(
+            fecha=proximo_dia_habil(), veterinario=veterinario_replica, estado=True,
+            cantidad_consultas=7, total='700.00'
+        )
+        self.veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        self.mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.veterinario)
+
+    def _total_consultas(self):
+        return self.client.get(self.URL).data['total_consultas']
+
+    def _reservar(self):
+        response = self.client.post('/api/clinica/citas/reservar/', {
+            'mascota': self.mascota.pk, 'veterinario': self.veterinario.pk,
+            'fecha': proximo_dia_habil().isoformat(), 'hora': '10:00',
+        })
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def test_estadisticas_leen_de_la_replica(self):
+        self.assertEqual(self._total_consultas(), 7)
+
+    def test_escritura_fija_las_lecturas_al_primario(self):
+        response = self._reservar()
+
+        self.assertIn(COOKIE_PRIMARIO, response.cookies)
+        # Con la cookie de la escritura la lectura va al primario, que no tiene resumen
+        self.assertEqual(self._total_consultas(), 0)
+
+        self.client.cookies.pop(COOKIE_PRIMARIO)
+        self.assertEqual(self._total_consultas(), 7)
+
+    @override_settings(REPLICA_SEGUNDOS_PRIMARIO=0)
+    def test_la_ventana_de_la_cookie_vence(self):
+        self._reservar()
+
+        self.assertEqual(self._total_consultas(), 7)
+
+    def test_el_router_no_modifica_el_contexto(self):
+        self.assertEqual(ReplicaRouter().db_for_write(ResumenConsultasDiario), 'default')
+        self.assertFalse(forzar_primario.get())
+
+
+class PaginacionKeysetTests(TestCase):
+    """Facturas que empatan en fecha_emision: el cursor guarda (fecha, id), así cada
+    página continúa exactamente donde terminó la anterior"""
+    URL = '/api/facturacion/facturas/'
+
+    def setUp(self):
+        crear_facturas(7)
+        Factura.objects.update(fecha_emision=proximo_dia_habil())
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('caja@clinica.com', roles=['Recepcionista']))
+
+    def _ids(self, response):
+        return [f['id_factura'] for f in response.data['results']]
+
+    def _recorrer(self, url):
+        ids, paginas = [], []
+        while url:
+            response = self.client.get(url)
+            paginas.append(response)
+            ids += self._ids(response)
+            url = response.data['next']
+        return ids, paginas
+
+    def test_empates_se_recorren_una_vez_en_orden(self):
+        ids, paginas = self._recorrer(f'{self.URL}?page_size=3')
+
+        esperados = list(Factura.objects.order_by('-fecha_emision', '-id_factura').values_list('pk', flat=True))
+        self.assertEqual(ids, esperados)
+        self.assertEqual([len(self._ids(p)) for p in paginas], [3, 3, 1])
+
+    def test_cursor_estable_ante_inserciones_en_el_empate(self):
+        primera = self.client.get(f'{self.URL}?page_size=3')
+        # Una factura nueva del mismo día ordena antes (id mayor): no desplaza las páginas
+        crear_facturas(1, inicio=50)
+        Factura.objects.filter(numero_factura='FACT-00000050').update(fecha_emision=proximo_dia_habil())
+
+        resto, _ = self._recorrer(primera.data['next'])
+
+        self.assertEqual(self._ids(primera) + resto, list(Factura.objects.exclude(
+            numero_factura='FACT-00000050'
+        ).order_by('-fecha_emision', '-id_factura').values_list('pk', flat=True)))
+
+    def test_previous_vuelve_a_la_misma_pagina(self):
+        primera = self.client.get(f'{self.URL}?page_size=3')
+        segunda = self.client.get(primera.data['next'])
+
+        self.assertEqual(self._ids(self.client.get(segunda.data['previous'])), self._ids(primera))
+
+
+class PaginacionKeysetMascotasTests(TestCase):
+    """MascotaViewSet pagina por id_mascota y, al buscar, por el orden de relevancia"""
+    URL = '/api/clinica/mascotas/'
+
+    def setUp(self):
+        cliente = crear_cliente('dueno@correo.com')
+        for i in range(5):
+            crear_mascota(cliente, f'Toby {i}')
+        for i in range(3):
+            crear_mascota(cliente, f'Luna {i}')
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('recepcion@clinica.com', roles=['Recepcionista']))
+
+    def _recorrer(self, url, parametros):
+        nombres, tamanos = [], []
+        response = self.client.get(url, parametros)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pagina = [m['nombre'] for m in response.data['results']]
+            nombres += pagina
+            tamanos.append(len(pagina))
+            if not response.data['next']:
+                return nombres, tamanos
+            response = self.client.get(response.data['next'])
+
+    def test_listado_por_id_descendente(self):
+        nombres, tamanos = self._recorrer(self.URL, {'page_size': 3})
+
+        self.assertEqual(nombres, [f'Luna {i}' for i in (2, 1, 0)] + [f'Toby {i}' for i in (4, 3, 2, 1, 0)])
+        self.assertEqual(tamanos, [3, 3, 2])
+
+    def test_busqueda_conserva_el_orden_por_relevancia(self):
+        # 'ana' coincide con todas por el nombre de la dueña; Anastasia va primero por su nombre
+        crear_mascota(crear_cliente('otro@correo.com'), 'Anastasia')
+        nombres, tamanos = self._recorrer(self.URL, {'page_size': 2, 'search': 'ana'})
+
+        self.assertEqual(nombres, ['Anastasia'] + [f'Luna {i}' for i in range(3)] + [f'Toby {i}' for i in range(5)])
+        self.assertEqual(tamanos, [2, 2, 2, 2, 1])
+
+
+class DashboardTests(TransactionTestCase):
+    """El dashboard corre sus consultas en otros hilos, que solo ven datos confirmados"""
+
+    def setUp(self):
+        cache.clear()
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        cliente = crear_cliente('dueno@correo.com')
+        crear_mascota(cliente, 'Toby')
+        crear_mascota(cliente, 'Luna')
+        crear_mascota(cliente, 'Michi', especie='Gato')
+        crear_mascota(cliente, 'Nemo', especie='Pez', estado=False)
+        crear_consulta(crear_mascota(cliente, 'Rocky'), veterinario, '80.00')
+        crear_facturas(4, veterinario=veterinario, cliente=cliente)
+        self.client = APIClient()
+        self.client.force_login(veterinario)
+        self.client.force_authenticate(veterinario)
+
+    def test_coincide_con_los_endpoints_de_estadisticas(self):
+        respuesta = self.client.get('/api/dashboard/')
+        self.assertEqual(respuesta.status_code, 200)
+
+        dashboard = json.loads(respuesta.content)
+        self.assertEqual(dashboard['consultas']['total_consultas'], 5)
+        self.assertEqual(dashboard['facturacion']['total_facturado'], 452.0)
+        self.assertEqual(dashboard, {
+            'consultas': self.client.get('/api/clinica/consultas/estadisticas/').json(),
+            'mascotas': self.client.get('/api/clinica/mascotas/estadisticas/').json(),
+            'facturacion': self.client.get('/api/facturacion/facturas/estadisticas/').json(),
+        })
+
+    def test_estadisticas_de_mascotas(self):
+        estadisticas = self.client.get('/api/clinica/mascotas/estadisticas/').json()
+
+        self.assertEqual(estadisticas, {
+            'total_mascotas': 6,
+            'mascotas_activas': 5,
+            'mascotas_inactivas': 1,
+            'especies_stats': [{'especie': 'Perro', 'total': 4}, {'especie': 'Gato', 'total': 1}],
+        })
+
+
+class AnilloMetricasTests(TestCase):
+    def test_conserva_las_ultimas_mediciones(self):
+        anillo_prueba = AnilloMetricas(3)
+        self.assertEqual(anillo_prueba.mediciones(), [])
+
+        for i in range(5):
+            anillo_prueba.agregar(i)
+
+        self.assertEqual(sorted(anillo_prueba.mediciones()), [2, 3, 4])
+        self.assertEqual(anillo_prueba.total, 5)
+
+
+class MetricasTests(TestCase):
+    URL_FACTURAS = '/api/facturacion/facturas/'
+
+    def setUp(self):
+        crear_facturas(3)
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('caja@clinica.com', roles=['Recepcionista']))
+
+    def _metricas(self, token='token-de-prueba'):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_metrics_exige_el_token(self):
+        self.assertEqual(self._metricas('otro').status_code, 401)
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self._metricas().status_code, 200)
+
+    @override_settings(METRICAS_TOKEN='')
+    def test_sin_token_configurado_no_expone_metricas(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self._metricas('').status_code, 403)
+
+    def test_presupuesto_excedido_falla_en_modo_estricto(self):
+        with mock.patch.object(FacturaViewSet, 'presupuesto_consultas', {'list': 1}):
+            with self.assertRaises(PresupuestoConsultasExcedido):
+                self.client.get(self.URL_FACTURAS)
+
+    @override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=False)
+    def test_presupuesto_excedido_se_registra(self):
+        with mock.patch.object(FacturaViewSet, 'presupuesto_consultas', {'list': 1}), \
+                self.assertLogs('GestionVeterinaria.metricas', 'WARNING') as registro:
+            self.assertEqual(self.client.get(self.URL_FACTURAS).status_code, 200)
+
+        self.assertIn('factura-list ejecutó 2 consultas SQL (presupuesto 1)', registro.output[0])
+        self.assertTrue(any(m[0] == 'factura-list' and m[-1] for m in anillo.mediciones()))
+        self.assertIn(
+            'veterinaria_ventana_presupuesto_excedido{pid=', self._metricas().content.decode()
+        )
+
+    def test_dentro_del_presupuesto(self):
+        self.assertEqual(self.client.get(self.URL_FACTURAS).status_code, 200)
+        self.assertEqual(self.client.head(self.URL_FACTURAS).status_code, 200)
@@ -1,10 +1,17 @@
 from django.contrib import admin
 from django.urls import path, include
+from .dashboard import dashboard
+from .metricas import metricas
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     # Todas las rutas de la API comienzan con /api/
     path('api/', include('usuarios.urls')),
     path('api/clinica/', include('clinica.urls')),
+    path('api/facturacion/', include('facturacion.urls')),
+    # Vista asíncrona: bajo ASGI sus agregados se calculan en paralelo
+    path('api/dashboard/', dashboard, name='dashboard'),
+    # Formato de texto de Prometheus; ver METRICAS_TOKEN
+    path('metrics', metricas, name='metricas'),
     # ... otras apps
 ]
\ No newline at end of file
@@ -0,0 +1,62 @@
+import csv
+import io
+from django.http import HttpResponse
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+from GestionVeterinaria.rendimiento import crecimiento_rss
+from .models import Consulta
+from .services import ConsultaService
+from .tests import crear_cliente, crear_mascota, crear_usuario
+
+
+class BenchmarkExportacionConsultas(TransactionTestCase):
+    """RSS máximo al exportar 100k consultas: la exportación en streaming frente a
+    cargar las instancias y armar el CSV completo en un HttpResponse. Es
+    TransactionTestCase porque cada medición corre en un proceso hijo con su propia
+    conexión y solo ve datos confirmados."""
+    FILAS = 100_000
+    LOTE = 5000
+
+    def setUp(self):
+        self.usuario = crear_usuario('contabilidad@clinica.com', roles=['Administrador'])
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+
+        def sembrar():
+            for inicio in range(0, self.FILAS, self.LOTE):
+                Consulta.objects.bulk_create([
+                    Consulta(mascota=mascota, veterinario=veterinario, motivo=f'Control {i}',
+                             diagnostico='Sano, sin hallazgos relevantes', costo='100.00')
+                    for i in range(inicio, inicio + self.LOTE)
+                ])
+        # Se siembra en un hijo para que el pico de la siembra no quede en este proceso
+        crecimiento_rss(sembrar)
+
+    def _streaming(self):
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        response = client.get('/api/clinica/consultas/exportar/')
+        return sum(bloque.count(b'\n') for bloque in response.streaming_content)
+
+    def _en_memoria(self):
+        consultas, columnas = ConsultaService().obtener_exportacion()
+        salida = io.StringIO()
+        escritor = csv.writer(salida)
+        escritor.writerow([titulo for _, titulo in columnas])
+        for consulta in consultas.select_related('mascota', 'veterinario'):
+            escritor.writerow([
+                consulta.id_consulta, consulta.fecha_consulta, consulta.mascota.nombre,
+                consulta.mascota.especie, consulta.veterinario.nombre, consulta.veterinario.apellido,
+                consulta.motivo, consulta.diagnostico, consulta.costo,
+            ])
+        return HttpResponse(salida.getvalue()).content.count(b'\n')
+
+    def test_rss_maximo(self):
+        en_memoria, filas_en_memoria = crecimiento_rss(self._en_memoria)
+        streaming, filas_streaming = crecimiento_rss(self._streaming)
+
+        print(f'\nExportación CSV de {self.FILAS} consultas: crecimiento del RSS máximo')
+        print(f'  {"instancias + HttpResponse (antes)":<36}{en_memoria:>8.1f} MB')
+        print(f'  {"streaming por lotes (después)":<36}{streaming:>8.1f} MB')
+        self.assertEqual(filas_streaming, self.FILAS + 1)
+        self.assertEqual(filas_en_memoria, self.FILAS + 1)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from clinica.services.auditoria_indices_service import AuditoriaIndicesService
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas frecuentes y falla si alguna recorre una tabla completa'
+
+    def handle(self, *args, **options):
+        fallidas = 0
+        for nombre, recorridos in AuditoriaIndicesService().auditar():
+            if recorridos:
+                fallidas += 1
+                self.stdout.write(self.style.ERROR(f'FALLA  {nombre}: {"; ".join(recorridos)}'))
+            else:
+                self.stdout.write(f'OK     {nombre}')
+
+        if fallidas:
+            raise CommandError(f'{fallidas} consultas recorren tablas completas')
+        self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from clinica.services.importacion_service import ImportacionService
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes, mascotas o consultas históricas desde un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=ImportacionService.TIPOS)
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .jsonl')
+        parser.add_argument('--tamano-lote', type=int, default=500)
+        parser.add_argument('--rechazos', help='Archivo JSONL donde se escriben las filas rechazadas')
+        parser.add_argument('--checkpoint', help='Archivo de checkpoint para reanudar la importación')
+
+    def handle(self, *args, **options):
+        servicio = ImportacionService(
+            options['tipo'],
+            tamano_lote=options['tamano_lote'],
+            ruta_rechazos=options['rechazos']
+        )
+        try:
+            resumen = servicio.importar(options['archivo'], options['checkpoint'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if resumen['reanudado_desde']:
+            self.stdout.write(f"Reanudado después de la línea {resumen['reanudado_desde']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados: {resumen['importados']} - Rechazados: {resumen['rechazados']}"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from clinica.services.busqueda_service import BusquedaMascotaService
+
+
+class Command(BaseCommand):
+    help = 'Regenera los documentos de búsqueda de todas las mascotas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        servicio = BusquedaMascotaService()
+        total = servicio.reindexar_todo(options['tamano_lote'])
+        self.stdout.write(self.style.SUCCESS(f'Mascotas indexadas: {total}'))
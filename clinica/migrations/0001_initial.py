@@ -0,0 +1,111 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cita',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('id_cita', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha_cita', models.DateField(verbose_name='Fecha de la Cita')),
+                ('hora_cita', models.TimeField(verbose_name='Hora de la Cita')),
+                ('estado', models.CharField(choices=[('Agendada', 'Agendada'), ('Completada', 'Completada'), ('Cancelada', 'Cancelada')], default='Agendada', max_length=20)),
+                ('ocupa_horario', models.BooleanField(default=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'Cita',
+                'verbose_name_plural': 'Citas',
+            },
+        ),
+        migrations.CreateModel(
+            name='Consulta',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_consulta', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha_consulta', models.DateField(auto_now_add=True)),
+                ('motivo', models.CharField(max_length=255)),
+                ('diagnostico', models.TextField()),
+                ('observaciones', models.TextField(blank=True, null=True)),
+                ('costo', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Costo Total de Consulta')),
+            ],
+            options={
+                'verbose_name': 'Consulta',
+                'verbose_name_plural': 'Consultas',
+            },
+        ),
+        migrations.CreateModel(
+            name='ConsultaTratamiento',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_consulta_tratamiento', models.AutoField(primary_key=True, serialize=False)),
+                ('cantidad', models.IntegerField(default=1)),
+                ('costo_unitario', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'verbose_name': 'Detalle de Tratamiento',
+                'verbose_name_plural': 'Detalles de Tratamientos',
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialMedico',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_historial_medico', models.AutoField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'verbose_name': 'Historial Médico',
+                'verbose_name_plural': 'Historiales Médicos',
+            },
+        ),
+        migrations.CreateModel(
+            name='Mascota',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_mascota', models.AutoField(primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('especie', models.CharField(max_length=50, verbose_name='Especie')),
+                ('raza', models.CharField(max_length=100, verbose_name='Raza')),
+                ('edad', models.IntegerField(verbose_name='Edad (años)')),
+                ('sexo', models.CharField(choices=[('M', 'Macho'), ('H', 'Hembra')], max_length=1, verbose_name='Sexo')),
+            ],
+            options={
+                'verbose_name': 'Mascota',
+                'verbose_name_plural': 'Mascotas',
+            },
+        ),
+        migrations.CreateModel(
+            name='Tratamiento',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_tratamiento', models.AutoField(primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=150, verbose_name='Nombre del Tratamiento')),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('duracion', models.CharField(blank=True, max_length=50, null=True)),
+                ('costo_base', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Costo Base')),
+            ],
+            options={
+                'verbose_name': 'Tratamiento',
+                'verbose_name_plural': 'Tratamientos',
+            },
+        ),
+    ]
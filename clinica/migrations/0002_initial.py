@@ -0,0 +1,209 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('clinica', '0001_initial'),
+        ('usuarios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cita',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='citas_creadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='cita',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='citas_modificadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='cita',
+            name='veterinario',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='citas_asignadas', to=settings.AUTH_USER_MODEL, verbose_name='Veterinario Asignado'),
+        ),
+        migrations.AddField(
+            model_name='consulta',
+            name='cita',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='clinica.cita', verbose_name='Cita Relacionada'),
+        ),
+        migrations.AddField(
+            model_name='consulta',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='consultas_creadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='consulta',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='consultas_modificadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='consulta',
+            name='veterinario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='consultas_realizadas', to=settings.AUTH_USER_MODEL, verbose_name='Veterinario Responsable'),
+        ),
+        migrations.AddField(
+            model_name='consultatratamiento',
+            name='consulta',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clinica.consulta'),
+        ),
+        migrations.AddField(
+            model_name='consultatratamiento',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='consultatratamientos_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='consultatratamiento',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='consultatratamientos_modificados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='historialmedico',
+            name='consulta',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clinica.consulta'),
+        ),
+        migrations.AddField(
+            model_name='historialmedico',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historiales_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='historialmedico',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historiales_modificados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='MascotaBusqueda',
+            fields=[
+                ('mascota', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='busqueda', serialize=False, to='clinica.mascota')),
+                ('documento', models.TextField()),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Documento de Búsqueda de Mascota',
+                'verbose_name_plural': 'Documentos de Búsqueda de Mascotas',
+            },
+        ),
+        migrations.AddField(
+            model_name='mascota',
+            name='dueño',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='mascotas', to='usuarios.cliente', verbose_name='Cliente/Dueño'),
+        ),
+        migrations.AddField(
+            model_name='mascota',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mascotas_creadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='mascota',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mascotas_modificadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='historialmedico',
+            name='mascota',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clinica.mascota'),
+        ),
+        migrations.AddField(
+            model_name='consulta',
+            name='mascota',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='consultas', to='clinica.mascota', verbose_name='Mascota Consultada'),
+        ),
+        migrations.AddField(
+            model_name='cita',
+            name='mascota',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas', to='clinica.mascota', verbose_name='Mascota'),
+        ),
+        migrations.AddField(
+            model_name='tratamiento',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tratamientos_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='tratamiento',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tratamientos_modificados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='consultatratamiento',
+            name='tratamiento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='clinica.tratamiento'),
+        ),
+        migrations.AddIndex(
+            model_name='mascota',
+            index=models.Index(fields=['fecha_modificacion', 'id_mascota'], name='mascota_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mascota',
+            index=models.Index(fields=['dueño', 'estado'], name='mascota_dueno_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mascota',
+            index=models.Index(fields=['estado', 'especie'], name='mascota_estado_especie_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='historialmedico',
+            unique_together={('mascota', 'consulta')},
+        ),
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['fecha_modificacion', 'id_consulta'], name='consulta_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['-fecha_consulta', '-id_consulta'], name='consulta_listado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['mascota', 'fecha_consulta'], name='consulta_mascota_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['veterinario', 'fecha_consulta'], name='consulta_vet_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['fecha_cita', 'hora_cita', 'estado'], name='cita_fecha_hora_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['veterinario', 'fecha_cita'], name='cita_veterinario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['fecha_modificacion', 'id_cita'], name='cita_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['-fecha_cita', '-hora_cita', '-id_cita'], name='cita_listado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['mascota', 'fecha_cita'], name='cita_mascota_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cita',
+            constraint=models.UniqueConstraint(fields=('veterinario', 'fecha_cita', 'hora_cita', 'ocupa_horario'), name='cita_horario_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='tratamiento',
+            index=models.Index(fields=['nombre', 'id_tratamiento'], name='tratamiento_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tratamiento',
+            index=models.Index(fields=['fecha_modificacion', 'id_tratamiento'], name='tratamiento_sync_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='consultatratamiento',
+            unique_together={('consulta', 'tratamiento')},
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_resumen(apps, schema_editor):
+    """Carga el resumen con las consultas existentes (equivale a reconstruir_resumen_consultas)"""
+    Consulta = apps.get_model('clinica', 'Consulta')
+    ResumenConsultasDiario = apps.get_model('clinica', 'ResumenConsultasDiario')
+    grupos = Consulta.objects.values('fecha_consulta', 'veterinario_id', 'estado').annotate(
+        cantidad=Count('id_consulta'), suma=Sum('costo')
+    ).order_by()
+    ResumenConsultasDiario.objects.bulk_create([
+        ResumenConsultasDiario(
+            fecha=grupo['fecha_consulta'], veterinario_id=grupo['veterinario_id'], estado=grupo['estado'],
+            cantidad_consultas=grupo['cantidad'], total=grupo['suma'] or 0,
+        )
+        for grupo in grupos
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinica', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenConsultasDiario',
+            fields=[
+                ('id_resumen', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField(verbose_name='Fecha de la Consulta')),
+                ('estado', models.BooleanField(verbose_name='Consultas Activas')),
+                ('cantidad_consultas', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('veterinario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_consultas', to=settings.AUTH_USER_MODEL, verbose_name='Veterinario')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Consultas',
+                'verbose_name_plural': 'Resúmenes Diarios de Consultas',
+                'unique_together': {('fecha', 'veterinario', 'estado')},
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
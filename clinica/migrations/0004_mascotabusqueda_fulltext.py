@@ -0,0 +1,29 @@
+from django.db import migrations
+
+NOMBRE_INDICE = 'mascota_busqueda_ft'
+
+
+def crear_indice_fulltext(apps, schema_editor):
+    """El índice FULLTEXT solo existe en MySQL; en otros motores la búsqueda usa LIKE por prefijo"""
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    tabla = apps.get_model('clinica', 'MascotaBusqueda')._meta.db_table
+    schema_editor.execute(f'CREATE FULLTEXT INDEX {NOMBRE_INDICE} ON {tabla} (documento)')
+
+
+def eliminar_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    tabla = apps.get_model('clinica', 'MascotaBusqueda')._meta.db_table
+    schema_editor.execute(f'DROP INDEX {NOMBRE_INDICE} ON {tabla}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinica', '0003_resumenconsultasdiario'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice_fulltext, eliminar_indice_fulltext),
+    ]
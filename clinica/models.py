@@ -29,6 +29,32 @@ class Mascota(AuditoriaMixin):
     class Meta:
         verbose_name = "Mascota"
         verbose_name_plural = "Mascotas"
+        indexes = [
+            # Recorrido por cursor de la sincronización incremental
+            models.Index(fields=['fecha_modificacion', 'id_mascota'], name='mascota_sync_idx'),
+            # Mascotas activas de un cliente
+            models.Index(fields=['dueño', 'estado'], name='mascota_dueno_estado_idx'),
+            # Conteo por especie de las activas, resuelto solo con el índice
+            models.Index(fields=['estado', 'especie'], name='mascota_estado_especie_idx'),
+        ]
+
+
+class MascotaBusqueda(models.Model):
+    """Documento de búsqueda desnormalizado por mascota (mascota + datos del dueño)"""
+    mascota = models.OneToOneField(
+        Mascota,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='busqueda'
+    )
+    # Texto normalizado (minúsculas, sin tildes) con un espacio antes de cada palabra;
+    # en MySQL lleva un índice FULLTEXT (migración 0004_mascotabusqueda_fulltext)
+    documento = models.TextField()
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Documento de Búsqueda de Mascota"
+        verbose_name_plural = "Documentos de Búsqueda de Mascotas"
 
 
 class Cita(AuditoriaMixin):
@@ -58,16 +84,42 @@ class Cita(AuditoriaMixin):
         ('Cancelada', 'Cancelada'),
     ]
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='Agendada')
+    ESTADOS_OCUPAN = ['Agendada', 'Confirmada']
+    
+    # True mientras la cita ocupa el horario, NULL en otro caso: los NULL no
+    # colisionan en el índice único, así una cita cancelada libera el horario
+    ocupa_horario = models.BooleanField(null=True, default=True, editable=False)
     
     usuario_creacion = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='citas_creadas')
     usuario_modificacion = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='citas_modificadas')
 
+    def save(self, *args, **kwargs):
+        self.ocupa_horario = True if self.estado in self.ESTADOS_OCUPAN else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'estado' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'ocupa_horario'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Cita {self.id_cita} - {self.mascota.nombre} - {self.fecha_cita}"
 
     class Meta:
         verbose_name = "Cita"
         verbose_name_plural = "Citas"
+        indexes = [
+            models.Index(fields=['fecha_cita', 'hora_cita', 'estado'], name='cita_fecha_hora_estado_idx'),
+            models.Index(fields=['veterinario', 'fecha_cita'], name='cita_veterinario_fecha_idx'),
+            models.Index(fields=['fecha_modificacion', 'id_cita'], name='cita_sync_idx'),
+            models.Index(fields=['-fecha_cita', '-hora_cita', '-id_cita'], name='cita_listado_idx'),
+            # Historial de citas de una mascota
+            models.Index(fields=['mascota', 'fecha_cita'], name='cita_mascota_fecha_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['veterinario', 'fecha_cita', 'hora_cita', 'ocupa_horario'],
+                name='cita_horario_unico'
+            ),
+        ]
 
 
 class Tratamiento(AuditoriaMixin):
@@ -86,6 +138,10 @@ class Tratamiento(AuditoriaMixin):
     class Meta:
         verbose_name = "Tratamiento"
         verbose_name_plural = "Tratamientos"
+        indexes = [
+            models.Index(fields=['nombre', 'id_tratamiento'], name='tratamiento_nombre_idx'),
+            models.Index(fields=['fecha_modificacion', 'id_tratamiento'], name='tratamiento_sync_idx'),
+        ]
 
 
 class Consulta(AuditoriaMixin):
@@ -128,6 +184,36 @@ class Consulta(AuditoriaMixin):
     class Meta:
         verbose_name = "Consulta"
         verbose_name_plural = "Consultas"
+        indexes = [
+            models.Index(fields=['fecha_modificacion', 'id_consulta'], name='consulta_sync_idx'),
+            models.Index(fields=['-fecha_consulta', '-id_consulta'], name='consulta_listado_idx'),
+            # Historial de una mascota y agenda de un veterinario, por fecha
+            models.Index(fields=['mascota', 'fecha_consulta'], name='consulta_mascota_fecha_idx'),
+            models.Index(fields=['veterinario', 'fecha_consulta'], name='consulta_vet_fecha_idx'),
+        ]
+
+
+class ResumenConsultasDiario(models.Model):
+    """Cantidad e ingresos de consultas precalculados por día, veterinario y estado"""
+    id_resumen = models.AutoField(primary_key=True)
+    fecha = models.DateField(verbose_name="Fecha de la Consulta")
+    veterinario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='resumenes_consultas',
+        verbose_name="Veterinario"
+    )
+    estado = models.BooleanField(verbose_name="Consultas Activas")
+    cantidad_consultas = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.fecha} - {self.veterinario_id} - {self.cantidad_consultas}"
+
+    class Meta:
+        verbose_name = "Resumen Diario de Consultas"
+        verbose_name_plural = "Resúmenes Diarios de Consultas"
+        unique_together = ('fecha', 'veterinario', 'estado')
 
 
 class ConsultaTratamiento(AuditoriaMixin):
@@ -1,7 +1,6 @@
 from rest_framework import serializers
 from .models import Cliente, Mascota, Cita, Consulta, Tratamiento, ConsultaTratamiento
 from usuarios.serializers import UsuarioSerializer, PersonaSerializer 
-from usuarios.serializers import UsuarioBasicSerializer
 # Nota: Necesitas importar Persona y Usuario de tu app 'usuarios'
 
 # --- 1. CLIENTE y MASCOTA ---
@@ -30,12 +29,16 @@ class MascotaSerializer(serializers.ModelSerializer):
 class CitaSerializer(serializers.ModelSerializer):
     # Campos de solo lectura para saber qué mascota es sin cargar todo el objeto Mascota
     nombre_mascota = serializers.CharField(source='mascota.nombre', read_only=True)
-    nombre_cliente = serializers.CharField(source='mascota.cliente.persona.nombre', read_only=True)
+    nombre_cliente = serializers.CharField(source='mascota.dueño.persona', read_only=True)
     
     class Meta:
         model = Cita
-        fields = ['id', 'mascota', 'nombre_mascota', 'nombre_cliente', 'fechaHoraCita', 'motivo', 'Estado']
-        read_only_fields = ['id']
+        fields = [
+            'id_cita', 'mascota', 'nombre_mascota', 'nombre_cliente', 'veterinario',
+            'fecha_cita', 'hora_cita', 'estado'
+        ]
+        # El estado cambia solo con la acción cambiar_estado, que aplica sus validaciones
+        read_only_fields = ['id_cita', 'estado']
 
 # --- 3. SERVICIOS Y TRATAMIENTOS ---
 
@@ -96,55 +99,43 @@ class ConsultaSerializer(serializers.ModelSerializer):
 class ConsultaConDetallesSerializer(serializers.ModelSerializer):
     mascota_nombre = serializers.CharField(source='mascota.nombre', read_only=True)
     mascota_especie = serializers.CharField(source='mascota.especie', read_only=True)
-    veterinario_nombre = serializers.SerializerMethodField()
-    cliente_nombre = serializers.SerializerMethodField()
+    veterinario_nombre = serializers.CharField(source='veterinario.get_full_name', read_only=True)
+    cliente_nombre = serializers.CharField(source='mascota.dueño.persona', read_only=True)
 
     class Meta:
         model = Consulta
         fields = [
-            'id', 'mascota_id', 'veterinario_id', 'fecha_consulta', 'motivo',
-            'diagnostico', 'tratamiento', 'medicamentos', 'observaciones',
-            'costo', 'peso', 'temperatura', 'estado', 'mascota_nombre',
+            'id_consulta', 'mascota_id', 'veterinario_id', 'fecha_consulta', 'motivo',
+            'diagnostico', 'observaciones', 'costo', 'estado', 'mascota_nombre',
             'mascota_especie', 'veterinario_nombre', 'cliente_nombre'
         ]
 
-    def get_veterinario_nombre(self, obj):
-        return f"{obj.veterinario.nombre} {obj.veterinario.apellido}"
-
-    def get_cliente_nombre(self, obj):
-        return f"{obj.mascota.usuario.nombre} {obj.mascota.usuario.apellido}"
-
 class MascotaConConsultasSerializer(serializers.ModelSerializer):
     consultas_count = serializers.IntegerField(read_only=True)
     consultas_recientes = ConsultaConDetallesSerializer(many=True, read_only=True)
-    cliente_nombre = serializers.SerializerMethodField()
+    cliente_nombre = serializers.CharField(source='dueño.persona', read_only=True)
 
     class Meta:
         model = Mascota
         fields = [
-            'id', 'nombre', 'especie', 'raza', 'edad', 'sexo', 'estado',
+            'id_mascota', 'nombre', 'especie', 'raza', 'edad', 'sexo', 'estado',
             'consultas_count', 'consultas_recientes', 'cliente_nombre'
         ]
 
-    def get_cliente_nombre(self, obj):
-        return f"{obj.usuario.nombre} {obj.usuario.apellido}"
-    
-    
-
 class MascotaSerializer(serializers.ModelSerializer):
-    cliente_nombre = serializers.CharField(source='usuario.nombre_completo', read_only=True)
-    cliente_telefono = serializers.CharField(source='usuario.telefono', read_only=True)
-    cliente_email = serializers.CharField(source='usuario.email', read_only=True)
-    edad_display = serializers.CharField(source='edad_con_unidad', read_only=True)
+    # El dueño es un Cliente: sus datos están en la persona y en su cuenta de usuario
+    cliente_nombre = serializers.CharField(source='dueño.persona', read_only=True)
+    cliente_telefono = serializers.CharField(source='dueño.persona.telefono', read_only=True)
+    cliente_email = serializers.CharField(source='dueño.persona.usuario.email', read_only=True)
     
     class Meta:
         model = Mascota
         fields = [
-            'id', 'nombre', 'especie', 'raza', 'edad', 'edad_display', 
-            'sexo', 'usuario', 'cliente_nombre', 'cliente_telefono', 
-            'cliente_email', 'estado', 'fecha_registro', 'observaciones'
+            'id_mascota', 'nombre', 'especie', 'raza', 'edad', 
+            'sexo', 'dueño', 'cliente_nombre', 'cliente_telefono', 
+            'cliente_email', 'estado', 'fecha_creacion'
         ]
-        read_only_fields = ['fecha_registro']
+        read_only_fields = ['id_mascota', 'fecha_creacion']
 
 class MascotaCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -157,17 +148,17 @@ class MascotaUpdateSerializer(serializers.ModelSerializer):
         fields = ['nombre', 'especie', 'raza', 'edad', 'sexo', 'usuario', 'estado', 'observaciones']
 
 class MascotaListSerializer(serializers.ModelSerializer):
-    cliente_nombre = serializers.CharField(source='usuario.nombre_completo', read_only=True)
+    cliente_nombre = serializers.CharField(source='dueño.persona', read_only=True)
     sexo_display = serializers.CharField(source='get_sexo_display', read_only=True)
     
     class Meta:
         model = Mascota
         fields = [
-            'id', 'nombre', 'especie', 'raza', 'edad', 'sexo', 'sexo_display',
-            'cliente_nombre', 'estado', 'fecha_registro'
+            'id_mascota', 'nombre', 'especie', 'raza', 'edad', 'sexo', 'sexo_display',
+            'cliente_nombre', 'estado', 'fecha_creacion'
         ]
 
 class MascotaBasicSerializer(serializers.ModelSerializer):
     class Meta:
         model = Mascota
-        fields = ['id', 'nombre', 'especie', 'raza']
\ No newline at end of file
+        fields = ['id_mascota', 'nombre', 'especie', 'raza']
\ No newline at end of file
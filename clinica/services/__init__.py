@@ -0,0 +1,3 @@
+from .cita_service import CitaService
+from .consulta_service import ConsultaService
+from .mascota_service import MascotaService
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from django.db import connections
+from django.utils import timezone
+from usuarios.models import Usuario
+from facturacion.models import Factura, Pago, ResumenFacturacionDiario, TrabajoPDF
+from ..models import Mascota, Cita, Consulta, ConsultaTratamiento
+
+
+class AuditoriaIndicesService:
+    """Ejecuta EXPLAIN sobre las consultas frecuentes de los servicios y detecta
+    recorridos completos de tabla.
+
+    Cada consulta canónica replica el filtro de un servicio; si una tabla se lee
+    entera es que falta (o no se usa) el índice que la respalda. La sesión se
+    configura para que el optimizador prefiera índices aunque las tablas de
+    desarrollo sean pequeñas, así el resultado no depende del volumen de datos.
+    """
+
+    def consultas(self):
+        """(nombre, queryset) de las consultas que deben resolverse con índices"""
+        hoy = timezone.now().date()
+        hace_un_mes = hoy - timedelta(days=30)
+        ahora = timezone.now()
+        return [
+            ('disponibilidad del día (IndiceDisponibilidad)',
+             Cita.objects.filter(fecha_cita=hoy, estado__in=Cita.ESTADOS_OCUPAN)
+             .values_list('id_cita', 'veterinario_id', 'hora_cita')),
+            ('calendario de disponibilidad (CitaService)',
+             Cita.objects.filter(fecha_cita__range=(hoy, hoy + timedelta(days=30)), estado__in=Cita.ESTADOS_OCUPAN)),
+            ('agenda de un veterinario',
+             Cita.objects.filter(veterinario_id=1, fecha_cita__gte=hoy)),
+            ('citas de una mascota',
+             Cita.objects.filter(mascota_id=1).order_by('-fecha_cita')),
+            ('consultas de una mascota (ConsultaService)',
+             Consulta.objects.filter(mascota_id=1).order_by('-fecha_consulta')),
+            ('consultas de un veterinario en un rango (FacturacionLoteService)',
+             Consulta.objects.filter(veterinario_id=1, fecha_consulta__range=(hace_un_mes, hoy))),
+            ('sincronización de consultas (SincronizacionService)',
+             Consulta.objects.filter(fecha_modificacion__gt=ahora - timedelta(hours=1))
+             .order_by('fecha_modificacion', 'pk')[:200]),
+            ('tratamientos de una consulta (RecetaService)',
+             ConsultaTratamiento.objects.filter(consulta_id=1)),
+            ('mascotas activas de un cliente',
+             Mascota.objects.filter(dueño_id=1, estado=True)),
+            ('facturas pendientes por fecha',
+             Factura.objects.filter(estado_pago='Pendiente', fecha_emision__lt=hace_un_mes)),
+            ('facturas de un cliente',
+             Factura.objects.filter(cliente_id=1).order_by('-fecha_emision')),
+            ('pagos completados en un rango',
+             Pago.objects.filter(estado_pago='Completado', fecha_pago__range=(hace_un_mes, hoy))),
+            ('resumen de facturación por rango (FacturaService.obtener_estadisticas)',
+             ResumenFacturacionDiario.objects.filter(fecha__range=(hace_un_mes, hoy))),
+            ('usuarios con un rol',
+             Usuario.objects.filter(roles__nombre='Cliente')),
+            ('mascotas de una página de clientes (ClienteViewSet)',
+             Mascota.objects.filter(dueño_id__in=[1, 2, 3]).order_by('nombre')),
+            ('cola de PDFs pendientes (DocumentoFacturaService)',
+             TrabajoPDF.objects.filter(estado='Pendiente', id_trabajo__gt=0).order_by('id_trabajo')[:1]),
+        ]
+
+    def _preparar_sesion(self, conexion, cursor):
+        if conexion.vendor == 'postgresql':
+            cursor.execute('SET enable_seqscan = off')
+        elif conexion.vendor == 'mysql':
+            # Hace que el optimizador asuma búsquedas por índice baratas frente al recorrido completo
+            cursor.execute('SET SESSION max_seeks_for_key = 1')
+
+    def _recorridos_completos(self, conexion, cursor, sql, params):
+        """Tablas que el plan recorre completas"""
+        if conexion.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            # "SCAN tabla" sin índice; "SCAN tabla USING INDEX" recorre un índice en orden
+            return [
+                fila[-1] for fila in cursor.fetchall()
+                if fila[-1].startswith('SCAN ') and ' USING ' not in fila[-1]
+            ]
+        if conexion.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columnas = [c[0].lower() for c in cursor.description]
+            return [
+                f"{fila['table']} (type=ALL)"
+                for fila in (dict(zip(columnas, f)) for f in cursor.fetchall())
+                if fila['type'] == 'ALL'
+            ]
+        if conexion.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return [fila[0].strip() for fila in cursor.fetchall() if 'Seq Scan' in fila[0]]
+        raise ValueError(f'Motor no soportado para la auditoría: {conexion.vendor}')
+
+    def auditar(self):
+        """Devuelve [(nombre, [recorridos completos])] para cada consulta canónica"""
+        resultados = []
+        for nombre, queryset in self.consultas():
+            conexion = connections[queryset.db]
+            sql, params = queryset.query.sql_with_params()
+            with conexion.cursor() as cursor:
+                self._preparar_sesion(conexion, cursor)
+                resultados.append((nombre, self._recorridos_completos(conexion, cursor, sql, params)))
+        return resultados
@@ -0,0 +1,124 @@
+import re
+import unicodedata
+from django.db import connection
+from django.db.models import Case, When, Value, IntegerField, FloatField, Func, Q
+from ..models import Mascota, MascotaBusqueda
+
+
+class CoincidenciaTexto(Func):
+    """MATCH ... AGAINST en modo booleano (solo MySQL, requiere índice FULLTEXT)"""
+    output_field = FloatField()
+
+    def __init__(self, campo, consulta):
+        super().__init__(campo, Value(consulta))
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        campo_sql, campo_params = compiler.compile(self.source_expressions[0])
+        consulta_sql, consulta_params = compiler.compile(self.source_expressions[1])
+        return (
+            f"MATCH ({campo_sql}) AGAINST ({consulta_sql} IN BOOLEAN MODE)",
+            (*campo_params, *consulta_params)
+        )
+
+
+class BusquedaMascotaService:
+    """Índice de búsqueda de mascotas por nombre, especie, raza, dueño y teléfono"""
+
+    # innodb_ft_min_token_size por defecto; términos más cortos usan el camino por prefijo
+    LONGITUD_MINIMA_FULLTEXT = 3
+    LIMITE_SUGERENCIAS = 20
+    LIMITE_MAXIMO_SUGERENCIAS = 50
+
+    @staticmethod
+    def normalizar(texto):
+        """Minúsculas, sin tildes y solo letras/dígitos separados por espacios"""
+        texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+        return ' '.join(re.findall(r'[a-z0-9]+', texto.lower()))
+
+    def terminos(self, termino_busqueda):
+        return self.normalizar(termino_busqueda).split()
+
+    def documento(self, mascota: Mascota):
+        """Construye el documento desnormalizado de una mascota"""
+        persona = mascota.dueño.persona
+        usuario = persona.usuario
+        partes = [
+            mascota.nombre,
+            mascota.especie,
+            mascota.raza,
+            usuario.nombre if usuario else '',
+            usuario.apellido if usuario else '',
+            persona.telefono,
+        ]
+        # Espacio inicial: ' termino' solo coincide al comienzo de una palabra
+        return ' ' + self.normalizar(' '.join(p or '' for p in partes))
+
+    def indexar(self, mascotas):
+        """Crea o actualiza los documentos de búsqueda de las mascotas indicadas"""
+        mascotas = Mascota.objects.filter(
+            pk__in=[m.pk for m in mascotas]
+        ).select_related('dueño__persona__usuario')
+        documentos = [
+            MascotaBusqueda(mascota=mascota, documento=self.documento(mascota))
+            for mascota in mascotas
+        ]
+        MascotaBusqueda.objects.bulk_create(
+            documentos,
+            update_conflicts=True,
+            unique_fields=['mascota'],
+            update_fields=['documento']
+        )
+        return len(documentos)
+
+    def reindexar_todo(self, tamano_lote=1000):
+        """Regenera todos los documentos en lotes"""
+        total = 0
+        lote = []
+        for mascota in Mascota.objects.only('pk').iterator(chunk_size=tamano_lote):
+            lote.append(mascota)
+            if len(lote) >= tamano_lote:
+                total += self.indexar(lote)
+                lote = []
+        if lote:
+            total += self.indexar(lote)
+        return total
+
+    def usa_fulltext(self, terminos):
+        return (
+            connection.vendor == 'mysql'
+            and all(len(t) >= self.LONGITUD_MINIMA_FULLTEXT for t in terminos)
+        )
+
+    def buscar(self, termino_busqueda, queryset=None):
+        """Filtra y ordena por relevancia; todas las palabras deben coincidir por prefijo"""
+        queryset = queryset if queryset is not None else Mascota.objects.all()
+        terminos = self.terminos(termino_busqueda)
+        if not terminos:
+            return queryset.none()
+
+        if self.usa_fulltext(terminos):
+            consulta = ' '.join(f'+{t}*' for t in terminos)
+            queryset = queryset.annotate(
+                relevancia=CoincidenciaTexto('busqueda__documento', consulta)
+            ).filter(relevancia__gt=0)
+        else:
+            filtro = Q()
+            for t in terminos:
+                filtro &= Q(busqueda__documento__contains=f' {t}')
+            queryset = queryset.filter(filtro).annotate(
+                relevancia=Value(1, output_field=IntegerField())
+            )
+
+        # Las coincidencias con el nombre de la mascota van primero
+        return queryset.annotate(
+            coincide_nombre=Case(
+                When(nombre__istartswith=terminos[0], then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        ).order_by('-coincide_nombre', '-relevancia', 'nombre')
+
+    def sugerencias(self, termino_busqueda, limite=None):
+        """Resultados acotados para autocompletado"""
+        limite = min(int(limite or self.LIMITE_SUGERENCIAS), self.LIMITE_MAXIMO_SUGERENCIAS)
+        return self.buscar(termino_busqueda).select_related('dueño__persona__usuario')[:limite]
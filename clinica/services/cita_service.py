@@ -1,31 +1,33 @@
-from datetime import datetime, time, date
+import random
+import time as reloj
+from datetime import datetime, time, date, timedelta
+from django.db import transaction, IntegrityError, OperationalError
 from django.utils import timezone
-from ..models import Cita
+from usuarios.models import Usuario
+from ..models import Cita, Mascota
+from .disponibilidad_service import IndiceDisponibilidad, indice_disponibilidad
+
+
+class HorarioOcupadoError(ValueError):
+    """El horario ya fue reservado por otra cita"""
+
 
 class CitaService:
-    HORARIOS_LABORALES = {
-        'semana': ['09:00', '10:00', '11:00', '14:00', '15:00', '16:00', '17:00'],
-        'fin_semana': ['09:00', '10:00', '11:00']
-    }
+    HORARIOS_LABORALES = IndiceDisponibilidad.HORARIOS_LABORALES
+    indice = indice_disponibilidad
+    MAX_DIAS_CALENDARIO = 62
+    MAX_REINTENTOS_RESERVA = 3
 
-    def obtener_horarios_disponibles(self, fecha: date):
+    def obtener_horarios_disponibles(self, fecha: date, veterinario_id=None):
         """Obtiene horarios disponibles para una fecha específica"""
-        dia_semana = fecha.weekday()
-        es_fin_semana = dia_semana in [5, 6]  # 5=sábado, 6=domingo
-        
-        base_horarios = self.HORARIOS_LABORALES['fin_semana'] if es_fin_semana else self.HORARIOS_LABORALES['semana']
+        base_horarios = self.indice.horarios_base(fecha)
         
-        # Obtener citas existentes para esa fecha
-        citas_existentes = Cita.objects.filter(
-            fechaCita=fecha,
-            estado__in=['Agendada', 'Confirmada']
-        ).values_list('horaCita', flat=True)
-        
-        horarios_ocupados = set(citas_existentes)
+        # Horarios ocupados desde el índice en memoria (sin consultar la base de datos)
+        ocupados = self.indice.mascara_ocupada(fecha, veterinario_id)
         
         horarios_disponibles = []
-        for horario in base_horarios:
-            disponible = horario not in horarios_ocupados
+        for bit, horario in enumerate(base_horarios):
+            disponible = not (ocupados >> bit) & 1
             horarios_disponibles.append({
                 'fecha': fecha.isoformat(),
                 'hora': horario,
@@ -34,7 +36,53 @@ class CitaService:
         
         return horarios_disponibles
 
-    def validar_horario_disponible(self, fecha_str: str, hora_str: str) -> bool:
+    def obtener_calendario_disponibilidad(self, fecha_desde: date, fecha_hasta: date, veterinarios=None):
+        """Obtiene la grilla de horarios de un rango de fechas con una sola consulta"""
+        if fecha_hasta < fecha_desde:
+            raise ValueError('fecha_hasta no puede ser anterior a fecha_desde')
+        
+        if (fecha_hasta - fecha_desde).days + 1 > self.MAX_DIAS_CALENDARIO:
+            raise ValueError(f'El rango no puede superar {self.MAX_DIAS_CALENDARIO} días')
+        
+        citas = Cita.objects.filter(
+            fecha_cita__range=(fecha_desde, fecha_hasta),
+            estado__in=self.indice.ESTADOS_OCUPAN
+        )
+        if veterinarios:
+            citas = citas.filter(veterinario_id__in=veterinarios)
+        
+        # (fecha, hora) -> veterinarios con la hora ocupada
+        ocupados = {}
+        for fecha_cita, hora_cita, veterinario_id in citas.values_list('fecha_cita', 'hora_cita', 'veterinario_id'):
+            ocupados.setdefault((fecha_cita, hora_cita.strftime('%H:%M')), set()).add(veterinario_id)
+        
+        calendario = []
+        fecha = fecha_desde
+        while fecha <= fecha_hasta:
+            horarios = []
+            for horario in self.indice.horarios_base(fecha):
+                ocupado_por = ocupados.get((fecha, horario), set())
+                if veterinarios:
+                    por_veterinario = {v: v not in ocupado_por for v in veterinarios}
+                    horarios.append({
+                        'hora': horario,
+                        'disponible': any(por_veterinario.values()),
+                        'veterinarios': por_veterinario
+                    })
+                else:
+                    horarios.append({
+                        'hora': horario,
+                        'disponible': not ocupado_por
+                    })
+            calendario.append({
+                'fecha': fecha.isoformat(),
+                'horarios': horarios
+            })
+            fecha += timedelta(days=1)
+        
+        return calendario
+
+    def validar_horario_disponible(self, fecha_str: str, hora_str: str, veterinario_id=None) -> bool:
         """Valida si un horario específico está disponible"""
         try:
             fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
@@ -47,19 +95,92 @@ class CitaService:
             # Validar formato de hora
             datetime.strptime(hora, '%H:%M')
             
-            # Obtener horarios disponibles
-            horarios = self.obtener_horarios_disponibles(fecha)
-            
-            # Buscar el horario específico
-            for horario in horarios:
-                if horario['hora'] == hora:
-                    return horario['disponible']
-            
-            return False
+            return self.indice.esta_disponible(fecha, hora, veterinario_id)
             
         except ValueError:
             raise ValueError('Formato de fecha u hora inválido')
 
+    def reservar_horario(self, mascota_id, veterinario_id, fecha: date, hora: time, usuario=None):
+        """Reserva un horario de forma atómica; la restricción única resuelve la concurrencia"""
+        self._validar_horario_reserva(mascota_id, veterinario_id, fecha, hora)
+        
+        for intento in range(self.MAX_REINTENTOS_RESERVA):
+            try:
+                # Un solo INSERT: si otro proceso ganó el horario, la base de datos
+                # rechaza la fila por la restricción cita_horario_unico
+                with transaction.atomic():
+                    return Cita.objects.create(
+                        mascota_id=mascota_id,
+                        veterinario_id=veterinario_id,
+                        fecha_cita=fecha,
+                        hora_cita=hora,
+                        estado='Agendada',
+                        usuario_creacion=usuario
+                    )
+            except IntegrityError as e:
+                if self._horario_ocupado(veterinario_id, fecha, hora):
+                    raise HorarioOcupadoError('El horario ya fue reservado')
+                # Otra restricción (p. ej. la mascota o el veterinario se borraron entretanto)
+                raise ValueError('No se pudo registrar la cita') from e
+            except OperationalError:
+                # Bloqueos mutuos o tiempos de espera de bloqueo: reintentar con espera aleatoria
+                if intento == self.MAX_REINTENTOS_RESERVA - 1:
+                    raise
+                reloj.sleep(random.uniform(0.01, 0.05) * (intento + 1))
+
+    def reprogramar(self, cita: Cita, mascota_id, veterinario_id, fecha: date, hora: time, usuario=None):
+        """Cambia mascota, veterinario, fecha u hora de una cita con las validaciones de la reserva"""
+        if cita.estado in Cita.ESTADOS_OCUPAN:
+            self._validar_horario_reserva(mascota_id, veterinario_id, fecha, hora)
+        
+        with transaction.atomic():
+            cita = Cita.objects.select_for_update().get(pk=cita.pk)
+            cita.mascota_id = mascota_id
+            cita.veterinario_id = veterinario_id
+            cita.fecha_cita = fecha
+            cita.hora_cita = hora
+            cita.usuario_modificacion = usuario
+            try:
+                with transaction.atomic():
+                    cita.save()
+            except IntegrityError as e:
+                if self._horario_ocupado(veterinario_id, fecha, hora):
+                    raise HorarioOcupadoError('El horario ya fue reservado por otra cita')
+                raise ValueError('No se pudo modificar la cita') from e
+        
+        return cita
+
+    def _validar_horario_reserva(self, mascota_id, veterinario_id, fecha: date, hora: time):
+        """Validaciones comunes a reservar y reprogramar una cita que ocupa horario.
+
+        La restricción cita_horario_unico no compara veterinarios NULL, por eso se
+        exige uno: las citas sin veterinario no ocupan horario.
+        """
+        if not veterinario_id:
+            raise ValueError('El veterinario es requerido para reservar un horario')
+        
+        if fecha < timezone.now().date():
+            raise ValueError('No se puede reservar una fecha pasada')
+        
+        if not self.indice.es_horario_laboral(fecha, hora):
+            raise ValueError('El horario solicitado no es un horario laboral')
+        
+        # Se valida antes del INSERT: una clave foránea inválida también es un
+        # IntegrityError y no debe confundirse con un horario ocupado
+        if not Mascota.objects.filter(pk=mascota_id).exists():
+            raise ValueError('La mascota no existe')
+        if not Usuario.objects.filter(pk=veterinario_id, estado=True).exists():
+            raise ValueError('El veterinario no existe o está inactivo')
+
+    def _horario_ocupado(self, veterinario_id, fecha: date, hora: time):
+        """Indica si otra cita ocupa el horario (la fila que violó cita_horario_unico)"""
+        return Cita.objects.filter(
+            veterinario_id=veterinario_id,
+            fecha_cita=fecha,
+            hora_cita=hora,
+            ocupa_horario=True
+        ).exists()
+
     def cambiar_estado(self, cita: Cita, nuevo_estado: str):
         """Cambia el estado de una cita con validaciones"""
         estados_permitidos = ['Agendada', 'Confirmada', 'Completada', 'Cancelada']
@@ -68,13 +189,22 @@ class CitaService:
             raise ValueError(f'Estado {nuevo_estado} no permitido')
         
         # Validaciones específicas por estado
-        if nuevo_estado == 'Completada' and cita.fechaCita > timezone.now().date():
+        if nuevo_estado == 'Completada' and cita.fecha_cita > timezone.now().date():
             raise ValueError('No se puede completar una cita futura')
         
-        if nuevo_estado == 'Cancelada' and cita.fechaCita < timezone.now().date():
+        if nuevo_estado == 'Cancelada' and cita.fecha_cita < timezone.now().date():
             raise ValueError('No se puede cancelar una cita pasada')
         
-        cita.estado = nuevo_estado
-        cita.save()
+        with transaction.atomic():
+            # Reactivar una cita cancelada vuelve a ocupar el horario
+            cita = Cita.objects.select_for_update().get(pk=cita.pk)
+            cita.estado = nuevo_estado
+            try:
+                with transaction.atomic():
+                    cita.save()
+            except IntegrityError:
+                raise HorarioOcupadoError('El horario ya fue reservado por otra cita')
+        # La señal post_save ya lo hace; se repite por si la señal está desconectada
+        self.indice.registrar_cita(cita)
         
         return cita
\ No newline at end of file
@@ -1,9 +1,21 @@
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Prefetch, Sum, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
-from ..models import Consulta, Mascota, Usuario
+from ..models import Consulta, Mascota, Usuario, ResumenConsultasDiario
+from .receta_service import RecetaService
 
 class ConsultaService:
+    COLUMNAS_EXPORTACION = [
+        ('id_consulta', 'Consulta'),
+        ('fecha_consulta', 'Fecha'),
+        ('mascota__nombre', 'Mascota'),
+        ('mascota__especie', 'Especie'),
+        ('veterinario__nombre', 'Nombre Veterinario'),
+        ('veterinario__apellido', 'Apellido Veterinario'),
+        ('motivo', 'Motivo'),
+        ('diagnostico', 'Diagnóstico'),
+        ('costo', 'Costo'),
+    ]
 
     def obtener_consultas_por_mascota(self, mascota_id):
         """Obtiene consultas de una mascota ordenadas por fecha"""
@@ -16,52 +28,38 @@ class ConsultaService:
         
         return consultas
 
+    ULTIMAS_CONSULTAS_HISTORIAL = 3
+
     def obtener_mascotas_con_historial(self):
-        """Obtiene mascotas con información de sus consultas"""
-        mascotas = Mascota.objects.annotate(
-            consultas_count=Count('consulta'),
-            consultas_recientes_count=Count('consulta', filter=Q(
-                consulta__fecha_consulta__gte=timezone.now() - timedelta(days=30)
-            ))
-        ).prefetch_related('consulta_set')
-        
-        mascotas_con_consultas = []
-        for mascota in mascotas:
-            consultas_recientes = mascota.consulta_set.order_by('-fecha_consulta')[:3]
-            mascotas_con_consultas.append({
-                'mascota': mascota,
-                'consultas_count': mascota.consultas_count,
-                'consultas_recientes': consultas_recientes
-            })
-        
-        return mascotas_con_consultas
+        """Obtiene mascotas con el total de consultas y las más recientes"""
+        # Prefetch con slice: una sola consulta para las últimas de todas las mascotas
+        recientes = Consulta.objects.select_related(
+            'veterinario', 'mascota__dueño__persona__usuario'
+        ).order_by('-fecha_consulta', '-id_consulta')[:self.ULTIMAS_CONSULTAS_HISTORIAL]
+        return Mascota.objects.annotate(
+            consultas_count=Count('consultas')
+        ).select_related('dueño__persona__usuario').prefetch_related(
+            Prefetch('consultas', queryset=recientes, to_attr='consultas_recientes')
+        ).order_by('id_mascota')
 
     def obtener_estadisticas(self):
-        """Calcula estadísticas de consultas"""
-        hoy = timezone.now().date()
-        inicio_mes = hoy.replace(day=1)
-        
-        total_consultas = Consulta.objects.count()
-        consultas_completadas = Consulta.objects.filter(estado='Completada').count()
-        consultas_pendientes = Consulta.objects.filter(estado='Pendiente').count()
-        ingresos_totales = Consulta.objects.aggregate(
-            total=Sum('costo')
-        )['total'] or 0
+        """Calcula estadísticas de consultas desde el resumen diario, en una sola consulta"""
+        inicio_mes = timezone.now().date().replace(day=1)
         
-        consultas_este_mes = Consulta.objects.filter(
-            fecha_consulta__gte=inicio_mes
-        ).count()
+        # Se lee de ResumenConsultasDiario (una fila por día, veterinario y estado)
+        # en lugar de recorrer Consulta
+        totales = ResumenConsultasDiario.objects.aggregate(
+            total_consultas=Sum('cantidad_consultas'),
+            consultas_activas=Sum('cantidad_consultas', filter=Q(estado=True)),
+            consultas_este_mes=Sum('cantidad_consultas', filter=Q(fecha__gte=inicio_mes)),
+            ingresos_totales=Sum('total'),
+        )
         
         return {
-            'total_consultas': total_consultas,
-            'consultas_completadas': consultas_completadas,
-            'consultas_pendientes': consultas_pendientes,
-            'ingresos_totales': float(ingresos_totales),
-            'consultas_este_mes': consultas_este_mes,
-            'tasa_completamiento': (
-                (consultas_completadas / total_consultas * 100) 
-                if total_consultas > 0 else 0
-            )
+            'total_consultas': totales['total_consultas'] or 0,
+            'consultas_activas': totales['consultas_activas'] or 0,
+            'consultas_este_mes': totales['consultas_este_mes'] or 0,
+            'ingresos_totales': float(totales['ingresos_totales'] or 0),
         }
 
     def validar_consulta(self, consulta_data):
@@ -91,24 +89,16 @@ class ConsultaService:
 
     def generar_receta_medica(self, consulta):
         """Genera una receta médica basada en la consulta"""
-        if consulta.estado != 'Completada':
-            raise ValueError('Solo se pueden generar recetas para consultas completadas')
-        
-        if not consulta.tratamiento and not consulta.medicamentos:
-            raise ValueError('La consulta no tiene tratamiento ni medicamentos prescritos')
-        
-        receta = {
-            'consulta_id': consulta.id,
-            'fecha_emision': timezone.now().date(),
-            'mascota': consulta.mascota.nombre,
-            'especie': consulta.mascota.especie,
-            'propietario': f"{consulta.mascota.usuario.nombre} {consulta.mascota.usuario.apellido}",
-            'veterinario': f"{consulta.veterinario.nombre} {consulta.veterinario.apellido}",
-            'diagnostico': consulta.diagnostico,
-            'tratamiento': consulta.tratamiento,
-            'medicamentos': consulta.medicamentos,
-            'observaciones': consulta.observaciones,
-            'instrucciones': 'Seguir al pie de la letra las indicaciones del veterinario'
-        }
+        return RecetaService().obtener_recetas([consulta.pk])[0]
+
+    def obtener_exportacion(self, fecha_desde=None, fecha_hasta=None, estado=None):
+        """Devuelve el queryset filtrado y las columnas para exportar consultas"""
+        consultas = Consulta.objects.all()
+        if fecha_desde:
+            consultas = consultas.filter(fecha_consulta__gte=fecha_desde)
+        if fecha_hasta:
+            consultas = consultas.filter(fecha_consulta__lte=fecha_hasta)
+        if estado is not None:
+            consultas = consultas.filter(estado=estado)
         
-        return receta
\ No newline at end of file
+        return consultas, self.COLUMNAS_EXPORTACION
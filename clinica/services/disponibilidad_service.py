@@ -0,0 +1,190 @@
+import threading
+import time as reloj
+from collections import OrderedDict
+from datetime import date
+from django.conf import settings
+from django.utils import timezone
+from ..models import Cita
+
+
+class IndiceDisponibilidad:
+    """Índice en memoria de horarios ocupados por fecha y veterinario.
+
+    Las señales de Cita lo actualizan sin consultar la base de datos, pero solo en el
+    proceso que guardó la cita: las reservas hechas por otros workers o por
+    queryset.update() no las ve. Por eso cada fecha se recarga con una consulta
+    cuando su entrada tiene más de `ttl` segundos (CLINICA_INDICE_DISPONIBILIDAD_TTL);
+    es el retraso máximo con el que un proceso ve las reservas de los demás.
+
+    Se conservan como mucho `max_fechas` fechas (CLINICA_INDICE_DISPONIBILIDAD_MAX_FECHAS),
+    descartando primero las pasadas y luego las cargadas hace más tiempo; como las
+    fechas consultadas se recargan cada `ttl`, ese orden se aproxima al de uso.
+    """
+
+    HORARIOS_LABORALES = {
+        'semana': ['09:00', '10:00', '11:00', '14:00', '15:00', '16:00', '17:00'],
+        'fin_semana': ['09:00', '10:00', '11:00']
+    }
+    ESTADOS_OCUPAN = Cita.ESTADOS_OCUPAN
+
+    def __init__(self, ttl=None, max_fechas=None):
+        # Cada fecha guarda las citas activas (id -> (veterinario_id, bit)) y
+        # las máscaras de bits ya calculadas; la clave None agrupa a todos los veterinarios.
+        # Ordenadas por momento de carga, la más antigua primero
+        self._fechas = OrderedDict()
+        self._fecha_por_cita = {}
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._max_fechas = max_fechas
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'CLINICA_INDICE_DISPONIBILIDAD_TTL', 30)
+
+    @property
+    def max_fechas(self):
+        if self._max_fechas is not None:
+            return self._max_fechas
+        return getattr(settings, 'CLINICA_INDICE_DISPONIBILIDAD_MAX_FECHAS', 120)
+
+    def horarios_base(self, fecha: date):
+        """Devuelve la lista de horarios configurados para el día de la semana"""
+        es_fin_semana = fecha.weekday() in [5, 6]  # 5=sábado, 6=domingo
+        return self.HORARIOS_LABORALES['fin_semana'] if es_fin_semana else self.HORARIOS_LABORALES['semana']
+
+    def _bit(self, fecha: date, hora):
+        """Posición del horario dentro de la máscara, o None si no es un horario laboral"""
+        hora_str = hora if isinstance(hora, str) else hora.strftime('%H:%M')
+        try:
+            return self.horarios_base(fecha).index(hora_str)
+        except ValueError:
+            return None
+
+    def es_horario_laboral(self, fecha: date, hora):
+        """Indica si la hora corresponde a un horario configurado para esa fecha"""
+        return self._bit(fecha, hora) is not None
+
+    def _calcular_mascaras(self, citas):
+        mascaras = {None: 0}
+        for veterinario_id, bit in citas.values():
+            mascaras[veterinario_id] = mascaras.get(veterinario_id, 0) | (1 << bit)
+            mascaras[None] |= 1 << bit
+        return mascaras
+
+    def _cargar_fecha(self, fecha: date):
+        """Construye la entrada de una fecha con una sola consulta a la base de datos"""
+        filas = Cita.objects.filter(
+            fecha_cita=fecha,
+            estado__in=self.ESTADOS_OCUPAN
+        ).values_list('id_cita', 'veterinario_id', 'hora_cita')
+
+        citas = {}
+        for id_cita, veterinario_id, hora_cita in filas:
+            bit = self._bit(fecha, hora_cita)
+            if bit is not None:
+                citas[id_cita] = (veterinario_id, bit)
+
+        with self._lock:
+            anterior = self._fechas.get(fecha)
+            if anterior:
+                for id_cita in anterior['citas']:
+                    self._fecha_por_cita.pop(id_cita, None)
+            for id_cita in citas:
+                self._fecha_por_cita[id_cita] = fecha
+            entrada = {
+                'citas': citas,
+                'mascaras': self._calcular_mascaras(citas),
+                'cargado': reloj.monotonic(),
+            }
+            self._fechas[fecha] = entrada
+            self._fechas.move_to_end(fecha)
+            self._expulsar(timezone.localdate())
+        return entrada
+
+    def _expulsar(self, hoy: date):
+        """Descarta las fechas pasadas y, sobre el límite, las cargadas hace más tiempo"""
+        sobrantes = [f for f in self._fechas if f < hoy]
+        exceso = len(self._fechas) - len(sobrantes) - self.max_fechas
+        if exceso > 0:
+            sobrantes += [f for f in self._fechas if f >= hoy][:exceso]
+        for f in sobrantes:
+            self._descartar(f)
+
+    def _descartar(self, fecha: date):
+        entrada = self._fechas.pop(fecha, None)
+        if entrada:
+            for id_cita in entrada['citas']:
+                self._fecha_por_cita.pop(id_cita, None)
+
+    def _entrada(self, fecha: date):
+        entrada = self._fechas.get(fecha)
+        if entrada is None or reloj.monotonic() - entrada['cargado'] > self.ttl:
+            entrada = self._cargar_fecha(fecha)
+        return entrada
+
+    def mascara_ocupada(self, fecha: date, veterinario_id=None):
+        """Máscara de bits de los horarios ocupados (bit i = horarios_base(fecha)[i])"""
+        return self._entrada(fecha)['mascaras'].get(veterinario_id, 0)
+
+    def esta_disponible(self, fecha: date, hora, veterinario_id=None):
+        """Indica si un horario está libre sin recorrer la lista de horarios"""
+        bit = self._bit(fecha, hora)
+        if bit is None:
+            return False
+        return not (self.mascara_ocupada(fecha, veterinario_id) >> bit) & 1
+
+    def registrar_cita(self, cita: Cita):
+        """Actualiza el índice de forma incremental tras guardar una cita"""
+        with self._lock:
+            self._quitar(cita.id_cita)
+            entrada = self._fechas.get(cita.fecha_cita)
+            # Las fechas que aún no se consultaron se cargarán completas al pedirlas
+            if entrada is None or cita.estado not in self.ESTADOS_OCUPAN:
+                return
+            bit = self._bit(cita.fecha_cita, cita.hora_cita)
+            if bit is None:
+                return
+            entrada['citas'][cita.id_cita] = (cita.veterinario_id, bit)
+            entrada['mascaras'] = self._calcular_mascaras(entrada['citas'])
+            self._fecha_por_cita[cita.id_cita] = cita.fecha_cita
+
+    def eliminar_cita(self, cita: Cita):
+        """Quita una cita eliminada del índice"""
+        with self._lock:
+            self._quitar(cita.id_cita)
+
+    def _quitar(self, id_cita):
+        fecha = self._fecha_por_cita.pop(id_cita, None)
+        entrada = self._fechas.get(fecha)
+        if entrada and entrada['citas'].pop(id_cita, None) is not None:
+            entrada['mascaras'] = self._calcular_mascaras(entrada['citas'])
+
+    def invalidar(self, fecha: date = None):
+        """Descarta una fecha (o todo el índice) para reconstruirlo en la próxima consulta"""
+        with self._lock:
+            for f in [fecha] if fecha else list(self._fechas):
+                self._descartar(f)
+
+    def verificar_consistencia(self, fecha: date, reparar=True):
+        """Compara el índice con la base de datos; devuelve True si coinciden"""
+        entrada = self._fechas.get(fecha)
+        if entrada is None:
+            return True
+
+        esperado = self._calcular_mascaras({
+            id_cita: (veterinario_id, bit)
+            for id_cita, veterinario_id, hora_cita in Cita.objects.filter(
+                fecha_cita=fecha,
+                estado__in=self.ESTADOS_OCUPAN
+            ).values_list('id_cita', 'veterinario_id', 'hora_cita')
+            for bit in [self._bit(fecha, hora_cita)] if bit is not None
+        })
+        consistente = esperado == entrada['mascaras']
+        if not consistente and reparar:
+            self._cargar_fecha(fecha)
+        return consistente
+
+
+indice_disponibilidad = IndiceDisponibilidad()
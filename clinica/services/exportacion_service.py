@@ -0,0 +1,52 @@
+import csv
+from django.http import StreamingHttpResponse
+
+
+class _Eco:
+    """Pseudo-archivo: csv.writer devuelve la línea en lugar de acumularla"""
+
+    def write(self, valor):
+        return valor
+
+
+class ExportacionCSVService:
+    """Exportación CSV en streaming con memoria constante sin importar la cantidad de filas"""
+
+    TAMANO_LOTE = 2000
+
+    def __init__(self, tamano_lote=None):
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE
+
+    def filas(self, queryset, columnas):
+        """Genera las líneas CSV recorriendo la tabla por lotes de clave primaria.
+
+        Se usa paginación por clave en lugar de .iterator(): mysqlclient no tiene
+        cursores del lado del servidor y cargaría todo el resultado en memoria.
+        """
+        escritor = csv.writer(_Eco())
+        campos = [campo for campo, _ in columnas]
+        pk = queryset.model._meta.pk.name
+
+        # BOM para que Excel reconozca UTF-8
+        yield '\ufeff' + escritor.writerow([titulo for _, titulo in columnas])
+
+        ultimo = None
+        while True:
+            lote = queryset.order_by(pk)
+            if ultimo is not None:
+                lote = lote.filter(**{f'{pk}__gt': ultimo})
+            lote = list(lote.values_list(pk, *campos)[:self.tamano_lote])
+            if not lote:
+                return
+            for fila in lote:
+                yield escritor.writerow(fila[1:])
+            ultimo = lote[-1][0]
+
+    def respuesta(self, queryset, columnas, nombre_archivo):
+        """StreamingHttpResponse con el CSV del queryset"""
+        respuesta = StreamingHttpResponse(
+            self.filas(queryset, columnas),
+            content_type='text/csv; charset=utf-8'
+        )
+        respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+        return respuesta
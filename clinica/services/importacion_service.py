@@ -0,0 +1,302 @@
+import csv
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Case, Max, Value, When
+from usuarios.models import Usuario, Persona, Cliente
+from usuarios.services.cliente_service import ClienteService
+from ..models import Mascota, Consulta
+from .busqueda_service import BusquedaMascotaService
+from .resumen_consultas_service import ResumenConsultasService
+
+
+class ImportacionService:
+    """Importación masiva por lotes de clientes, mascotas y consultas históricas (CSV o JSONL).
+
+    Cada lote se confirma antes de escribir el checkpoint: si el proceso muere entre
+    ambos pasos, al reanudar se repite el último lote. Por eso cada tipo descarta las
+    filas que ya existen por su clave natural (email del cliente; cliente y nombre de
+    la mascota; mascota, veterinario, fecha y motivo de la consulta).
+    """
+
+    TIPOS = ('clientes', 'mascotas', 'consultas')
+    SEXOS = dict(Mascota.SEXO_CHOICES)
+
+    def __init__(self, tipo, tamano_lote=500, ruta_rechazos=None):
+        if tipo not in self.TIPOS:
+            raise ValueError(f'Tipo {tipo} no permitido')
+        self.tipo = tipo
+        self.tamano_lote = tamano_lote
+        self.ruta_rechazos = ruta_rechazos
+        self.resumen_consultas = ResumenConsultasService()
+        self.busqueda = BusquedaMascotaService()
+
+    # --- Lectura ---
+
+    def leer(self, ruta):
+        """Genera (número de línea, fila) sin cargar el archivo completo en memoria"""
+        with open(ruta, encoding='utf-8', newline='') as archivo:
+            if ruta.endswith('.jsonl'):
+                for numero, linea in enumerate(archivo, start=1):
+                    if linea.strip():
+                        yield numero, json.loads(linea)
+            else:
+                # La línea 1 es la cabecera
+                for numero, fila in enumerate(csv.DictReader(archivo), start=2):
+                    yield numero, fila
+
+    def lotes(self, filas):
+        while True:
+            lote = list(islice(filas, self.tamano_lote))
+            if not lote:
+                return
+            yield lote
+
+    # --- Checkpoint ---
+
+    def leer_checkpoint(self, ruta_checkpoint, ruta):
+        if not ruta_checkpoint or not os.path.exists(ruta_checkpoint):
+            return 0
+        with open(ruta_checkpoint, encoding='utf-8') as archivo:
+            checkpoint = json.load(archivo)
+        if checkpoint.get('archivo') != os.path.abspath(ruta) or checkpoint.get('tipo') != self.tipo:
+            raise ValueError('El checkpoint corresponde a otro archivo o tipo de importación')
+        return checkpoint['linea']
+
+    def guardar_checkpoint(self, ruta_checkpoint, ruta, linea):
+        if not ruta_checkpoint:
+            return
+        temporal = f'{ruta_checkpoint}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({'archivo': os.path.abspath(ruta), 'tipo': self.tipo, 'linea': linea}, archivo)
+        os.replace(temporal, ruta_checkpoint)
+
+    # --- Proceso ---
+
+    def importar(self, ruta, ruta_checkpoint=None):
+        """Importa el archivo por lotes; cada lote es una transacción y actualiza el checkpoint"""
+        ultima_linea = self.leer_checkpoint(ruta_checkpoint, ruta)
+        filas = ((n, fila) for n, fila in self.leer(ruta) if n > ultima_linea)
+        resumen = {'importados': 0, 'rechazados': 0, 'reanudado_desde': ultima_linea}
+
+        rechazos = open(self.ruta_rechazos, 'a', encoding='utf-8') if self.ruta_rechazos else None
+        try:
+            for lote in self.lotes(filas):
+                with transaction.atomic():
+                    importados, errores = getattr(self, f'_importar_{self.tipo}')(lote)
+                resumen['importados'] += importados
+                resumen['rechazados'] += len(errores)
+                if rechazos:
+                    for linea, fila, motivos in errores:
+                        rechazos.write(json.dumps(
+                            {'linea': linea, 'fila': fila, 'errores': motivos},
+                            ensure_ascii=False, default=str
+                        ) + '\n')
+                    rechazos.flush()
+                self.guardar_checkpoint(ruta_checkpoint, ruta, lote[-1][0])
+        finally:
+            if rechazos:
+                rechazos.close()
+        return resumen
+
+    def _requeridos(self, fila, campos):
+        return [f'{c} es requerido' for c in campos if not str(fila.get(c) or '').strip()]
+
+    def _importar_clientes(self, lote):
+        errores = []
+        validas = []
+        emails = set()
+        for linea, fila in lote:
+            motivos = self._requeridos(fila, ['email', 'nombre', 'apellido'])
+            email = str(fila.get('email') or '').strip().lower()
+            if email in emails:
+                motivos.append('email duplicado en el archivo')
+            if motivos:
+                errores.append((linea, fila, motivos))
+                continue
+            emails.add(email)
+            validas.append((linea, fila, email))
+
+        existentes = set(Usuario.objects.filter(email__in=emails).values_list('email', flat=True))
+        pendientes = []
+        for linea, fila, email in validas:
+            if email in existentes:
+                errores.append((linea, fila, ['email ya registrado']))
+            else:
+                pendientes.append((fila, email))
+
+        # Contraseña no utilizable: el cliente la define al activar su cuenta
+        password = make_password(None)
+        Usuario.objects.bulk_create([
+            Usuario(
+                email=email, username=email, password=password,
+                nombre=fila['nombre'].strip(), apellido=fila['apellido'].strip()
+            )
+            for fila, email in pendientes
+        ], batch_size=self.tamano_lote)
+
+        # bulk_create no devuelve las claves en MySQL: se resuelven con un mapa en memoria
+        usuarios = dict(Usuario.objects.filter(
+            email__in=[email for _, email in pendientes]
+        ).values_list('email', 'id_usuario'))
+        Persona.objects.bulk_create([
+            Persona(
+                usuario_id=usuarios[email],
+                telefono=(fila.get('telefono') or '').strip() or None,
+                direccion=(fila.get('direccion') or '').strip() or None
+            )
+            for fila, email in pendientes
+        ], batch_size=self.tamano_lote)
+
+        personas = Persona.objects.filter(usuario_id__in=usuarios.values()).values_list('id_persona', flat=True)
+        Cliente.objects.bulk_create(
+            [Cliente(persona_id=id_persona) for id_persona in personas],
+            batch_size=self.tamano_lote
+        )
+        ClienteService().asignar_rol_cliente(usuarios.values())
+        return len(pendientes), errores
+
+    def _importar_mascotas(self, lote):
+        emails = {str(fila.get('cliente_email') or '').strip().lower() for _, fila in lote}
+        clientes = dict(Cliente.objects.filter(
+            persona__usuario__email__in=emails
+        ).values_list('persona__usuario__email', 'id_cliente'))
+
+        # Clave natural: las consultas importadas buscan la mascota por cliente y nombre
+        registradas = {
+            (dueño_id, nombre.lower())
+            for dueño_id, nombre in Mascota.objects.filter(
+                dueño_id__in=clientes.values()
+            ).values_list('dueño_id', 'nombre')
+        }
+
+        errores = []
+        mascotas = []
+        for linea, fila in lote:
+            motivos = self._requeridos(fila, ['cliente_email', 'nombre', 'especie', 'raza', 'edad', 'sexo'])
+            cliente_id = clientes.get(str(fila.get('cliente_email') or '').strip().lower())
+            if fila.get('cliente_email') and not cliente_id:
+                motivos.append('cliente no encontrado')
+            clave = (cliente_id, str(fila.get('nombre') or '').strip().lower())
+            if cliente_id and clave in registradas:
+                motivos.append('mascota ya registrada para el cliente')
+            if fila.get('sexo') and fila['sexo'] not in self.SEXOS:
+                motivos.append('sexo debe ser M o H')
+            try:
+                edad = int(fila.get('edad') or 0)
+            except (TypeError, ValueError):
+                motivos.append('edad debe ser un número entero')
+            if motivos:
+                errores.append((linea, fila, motivos))
+                continue
+            registradas.add(clave)
+            mascotas.append(Mascota(
+                nombre=fila['nombre'].strip(), especie=fila['especie'].strip(),
+                raza=fila['raza'].strip(), edad=edad, sexo=fila['sexo'], dueño_id=cliente_id
+            ))
+
+        ultima_clave = Mascota.objects.aggregate(maximo=Max('pk'))['maximo'] or 0
+        Mascota.objects.bulk_create(mascotas, batch_size=self.tamano_lote)
+        # bulk_create no emite post_save: los documentos de búsqueda se crean en el mismo lote
+        if mascotas:
+            self.busqueda.indexar([
+                Mascota(pk=clave) for clave in self._claves_insertadas(Mascota, mascotas, ultima_clave)
+            ])
+        return len(mascotas), errores
+
+    def _importar_consultas(self, lote):
+        emails = {str(fila.get('cliente_email') or '').strip().lower() for _, fila in lote}
+        veterinarios_emails = {str(fila.get('veterinario_email') or '').strip().lower() for _, fila in lote}
+        mascotas = {
+            (email, nombre.lower()): id_mascota
+            for id_mascota, nombre, email in Mascota.objects.filter(
+                dueño__persona__usuario__email__in=emails
+            ).values_list('id_mascota', 'nombre', 'dueño__persona__usuario__email')
+        }
+        veterinarios = dict(Usuario.objects.filter(
+            email__in=veterinarios_emails
+        ).values_list('email', 'id_usuario'))
+        registradas = set(Consulta.objects.filter(
+            mascota_id__in=mascotas.values()
+        ).values_list('mascota_id', 'veterinario_id', 'fecha_consulta', 'motivo'))
+
+        errores = []
+        consultas = []
+        for linea, fila in lote:
+            motivos = self._requeridos(fila, [
+                'cliente_email', 'mascota', 'veterinario_email', 'fecha_consulta',
+                'motivo', 'diagnostico', 'costo'
+            ])
+            clave_mascota = (
+                str(fila.get('cliente_email') or '').strip().lower(),
+                str(fila.get('mascota') or '').strip().lower()
+            )
+            mascota_id = mascotas.get(clave_mascota)
+            veterinario_id = veterinarios.get(str(fila.get('veterinario_email') or '').strip().lower())
+            if fila.get('mascota') and not mascota_id:
+                motivos.append('mascota no encontrada para el cliente')
+            if fila.get('veterinario_email') and not veterinario_id:
+                motivos.append('veterinario no encontrado')
+            try:
+                fecha = datetime.strptime(str(fila.get('fecha_consulta')), '%Y-%m-%d').date()
+            except ValueError:
+                motivos.append('fecha_consulta debe tener formato YYYY-MM-DD')
+            try:
+                costo = Decimal(str(fila.get('costo')))
+                if costo < 0:
+                    motivos.append('costo debe ser positivo')
+            except InvalidOperation:
+                motivos.append('costo debe ser numérico')
+            if not motivos:
+                clave = (mascota_id, veterinario_id, fecha, fila['motivo'].strip())
+                if clave in registradas:
+                    motivos.append('consulta ya registrada')
+            if motivos:
+                errores.append((linea, fila, motivos))
+                continue
+            registradas.add(clave)
+            consultas.append(Consulta(
+                mascota_id=mascota_id, veterinario_id=veterinario_id, fecha_consulta=fecha,
+                motivo=fila['motivo'].strip(), diagnostico=fila['diagnostico'].strip(),
+                observaciones=(fila.get('observaciones') or '').strip() or None, costo=costo
+            ))
+
+        fechas = [c.fecha_consulta for c in consultas]
+        ultima_clave = Consulta.objects.aggregate(maximo=Max('pk'))['maximo'] or 0
+        Consulta.objects.bulk_create(consultas, batch_size=self.tamano_lote)
+        self._restituir_fechas(consultas, fechas, ultima_clave)
+        # bulk_create no emite post_save: el resumen diario se actualiza aquí
+        self.resumen_consultas.recalcular_al_confirmar(
+            {(c.fecha_consulta, c.veterinario_id, c.estado) for c in consultas}
+        )
+        return len(consultas), errores
+
+    def _restituir_fechas(self, consultas, fechas, ultima_clave):
+        """fecha_consulta es auto_now_add: bulk_create guarda (y asigna a las instancias)
+        la fecha de hoy; un solo UPDATE devuelve a cada consulta su fecha histórica"""
+        if not consultas:
+            return
+        claves = self._claves_insertadas(Consulta, consultas, ultima_clave)
+        por_fecha = defaultdict(list)
+        for clave, consulta, fecha in zip(claves, consultas, fechas):
+            consulta.fecha_consulta = fecha
+            por_fecha[fecha].append(clave)
+        Consulta.objects.filter(pk__in=claves).update(fecha_consulta=Case(
+            *[When(pk__in=grupo, then=Value(fecha)) for fecha, grupo in por_fecha.items()]
+        ))
+
+    def _claves_insertadas(self, modelo, instancias, ultima_clave):
+        """Claves de las filas de un bulk_create, en el orden de las instancias"""
+        claves = [instancia.pk for instancia in instancias]
+        if claves[0] is None:
+            # MySQL no devuelve las claves del bulk_create: el lote se inserta dentro de
+            # la transacción y recibe claves consecutivas desde ultima_clave
+            claves = list(modelo.objects.filter(pk__gt=ultima_clave).order_by('pk').values_list(
+                'pk', flat=True
+            )[:len(instancias)])
+        return claves
@@ -1,6 +1,7 @@
 from django.db import transaction
-from django.db.models import Q
-from .models import Mascota
+from django.db.models import Count, Q
+from ..models import Mascota
+from .busqueda_service import BusquedaMascotaService
 from usuarios.models import Usuario
 
 class MascotaService:
@@ -12,14 +13,13 @@ class MascotaService:
     
     @staticmethod
     def buscar_mascotas(termino_busqueda):
-        """Busca mascotas por nombre, especie, raza o dueño"""
-        return Mascota.objects.filter(
-            Q(nombre__icontains=termino_busqueda) |
-            Q(especie__icontains=termino_busqueda) |
-            Q(raza__icontains=termino_busqueda) |
-            Q(usuario__nombre__icontains=termino_busqueda) |
-            Q(usuario__apellido__icontains=termino_busqueda)
-        ).select_related('usuario')
+        """Busca mascotas por nombre, especie, raza, dueño o teléfono, ordenadas por relevancia"""
+        return BusquedaMascotaService().buscar(termino_busqueda).select_related('dueño__persona__usuario')
+    
+    @staticmethod
+    def sugerir_mascotas(termino_busqueda, limite=None):
+        """Búsqueda por prefijo acotada para autocompletado"""
+        return BusquedaMascotaService().sugerencias(termino_busqueda, limite)
     
     @staticmethod
     def obtener_mascotas_por_cliente(cliente_id):
@@ -119,23 +119,28 @@ class MascotaService:
         except Mascota.DoesNotExist:
             raise ValueError('Mascota no encontrada')
     
+    @staticmethod
+    def obtener_totales():
+        """Total de mascotas, activas e inactivas en una sola consulta"""
+        return Mascota.objects.aggregate(
+            total_mascotas=Count('id_mascota'),
+            mascotas_activas=Count('id_mascota', filter=Q(estado=True)),
+            mascotas_inactivas=Count('id_mascota', filter=Q(estado=False)),
+        )
+
+    @staticmethod
+    def obtener_especies():
+        """Mascotas activas por especie, de la más numerosa a la menos"""
+        return list(
+            Mascota.objects.filter(estado=True).values('especie').annotate(
+                total=Count('id_mascota')
+            ).order_by('-total', 'especie')
+        )
+
     @staticmethod
     def obtener_estadisticas():
-        """Obtiene estadísticas de mascotas"""
-        total_mascotas = Mascota.objects.count()
-        mascotas_activas = Mascota.objects.filter(estado='Activo').count()
-        mascotas_inactivas = Mascota.objects.filter(estado='Inactivo').count()
-        
-        # Estadísticas por especie
-        especies_stats = Mascota.objects.filter(estado='Activo').values(
-            'especie'
-        ).annotate(
-            total=models.Count('id')
-        ).order_by('-total')
-        
+        """Obtiene estadísticas de mascotas (el dashboard las arma con las mismas consultas)"""
         return {
-            'total_mascotas': total_mascotas,
-            'mascotas_activas': mascotas_activas,
-            'mascotas_inactivas': mascotas_inactivas,
-            'especies_stats': list(especies_stats)
+            **MascotaService.obtener_totales(),
+            'especies_stats': MascotaService.obtener_especies(),
         }
\ No newline at end of file
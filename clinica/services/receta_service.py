@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from facturacion.services.pdf_service import generar_pdf, SALTO_PAGINA
+from ..models import Consulta, ConsultaTratamiento
+
+
+class RecetaService:
+    """Recetas médicas memorizadas por consulta.
+
+    La receta renderizada se guarda en el caché de Django con la versión de la
+    consulta (su fecha_modificacion y la de sus tratamientos); mientras no cambien,
+    reimprimirla no vuelve a leer las relaciones. Las que faltan se cargan todas
+    juntas en una sola consulta.
+    """
+
+    MAX_CONSULTAS_LOTE = 100
+    INSTRUCCIONES = 'Seguir al pie de la letra las indicaciones del veterinario'
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'RECETAS_CACHE_TTL', 24 * 3600)
+
+    def _versiones(self, ids):
+        """Versión de cada consulta activa: una consulta liviana sin JOIN a las relaciones"""
+        activas = Q(consultatratamiento__estado=True)
+        filas = Consulta.objects.filter(pk__in=ids, estado=True).annotate(
+            ultimo_tratamiento=Max('consultatratamiento__fecha_modificacion', filter=activas),
+            cantidad_tratamientos=Count('consultatratamiento', filter=activas),
+        ).values_list('id_consulta', 'fecha_modificacion', 'ultimo_tratamiento', 'cantidad_tratamientos')
+        return {
+            id_consulta: f"{fecha.isoformat()}|{ultimo.isoformat() if ultimo else ''}|{cantidad}"
+            for id_consulta, fecha, ultimo, cantidad in filas
+        }
+
+    @staticmethod
+    def _clave(id_consulta, version):
+        return f"receta:{id_consulta}:{version}"
+
+    def _cargar(self, ids):
+        """Construye las recetas de varias consultas con una sola consulta SQL"""
+        lineas = ConsultaTratamiento.objects.filter(
+            consulta_id__in=ids, estado=True
+        ).select_related(
+            'tratamiento',
+            'consulta__mascota__dueño__persona__usuario',
+            'consulta__veterinario',
+        ).order_by('consulta_id', 'pk')
+
+        recetas = {}
+        for linea in lineas:
+            consulta = linea.consulta
+            receta = recetas.get(consulta.id_consulta)
+            if receta is None:
+                propietario = consulta.mascota.dueño.persona
+                receta = recetas[consulta.id_consulta] = {
+                    'consulta_id': consulta.id_consulta,
+                    'fecha_consulta': consulta.fecha_consulta.isoformat(),
+                    'mascota': consulta.mascota.nombre,
+                    'especie': consulta.mascota.especie,
+                    'propietario': str(propietario),
+                    'veterinario': f"{consulta.veterinario.nombre} {consulta.veterinario.apellido}",
+                    'diagnostico': consulta.diagnostico,
+                    'tratamientos': [],
+                    'observaciones': consulta.observaciones,
+                    'instrucciones': self.INSTRUCCIONES,
+                }
+            receta['tratamientos'].append({
+                'nombre': linea.tratamiento.nombre,
+                'descripcion': linea.tratamiento.descripcion,
+                'duracion': linea.tratamiento.duracion,
+                'cantidad': linea.cantidad,
+            })
+        return recetas
+
+    def obtener_recetas(self, ids):
+        """Recetas de las consultas en el orden pedido; ValueError si alguna no aplica"""
+        ids = list(dict.fromkeys(int(i) for i in ids))
+        versiones = self._versiones(ids)
+        faltantes = [i for i in ids if i not in versiones]
+        if faltantes:
+            raise ValueError(f"Consultas inexistentes o inactivas: {', '.join(map(str, faltantes))}")
+
+        claves = {i: self._clave(i, versiones[i]) for i in ids}
+        guardadas = cache.get_many(claves.values())
+        recetas = {i: guardadas[claves[i]] for i in ids if claves[i] in guardadas}
+
+        pendientes = [i for i in ids if i not in recetas]
+        if pendientes:
+            nuevas = self._cargar(pendientes)
+            sin_tratamiento = [i for i in pendientes if i not in nuevas]
+            if sin_tratamiento:
+                raise ValueError(
+                    f"Consultas sin tratamientos prescritos: {', '.join(map(str, sin_tratamiento))}"
+                )
+            cache.set_many({claves[i]: nuevas[i] for i in pendientes}, timeout=self.ttl)
+            recetas.update(nuevas)
+
+        fecha_emision = timezone.now().date()
+        return [dict(recetas[i], fecha_emision=fecha_emision) for i in ids]
+
+    def lineas(self, receta):
+        """Texto imprimible de una receta"""
+        lineas = [
+            'RECETA MÉDICA VETERINARIA',
+            '',
+            f"Consulta: {receta['consulta_id']}    Fecha: {receta['fecha_emision']:%d/%m/%Y}",
+            f"Mascota: {receta['mascota']} ({receta['especie']})",
+            f"Propietario: {receta['propietario']}",
+            f"Veterinario: {receta['veterinario']}",
+            '',
+            f"Diagnóstico: {receta['diagnostico']}",
+            '',
+            'Tratamientos:',
+        ]
+        for tratamiento in receta['tratamientos']:
+            detalle = f"  - {tratamiento['nombre']} x{tratamiento['cantidad']}"
+            if tratamiento['duracion']:
+                detalle += f" ({tratamiento['duracion']})"
+            lineas.append(detalle)
+            if tratamiento['descripcion']:
+                lineas.append(f"    {tratamiento['descripcion']}")
+        if receta['observaciones']:
+            lineas += ['', f"Observaciones: {receta['observaciones']}"]
+        lineas += ['', receta['instrucciones']]
+        return lineas
+
+    def pdf(self, ids):
+        """Un solo PDF con una receta por página (impresión en lote)"""
+        if len(ids) > self.MAX_CONSULTAS_LOTE:
+            raise ValueError(f'Máximo {self.MAX_CONSULTAS_LOTE} consultas por lote')
+        lineas = []
+        for receta in self.obtener_recetas(ids):
+            if lineas:
+                lineas.append(SALTO_PAGINA)
+            lineas += self.lineas(receta)
+        return generar_pdf(lineas, titulo='Recetas médicas')
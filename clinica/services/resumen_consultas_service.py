@@ -0,0 +1,85 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count
+from ..models import Consulta, ResumenConsultasDiario
+
+
+class ResumenConsultasService:
+    """Mantiene la tabla ResumenConsultasDiario a partir de Consulta"""
+
+    CAMPOS_CLAVE = ('fecha_consulta', 'veterinario_id', 'estado')
+
+    def claves(self, consultas):
+        """Obtiene las claves (fecha, veterinario, estado) de un queryset de consultas"""
+        return set(consultas.values_list(*self.CAMPOS_CLAVE))
+
+    def recalcular(self, claves):
+        """Recalcula solo los grupos afectados por un cambio"""
+        for fecha, veterinario_id, estado in claves:
+            clave = {'fecha': fecha, 'veterinario_id': veterinario_id, 'estado': estado}
+            with transaction.atomic():
+                # Con la fila bloqueada, un recálculo concurrente del mismo grupo espera y
+                # luego agrega con los datos ya confirmados: no pisa el total con uno viejo
+                self._bloquear(clave)
+                agregado = Consulta.objects.filter(
+                    fecha_consulta=fecha,
+                    veterinario_id=veterinario_id,
+                    estado=estado
+                ).aggregate(
+                    cantidad=Count('id_consulta'),
+                    total=Sum('costo')
+                )
+                if agregado['cantidad']:
+                    ResumenConsultasDiario.objects.filter(**clave).update(
+                        cantidad_consultas=agregado['cantidad'],
+                        total=agregado['total'] or Decimal('0'),
+                    )
+                else:
+                    ResumenConsultasDiario.objects.filter(**clave).delete()
+
+    def _bloquear(self, clave):
+        """Bloquea la fila del grupo; si no existe la crea vacía, que también la bloquea"""
+        if ResumenConsultasDiario.objects.select_for_update().filter(**clave).first():
+            return
+        try:
+            with transaction.atomic():
+                ResumenConsultasDiario.objects.create(**clave)
+        except IntegrityError:
+            # Otro proceso la creó primero: se espera a su bloqueo
+            ResumenConsultasDiario.objects.select_for_update().filter(**clave).first()
+
+    def recalcular_al_confirmar(self, claves):
+        """Programa el recálculo para cuando la transacción actual se confirme"""
+        if claves:
+            transaction.on_commit(lambda: self.recalcular(claves))
+
+    @transaction.atomic
+    def reconstruir(self, fecha_desde=None, fecha_hasta=None, tamano_lote=1000):
+        """Reconstruye el resumen completo (o un rango de fechas) con un único GROUP BY"""
+        consultas = Consulta.objects.all()
+        resumen = ResumenConsultasDiario.objects.all()
+        if fecha_desde:
+            consultas = consultas.filter(fecha_consulta__gte=fecha_desde)
+            resumen = resumen.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            consultas = consultas.filter(fecha_consulta__lte=fecha_hasta)
+            resumen = resumen.filter(fecha__lte=fecha_hasta)
+
+        resumen.delete()
+        grupos = consultas.values(*self.CAMPOS_CLAVE).annotate(
+            cantidad=Count('id_consulta'),
+            suma=Sum('costo')
+        ).order_by()
+
+        filas = [
+            ResumenConsultasDiario(
+                fecha=grupo['fecha_consulta'],
+                veterinario_id=grupo['veterinario_id'],
+                estado=grupo['estado'],
+                cantidad_consultas=grupo['cantidad'],
+                total=grupo['suma'] or Decimal('0'),
+            )
+            for grupo in grupos
+        ]
+        ResumenConsultasDiario.objects.bulk_create(filas, batch_size=tamano_lote)
+        return len(filas)
@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ..models import Mascota, Cita, Consulta, Tratamiento
+
+
+class CursorInvalidoError(ValueError):
+    pass
+
+
+class SincronizacionService:
+    """Sincronización incremental para clientes sin conexión (tablets de consultorio).
+
+    Cada modelo se recorre por la clave (fecha_modificacion, pk), apoyada en un índice
+    compuesto, así una página cuesta lo mismo sin importar cuántas filas hay detrás
+    del cursor. Los registros dados de baja se envían como lápidas (eliminado=True);
+    los borrados físicos no dejan rastro y requieren una sincronización completa.
+    """
+
+    MODELOS = {
+        'mascotas': Mascota,
+        'citas': Cita,
+        'consultas': Consulta,
+        'tratamientos': Tratamiento,
+    }
+    LIMITE_POR_DEFECTO = 200
+    LIMITE_MAXIMO = 1000
+    # Las filas más recientes que este margen no se envían todavía: una transacción
+    # en curso puede confirmar después con una fecha_modificacion anterior al cursor
+    MARGEN_SEGUNDOS = 5
+
+    @staticmethod
+    def codificar_cursor(posiciones):
+        texto = json.dumps(posiciones, separators=(',', ':'))
+        return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decodificar_cursor(cursor):
+        """Devuelve {modelo: [fecha_iso, pk]}; un cursor vacío empieza desde el principio"""
+        if not cursor:
+            return {}
+        try:
+            relleno = '=' * (-len(cursor) % 4)
+            posiciones = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+            for fecha, pk in posiciones.values():
+                if parse_datetime(fecha) is None or not isinstance(pk, int):
+                    raise ValueError
+            return posiciones
+        except (ValueError, TypeError, AttributeError):
+            raise CursorInvalidoError('Cursor de sincronización inválido')
+
+    @staticmethod
+    def es_lapida(modelo, fila):
+        """Indica si la fila representa un registro dado de baja"""
+        if modelo is Cita:
+            return fila['estado'] == 'Cancelada'
+        return not fila['estado']
+
+    def cambios_modelo(self, modelo, posicion, limite, hasta):
+        """Una página de filas modificadas después de `posicion` y hasta `hasta`"""
+        queryset = modelo.objects.filter(fecha_modificacion__lte=hasta)
+        if posicion:
+            fecha, pk = parse_datetime(posicion[0]), posicion[1]
+            queryset = queryset.filter(
+                Q(fecha_modificacion__gt=fecha) | Q(fecha_modificacion=fecha, pk__gt=pk)
+            )
+
+        campos = [campo.attname for campo in modelo._meta.concrete_fields]
+        filas = list(queryset.order_by('fecha_modificacion', 'pk').values(*campos)[:limite + 1])
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+
+        for fila in filas:
+            fila['eliminado'] = self.es_lapida(modelo, fila)
+        if filas:
+            ultima = filas[-1]
+            posicion = [ultima['fecha_modificacion'].isoformat(), ultima[modelo._meta.pk.attname]]
+        return filas, posicion, hay_mas
+
+    def cambios_desde(self, cursor=None, modelos=None, limite=None):
+        """Cambios de cada modelo pedido a partir del cursor, con el cursor siguiente"""
+        posiciones = self.decodificar_cursor(cursor)
+        nombres = modelos or list(self.MODELOS)
+        desconocidos = [nombre for nombre in nombres if nombre not in self.MODELOS]
+        if desconocidos:
+            raise ValueError(f'Modelos no sincronizables: {", ".join(desconocidos)}')
+
+        limite = min(limite or self.LIMITE_POR_DEFECTO, self.LIMITE_MAXIMO)
+        hasta = timezone.now() - timedelta(seconds=self.MARGEN_SEGUNDOS)
+
+        cambios, hay_mas = {}, False
+        for nombre in nombres:
+            filas, posiciones[nombre], pendiente = self.cambios_modelo(
+                self.MODELOS[nombre], posiciones.get(nombre), limite, hasta
+            )
+            cambios[nombre] = filas
+            hay_mas = hay_mas or pendiente
+        posiciones = {nombre: posicion for nombre, posicion in posiciones.items() if posicion}
+
+        return {
+            'cambios': cambios,
+            'cursor': self.codificar_cursor(posiciones),
+            'hay_mas': hay_mas,
+        }
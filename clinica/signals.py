@@ -0,0 +1,74 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from usuarios.models import Usuario, Persona
+from .models import Cita, Consulta, Mascota
+from .services.disponibilidad_service import indice_disponibilidad
+from .services.busqueda_service import BusquedaMascotaService
+from .services.resumen_consultas_service import ResumenConsultasService
+
+busqueda_service = BusquedaMascotaService()
+resumen_consultas = ResumenConsultasService()
+
+
+@receiver(post_save, sender=Cita)
+def actualizar_indice_cita(sender, instance, **kwargs):
+    """Mantiene el índice de disponibilidad al crear o modificar una cita"""
+    indice_disponibilidad.registrar_cita(instance)
+
+
+@receiver(post_delete, sender=Cita)
+def quitar_cita_del_indice(sender, instance, **kwargs):
+    """Quita del índice de disponibilidad una cita eliminada"""
+    indice_disponibilidad.eliminar_cita(instance)
+
+
+@receiver(pre_save, sender=Consulta)
+def guardar_clave_previa_consulta(sender, instance, raw=False, **kwargs):
+    """Recuerda el grupo del resumen al que pertenecía la consulta antes del cambio"""
+    instance._claves_resumen = (
+        resumen_consultas.claves(Consulta.objects.filter(pk=instance.pk)) if instance.pk and not raw else set()
+    )
+
+
+@receiver(post_save, sender=Consulta)
+def actualizar_resumen_consulta(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    claves = getattr(instance, '_claves_resumen', set())
+    claves.add((instance.fecha_consulta, instance.veterinario_id, instance.estado))
+    resumen_consultas.recalcular_al_confirmar(claves)
+
+
+@receiver(pre_delete, sender=Consulta)
+def guardar_clave_consulta_eliminada(sender, instance, **kwargs):
+    instance._claves_resumen = resumen_consultas.claves(Consulta.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Consulta)
+def actualizar_resumen_consulta_eliminada(sender, instance, **kwargs):
+    resumen_consultas.recalcular_al_confirmar(getattr(instance, '_claves_resumen', set()))
+
+
+@receiver(post_save, sender=Mascota)
+def indexar_mascota(sender, instance, raw=False, **kwargs):
+    """Regenera el documento de búsqueda de la mascota"""
+    if not raw:
+        busqueda_service.indexar([instance])
+
+
+@receiver(post_save, sender=Persona)
+def reindexar_mascotas_de_persona(sender, instance, raw=False, **kwargs):
+    """El teléfono del dueño forma parte del documento de búsqueda"""
+    if not raw:
+        busqueda_service.indexar(Mascota.objects.filter(dueño__persona=instance).only('pk'))
+
+
+@receiver(post_save, sender=Usuario)
+def reindexar_mascotas_de_usuario(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    """El nombre y apellido del dueño forman parte del documento de búsqueda"""
+    # El login guarda solo last_login: no cambia ningún documento
+    if update_fields is not None and {'nombre', 'apellido'}.isdisjoint(update_fields):
+        return
+    if not raw and not created:
+        busqueda_service.indexar(Mascota.objects.filter(dueño__persona__usuario=instance).only('pk'))
+
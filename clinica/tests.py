@@ -1,3 +1,729 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import threading
+from datetime import date, time, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from usuarios.models import Usuario, Rol, Persona, Cliente
+from .models import Mascota, Cita, Consulta, ConsultaTratamiento, ResumenConsultasDiario, Tratamiento
+from .services.auditoria_indices_service import AuditoriaIndicesService
+from .services.cita_service import CitaService, HorarioOcupadoError
+from .services.consulta_service import ConsultaService
+from .services.receta_service import RecetaService
+from .services.resumen_consultas_service import ResumenConsultasService
+from .services.importacion_service import ImportacionService
+from .services.busqueda_service import BusquedaMascotaService
+from .services.disponibilidad_service import IndiceDisponibilidad, indice_disponibilidad
+from .services.sincronizacion_service import SincronizacionService
 
-# Create your tests here.
+
+def crear_usuario(email, nombre='Ana', apellido='Pérez', roles=()):
+    usuario = Usuario.objects.create(email=email, nombre=nombre, apellido=apellido)
+    for rol in roles:
+        usuario.roles.add(Rol.objects.get_or_create(nombre=rol)[0])
+    return usuario
+
+
+def crear_cliente(email):
+    usuario = crear_usuario(email, roles=['Cliente'])
+    persona = Persona.objects.create(usuario=usuario, telefono='555-0000')
+    return Cliente.objects.create(persona=persona)
+
+
+def crear_mascota(cliente, nombre='Firulais', **campos):
+    campos = {'especie': 'Perro', 'raza': 'Mestizo', 'edad': 3, 'sexo': 'M', **campos}
+    return Mascota.objects.create(nombre=nombre, dueño=cliente, **campos)
+
+
+def proximo_dia_habil():
+    fecha = timezone.now().date() + timedelta(days=1)
+    while fecha.weekday() >= 5:
+        fecha += timedelta(days=1)
+    return fecha
+
+
+def crear_consulta(mascota, veterinario, costo='100.00', **campos):
+    return Consulta.objects.create(
+        mascota=mascota, veterinario=veterinario, motivo='Control', diagnostico='Sano',
+        costo=costo, **campos
+    )
+
+
+def prescribir(consulta, nombre='Amoxicilina', cantidad=1):
+    tratamiento = Tratamiento.objects.create(nombre=nombre, duracion='7 días', costo_base='25.00')
+    return ConsultaTratamiento.objects.create(
+        consulta=consulta, tratamiento=tratamiento, cantidad=cantidad, costo_unitario='25.00'
+    )
+
+
+class SincronizacionTests(TestCase):
+    URL = '/api/clinica/sincronizacion/changes_since/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('vet@clinica.com', roles=['Veterinario']))
+        self.cliente = crear_cliente('dueno@correo.com')
+        self.hace_una_hora = timezone.now() - timedelta(hours=1)
+
+    def _mascotas(self, cantidad, fecha=None):
+        mascotas = [crear_mascota(self.cliente, f'Mascota {i}') for i in range(cantidad)]
+        # auto_now: la fecha se fija con update() y queda fuera del margen de sincronización
+        Mascota.objects.filter(pk__in=[m.pk for m in mascotas]).update(
+            fecha_modificacion=fecha or self.hace_una_hora
+        )
+        return mascotas
+
+    def _recorrer(self, cursor=None, limite=2, modelos='mascotas'):
+        """Pide páginas hasta que hay_mas es falso; devuelve las filas y el último cursor"""
+        filas, paginas = [], 0
+        while True:
+            parametros = {'modelos': modelos, 'limite': limite}
+            if cursor:
+                parametros['cursor'] = cursor
+            response = self.client.get(self.URL, parametros)
+            self.assertEqual(response.status_code, 200)
+            filas += response.data['cambios']['mascotas'] if 'mascotas' in modelos else []
+            cursor = response.data['cursor']
+            paginas += 1
+            if not response.data['hay_mas']:
+                return filas, cursor, paginas
+
+    def test_cursor_recorre_todas_las_filas_una_vez(self):
+        mascotas = self._mascotas(5)
+        for i, mascota in enumerate(mascotas):
+            Mascota.objects.filter(pk=mascota.pk).update(
+                fecha_modificacion=self.hace_una_hora + timedelta(seconds=i)
+            )
+
+        filas, _, paginas = self._recorrer(limite=2)
+
+        self.assertEqual([f['id_mascota'] for f in filas], [m.pk for m in mascotas])
+        self.assertEqual(paginas, 3)
+
+    def test_empates_en_fecha_se_ordenan_por_clave_primaria(self):
+        # Todas con la misma fecha_modificacion: el cursor desempata por pk
+        mascotas = self._mascotas(5)
+
+        filas, _, _ = self._recorrer(limite=1)
+
+        self.assertEqual([f['id_mascota'] for f in filas], sorted(m.pk for m in mascotas))
+
+    def test_cursor_final_solo_devuelve_cambios_posteriores(self):
+        mascotas = self._mascotas(3)
+        _, cursor, _ = self._recorrer()
+
+        Mascota.objects.filter(pk=mascotas[1].pk).update(
+            fecha_modificacion=self.hace_una_hora + timedelta(minutes=10)
+        )
+        filas, _, _ = self._recorrer(cursor=cursor)
+
+        self.assertEqual([f['id_mascota'] for f in filas], [mascotas[1].pk])
+
+    def test_filas_recientes_esperan_el_margen(self):
+        self._mascotas(1, fecha=timezone.now())
+
+        filas, _, _ = self._recorrer()
+
+        self.assertEqual(filas, [])
+
+    def test_bajas_se_envian_como_lapidas(self):
+        activa, baja = self._mascotas(2)
+        Mascota.objects.filter(pk=baja.pk).update(estado=False)
+        cita = Cita.objects.create(
+            mascota=activa, fecha_cita=timezone.now().date(), hora_cita='10:00', estado='Cancelada'
+        )
+        Cita.objects.filter(pk=cita.pk).update(fecha_modificacion=self.hace_una_hora)
+
+        response = self.client.get(self.URL, {'modelos': 'mascotas,citas'})
+
+        eliminado = {f['id_mascota']: f['eliminado'] for f in response.data['cambios']['mascotas']}
+        self.assertEqual(eliminado, {activa.pk: False, baja.pk: True})
+        self.assertEqual([f['eliminado'] for f in response.data['cambios']['citas']], [True])
+
+    def test_cursor_invalido_o_modelo_desconocido(self):
+        self.assertEqual(self.client.get(self.URL, {'cursor': 'no-es-un-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'modelos': 'facturas'}).status_code, 400)
+
+    def test_cursor_codifica_posicion_por_modelo(self):
+        mascotas = self._mascotas(2)
+
+        _, cursor, _ = self._recorrer()
+
+        posiciones = SincronizacionService.decodificar_cursor(cursor)
+        self.assertEqual(list(posiciones), ['mascotas'])
+        self.assertEqual(posiciones['mascotas'][1], mascotas[-1].pk)
+
+    def test_requiere_autenticacion(self):
+        self.assertIn(APIClient().get(self.URL).status_code, (401, 403))
+
+
+class ResumenConsultasTests(TestCase):
+    def setUp(self):
+        self.veterinarios = [crear_usuario(f'vet{i}@clinica.com', roles=['Veterinario']) for i in range(2)]
+        self.mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+
+    def _consultas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            consultas = [
+                crear_consulta(self.mascota, self.veterinarios[0], '100.00'),
+                crear_consulta(self.mascota, self.veterinarios[0], '50.50'),
+                crear_consulta(self.mascota, self.veterinarios[1], '20.00'),
+                crear_consulta(self.mascota, self.veterinarios[1], '10.00'),
+            ]
+        with self.captureOnCommitCallbacks(execute=True):
+            consultas[1].estado = False
+            consultas[1].save()
+            consultas[3].delete()
+        return consultas
+
+    def _resumen(self):
+        return sorted(ResumenConsultasDiario.objects.values_list(
+            'fecha', 'veterinario_id', 'estado', 'cantidad_consultas', 'total'
+        ))
+
+    def test_estadisticas_desde_el_resumen(self):
+        self._consultas()
+
+        with self.assertNumQueries(1):
+            estadisticas = ConsultaService().obtener_estadisticas()
+
+        self.assertEqual(estadisticas, {
+            'total_consultas': 3,
+            'consultas_activas': 2,
+            'consultas_este_mes': 3,
+            'ingresos_totales': 170.5,
+        })
+        response = APIClient().get('/api/clinica/consultas/estadisticas/')
+        self.assertEqual(response.data, estadisticas)
+
+    def test_actualizacion_incremental_coincide_con_reconstruir(self):
+        self._consultas()
+        incremental = self._resumen()
+
+        ResumenConsultasService().reconstruir()
+
+        self.assertEqual(self._resumen(), incremental)
+        self.assertEqual(len(incremental), 3)
+
+
+class ImportacionTests(TestCase):
+    def _archivo(self, contenido):
+        archivo = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        with archivo:
+            archivo.write(contenido)
+        self.addCleanup(os.remove, archivo.name)
+        return archivo.name
+
+    def test_clientes_importados_tienen_rol_cliente(self):
+        ruta = self._archivo('email,nombre,apellido\nluis@correo.com,Luis,Gómez\nmar@correo.com,Mar,Díaz\n')
+
+        resumen = ImportacionService('clientes').importar(ruta)
+
+        self.assertEqual(resumen['importados'], 2)
+        self.assertEqual(
+            set(Usuario.objects.filter(roles__nombre='Cliente').values_list('email', flat=True)),
+            {'luis@correo.com', 'mar@correo.com'}
+        )
+        self.assertEqual(Cliente.objects.count(), 2)
+
+    def _importar_consultas(self):
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_consulta(crear_mascota(crear_cliente('dueno@correo.com'), 'Toby'), veterinario)
+        ruta = self._archivo(
+            'cliente_email,mascota,veterinario_email,fecha_consulta,motivo,diagnostico,costo\n'
+            'dueno@correo.com,Toby,vet@clinica.com,2023-01-10,Vacuna,Sano,30.00\n'
+            'dueno@correo.com,Toby,vet@clinica.com,2023-01-10,Control,Sano,20.00\n'
+            'dueno@correo.com,Toby,vet@clinica.com,2022-06-01,Cojera,Esguince,45.00\n'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ImportacionService('consultas').importar(ruta)
+        return veterinario
+
+    def _verificar_fechas(self, veterinario):
+        hoy = timezone.now().date()
+        self.assertEqual(
+            sorted(Consulta.objects.values_list('motivo', 'fecha_consulta')),
+            [('Cojera', date(2022, 6, 1)), ('Control', date(2023, 1, 10)),
+             ('Control', hoy), ('Vacuna', date(2023, 1, 10))]
+        )
+        self.assertEqual(sorted(ResumenConsultasDiario.objects.values_list('fecha', 'cantidad_consultas')), [
+            (date(2022, 6, 1), 1), (date(2023, 1, 10), 2), (hoy, 1)
+        ])
+        # La definición del campo no se modifica
+        self.assertTrue(Consulta._meta.get_field('fecha_consulta').auto_now_add)
+
+    def test_consultas_conservan_la_fecha_historica(self):
+        self._verificar_fechas(self._importar_consultas())
+
+    def test_fechas_sin_claves_devueltas_por_bulk_create(self):
+        # Como en MySQL: las instancias quedan sin clave después del bulk_create
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            veterinario = self._importar_consultas()
+        self._verificar_fechas(veterinario)
+
+    def _importar_mascotas(self):
+        crear_cliente('dueno@correo.com')
+        ruta = self._archivo(
+            'cliente_email,nombre,especie,raza,edad,sexo\n'
+            'dueno@correo.com,Toby,Perro,Beagle,3,M\n'
+            'dueno@correo.com,Michi,Gato,Siamés,2,H\n'
+        )
+        return ImportacionService('mascotas').importar(ruta), ruta
+
+    def test_mascotas_importadas_quedan_indexadas(self):
+        self._importar_mascotas()
+
+        self.assertEqual(
+            list(BusquedaMascotaService().buscar('michi siam').values_list('nombre', flat=True)), ['Michi']
+        )
+
+    def test_mascotas_indexadas_sin_claves_devueltas_por_bulk_create(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            self._importar_mascotas()
+
+        self.assertEqual(list(BusquedaMascotaService().buscar('toby').values_list('nombre', flat=True)), ['Toby'])
+
+    def test_lote_repetido_no_duplica_mascotas(self):
+        # Sin checkpoint se repite el lote, como al reanudar tras una caída antes de escribirlo
+        _, ruta = self._importar_mascotas()
+
+        repetido = ImportacionService('mascotas').importar(ruta)
+
+        self.assertEqual((repetido['importados'], repetido['rechazados']), (0, 2))
+        self.assertEqual(Mascota.objects.count(), 2)
+
+    def test_lote_repetido_no_duplica_consultas(self):
+        veterinario = self._importar_consultas()
+        with self.captureOnCommitCallbacks(execute=True):
+            repetido = ImportacionService('consultas').importar(self._archivo(
+                'cliente_email,mascota,veterinario_email,fecha_consulta,motivo,diagnostico,costo\n'
+                'dueno@correo.com,Toby,vet@clinica.com,2023-01-10,Vacuna,Sano,30.00\n'
+            ))
+
+        self.assertEqual(repetido['rechazados'], 1)
+        self._verificar_fechas(veterinario)
+
+
+class IndiceDisponibilidadTests(TestCase):
+    def setUp(self):
+        self.indice = IndiceDisponibilidad(ttl=60, max_fechas=2)
+        self.veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        self.mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+        self.hoy = timezone.localdate()
+
+    def _cita(self, fecha, hora=time(10)):
+        return Cita.objects.create(
+            mascota=self.mascota, veterinario=self.veterinario, fecha_cita=fecha, hora_cita=hora
+        )
+
+    def test_consultas_dentro_del_ttl_no_van_a_la_base(self):
+        fecha = self.hoy + timedelta(days=1)
+        with self.assertNumQueries(1):
+            self.indice.esta_disponible(fecha, '10:00')
+            self.indice.esta_disponible(fecha, '11:00', self.veterinario.pk)
+
+    def test_ttl_vencido_recarga_la_fecha(self):
+        self.indice._ttl = 0
+        fecha = self.hoy + timedelta(days=1)
+        self.assertTrue(self.indice.esta_disponible(fecha, '10:00'))
+        # Reserva hecha por otro proceso: no pasa por las señales de este índice
+        Cita.objects.bulk_create([Cita(mascota=self.mascota, veterinario=self.veterinario,
+                                       fecha_cita=fecha, hora_cita=time(10))])
+        self.assertFalse(self.indice.esta_disponible(fecha, '10:00'))
+
+    def test_fechas_pasadas_se_descartan(self):
+        ayer = self.hoy - timedelta(days=1)
+        cita = self._cita(ayer)
+        self.indice.mascara_ocupada(ayer)
+        self.indice.mascara_ocupada(self.hoy)
+
+        self.assertEqual(list(self.indice._fechas), [self.hoy])
+        self.assertNotIn(cita.pk, self.indice._fecha_por_cita)
+
+    def test_limite_de_fechas_descarta_la_cargada_hace_mas_tiempo(self):
+        fechas = [self.hoy + timedelta(days=i) for i in range(1, 4)]
+        citas = [self._cita(fecha) for fecha in fechas]
+        for fecha in fechas:
+            self.indice.mascara_ocupada(fecha)
+
+        self.assertEqual(list(self.indice._fechas), fechas[1:])
+        self.assertEqual(set(self.indice._fecha_por_cita), {c.pk for c in citas[1:]})
+
+
+class ReservaHorarioTests(TestCase):
+    URL = '/api/clinica/citas/reservar/'
+
+    def setUp(self):
+        indice_disponibilidad.invalidar()
+        self.veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        self.mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.veterinario)
+        self.datos = {
+            'mascota': self.mascota.pk, 'veterinario': self.veterinario.pk,
+            'fecha': proximo_dia_habil().isoformat(), 'hora': '10:00',
+        }
+
+    def test_horario_ocupado_responde_409(self):
+        self.assertEqual(self.client.post(self.URL, self.datos).status_code, 201)
+        self.assertEqual(self.client.post(self.URL, self.datos).status_code, 409)
+
+    def test_claves_foraneas_invalidas_responden_400(self):
+        for campo in ('mascota', 'veterinario'):
+            with self.subTest(campo=campo):
+                response = self.client.post(self.URL, {**self.datos, campo: 999999})
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cita.objects.exists())
+
+    def test_alta_por_el_listado_valida_el_horario(self):
+        datos = {
+            'mascota': self.mascota.pk, 'veterinario': self.veterinario.pk,
+            'fecha_cita': self.datos['fecha'], 'hora_cita': '10:00',
+        }
+        self.assertEqual(self.client.post('/api/clinica/citas/', datos).status_code, 201)
+        self.assertEqual(self.client.post('/api/clinica/citas/', datos).status_code, 409)
+
+        response = self.client.post('/api/clinica/citas/', {**datos, 'hora_cita': '10:37'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Cita.objects.count(), 1)
+
+    def test_modificar_valida_el_horario(self):
+        fecha = proximo_dia_habil()
+        CitaService().reservar_horario(self.mascota.pk, self.veterinario.pk, fecha, time(10))
+        cita = CitaService().reservar_horario(self.mascota.pk, self.veterinario.pk, fecha, time(11))
+        url = f'/api/clinica/citas/{cita.pk}/'
+
+        self.assertEqual(self.client.patch(url, {'hora_cita': '10:00'}).status_code, 409)
+        self.assertEqual(self.client.patch(url, {'hora_cita': '10:37'}).status_code, 400)
+        self.assertEqual(self.client.patch(url, {'hora_cita': '14:00'}).status_code, 200)
+        cita.refresh_from_db()
+        self.assertEqual(cita.hora_cita, time(14))
+        self.assertTrue(indice_disponibilidad.esta_disponible(fecha, '11:00', self.veterinario.pk))
+
+    def test_reserva_exige_veterinario(self):
+        with self.assertRaises(ValueError):
+            CitaService().reservar_horario(self.mascota.pk, None, proximo_dia_habil(), time(10))
+
+    def test_cita_cancelada_libera_el_horario(self):
+        cita = CitaService().reservar_horario(
+            self.mascota.pk, self.veterinario.pk, proximo_dia_habil(), time(10)
+        )
+        CitaService().cambiar_estado(cita, 'Cancelada')
+
+        self.assertEqual(self.client.post(self.URL, self.datos).status_code, 201)
+
+
+class CalendarioDisponibilidadTests(TestCase):
+    URL = '/api/clinica/citas/calendario_disponibilidad/'
+
+    def setUp(self):
+        self.veterinarios = [crear_usuario(f'vet{i}@clinica.com', roles=['Veterinario']) for i in range(2)]
+        self.mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+        # Un viernes, así el rango de tres días incluye el horario reducido del fin de semana
+        self.viernes = timezone.localdate() + timedelta(days=1)
+        while self.viernes.weekday() != 4:
+            self.viernes += timedelta(days=1)
+        for veterinario, hora, estado in [
+            (self.veterinarios[0], time(10), 'Agendada'),
+            (self.veterinarios[1], time(11), 'Cancelada'),
+        ]:
+            Cita.objects.create(
+                mascota=self.mascota, veterinario=veterinario, fecha_cita=self.viernes, hora_cita=hora, estado=estado
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('recepcion@clinica.com', roles=['Recepcionista']))
+
+    def _calendario(self, dias=3, **parametros):
+        return self.client.get(self.URL, {
+            'fecha_desde': self.viernes.isoformat(),
+            'fecha_hasta': (self.viernes + timedelta(days=dias - 1)).isoformat(),
+            **parametros,
+        })
+
+    def test_grilla_por_dia_con_horarios_ocupados(self):
+        response = self._calendario()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([len(dia['horarios']) for dia in response.data], [7, 3, 3])
+        viernes = {h['hora']: h['disponible'] for h in response.data[0]['horarios']}
+        # La cita cancelada no ocupa su horario
+        self.assertEqual([hora for hora, disponible in viernes.items() if not disponible], ['10:00'])
+
+    def test_disponibilidad_por_veterinario(self):
+        ids = [v.pk for v in self.veterinarios]
+        response = self._calendario(dias=1, veterinarios=','.join(map(str, ids)))
+
+        diez = next(h for h in response.data[0]['horarios'] if h['hora'] == '10:00')
+        self.assertTrue(diez['disponible'])
+        self.assertEqual(diez['veterinarios'], {ids[0]: False, ids[1]: True})
+
+        solo_el_primero = self._calendario(dias=1, veterinarios=str(ids[0]))
+        self.assertFalse(next(h for h in solo_el_primero.data[0]['horarios'] if h['hora'] == '10:00')['disponible'])
+
+    def test_una_consulta_para_todo_el_rango(self):
+        with self.assertNumQueries(1):
+            CitaService().obtener_calendario_disponibilidad(self.viernes, self.viernes + timedelta(days=30))
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get(self.URL).status_code, 400)
+        self.assertEqual(self._calendario(veterinarios='uno').status_code, 400)
+        self.assertEqual(self._calendario(dias=0).status_code, 400)
+        self.assertEqual(self._calendario(dias=CitaService.MAX_DIAS_CALENDARIO + 1).status_code, 400)
+
+
+class BusquedaMascotasTests(TestCase):
+    URL = '/api/clinica/mascotas/'
+
+    def setUp(self):
+        carlos = crear_cliente('carlos@correo.com')
+        carlos.persona.usuario.nombre, carlos.persona.usuario.apellido = 'Carlos', 'Gómez'
+        carlos.persona.usuario.save()
+        ana = crear_cliente('ana@correo.com')
+        ana.persona.usuario.apellido = 'Toledo'
+        ana.persona.usuario.save()
+        self.toby = crear_mascota(carlos, 'Toby', raza='Labrador')
+        self.tomasa = crear_mascota(carlos, 'Tomasa', especie='Gato')
+        self.rex = crear_mascota(ana, 'Rex')
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('recepcion@clinica.com', roles=['Recepcionista']))
+
+    def _nombres(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [m['nombre'] for m in response.data['results']]
+
+    def test_listado_y_detalle_muestran_al_dueno(self):
+        self.assertEqual(self._nombres(self.client.get(self.URL)), ['Rex', 'Tomasa', 'Toby'])
+
+        detalle = self.client.get(f'{self.URL}{self.toby.pk}/')
+        self.assertEqual(detalle.status_code, 200)
+        self.assertEqual(detalle.data['id_mascota'], self.toby.pk)
+        self.assertEqual(detalle.data['cliente_nombre'], 'Carlos Gómez')
+        self.assertEqual(detalle.data['cliente_email'], 'carlos@correo.com')
+
+    def test_busqueda_ordena_por_coincidencia_con_el_nombre(self):
+        # 'to' coincide con el nombre de Toby y Tomasa y con el apellido de la dueña de Rex
+        self.assertEqual(self._nombres(self.client.get(self.URL, {'search': 'to'})), ['Toby', 'Tomasa', 'Rex'])
+        # Sin tildes, por datos del dueño y con todas las palabras
+        self.assertEqual(self._nombres(self.client.get(self.URL, {'search': 'GOMEZ lab'})), ['Toby'])
+        self.assertEqual(self._nombres(self.client.get(self.URL, {'search': 'zzz'})), [])
+
+    def test_login_solo_actualiza_last_login(self):
+        # Ni la consulta de credenciales previas ni el reindexado de las mascotas del dueño
+        usuario = self.toby.dueño.persona.usuario
+        usuario.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            usuario.save(update_fields=['last_login'])
+
+        usuario.apellido = 'Pérez'
+        usuario.save()
+        self.assertEqual(self._nombres(self.client.get(self.URL, {'search': 'perez'})), ['Toby', 'Tomasa'])
+
+    def test_get_condicional_considera_los_datos_del_dueno(self):
+        etag = self.client.get(self.URL)['ETag']
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # El nombre del dueño se serializa: cambiarlo invalida el listado
+        Usuario.objects.filter(email='carlos@correo.com').update(
+            nombre='Carlos Andrés', fecha_modificacion=timezone.now() + timedelta(seconds=1)
+        )
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_sqlite_usa_el_filtro_por_prefijo(self):
+        servicio = BusquedaMascotaService()
+        self.assertFalse(servicio.usa_fulltext(['toby']))
+        self.assertEqual({m.relevancia for m in servicio.buscar('carlos')}, {1})
+
+        with mock.patch('clinica.services.busqueda_service.connection') as conexion:
+            conexion.vendor = 'mysql'
+            self.assertTrue(servicio.usa_fulltext(['toby']))
+            # Términos menores a innodb_ft_min_token_size no están en el índice FULLTEXT
+            self.assertFalse(servicio.usa_fulltext(['to']))
+
+
+class MascotasConHistorialTests(TestCase):
+    URL = '/api/clinica/consultas/mascotas_con_historial/'
+
+    def setUp(self):
+        cliente = crear_cliente('dueno@correo.com')
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        self.toby = crear_mascota(cliente, 'Toby')
+        self.luna = crear_mascota(cliente, 'Luna')
+        self.consultas = [crear_consulta(self.toby, veterinario) for _ in range(4)]
+        self.client = APIClient()
+        self.client.force_authenticate(veterinario)
+
+    def test_ultimas_consultas_por_mascota(self):
+        # Mascotas y últimas consultas de todas ellas: dos consultas sin importar la cantidad
+        with self.assertNumQueries(2):
+            response = self.client.get(self.URL)
+
+        self.assertEqual(response.status_code, 200)
+        toby, luna = response.data
+        self.assertEqual((toby['id_mascota'], toby['consultas_count']), (self.toby.pk, 4))
+        self.assertEqual(
+            [c['id_consulta'] for c in toby['consultas_recientes']],
+            [c.pk for c in reversed(self.consultas)][:3]
+        )
+        self.assertEqual(toby['consultas_recientes'][0]['cliente_nombre'], 'Ana Pérez')
+        self.assertEqual((luna['consultas_count'], luna['consultas_recientes']), (0, []))
+
+    def test_listado_de_consultas_con_detalles(self):
+        response = self.client.get('/api/clinica/consultas/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(response.data['results'][0]['mascota_nombre'], 'Toby')
+        self.assertEqual(response.data['results'][0]['veterinario_nombre'], 'Ana Pérez')
+
+
+class PermisosConsultasTests(TestCase):
+    """Exportar y recetas_lote entregan datos de todos los clientes: requieren rol"""
+
+    def setUp(self):
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        self.consulta = crear_consulta(crear_mascota(crear_cliente('dueno@correo.com')), veterinario)
+        prescribir(self.consulta)
+        self.usuarios = {
+            'anonimo': None,
+            'recepcion': crear_usuario('recepcion@clinica.com', roles=['Recepcionista']),
+            'veterinario': veterinario,
+            'admin': crear_usuario('admin@clinica.com', roles=['Administrador']),
+        }
+        self.client = APIClient()
+
+    def _estado(self, usuario, metodo, url, **datos):
+        self.client.force_authenticate(self.usuarios[usuario])
+        return getattr(self.client, metodo)(url, datos, format='json').status_code
+
+    def test_exportar_solo_administradores(self):
+        url = '/api/clinica/consultas/exportar/'
+        self.assertIn(self._estado('anonimo', 'get', url), (401, 403))
+        self.assertEqual(self._estado('veterinario', 'get', url), 403)
+        self.assertEqual(self._estado('admin', 'get', url), 200)
+
+    def test_recetas_lote_requiere_veterinario_o_administrador(self):
+        url = '/api/clinica/consultas/recetas_lote/'
+        datos = {'consultas': [self.consulta.pk]}
+        self.assertIn(self._estado('anonimo', 'post', url, **datos), (401, 403))
+        self.assertEqual(self._estado('recepcion', 'post', url, **datos), 403)
+        self.assertEqual(self._estado('veterinario', 'post', url, **datos), 200)
+        self.assertEqual(self._estado('admin', 'post', url, **datos), 200)
+
+
+class RecetaServiceTests(TestCase):
+    """La receta memorizada se identifica por la versión de la consulta y sus tratamientos"""
+
+    def setUp(self):
+        cache.clear()
+        self.consulta = crear_consulta(
+            crear_mascota(crear_cliente('dueno@correo.com')), crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        )
+        self.linea = prescribir(self.consulta)
+        self.service = RecetaService()
+
+    def _receta(self):
+        return self.service.obtener_recetas([self.consulta.pk])[0]
+
+    def test_receta_en_cache_solo_consulta_la_version(self):
+        self._receta()
+        with self.assertNumQueries(1):
+            self._receta()
+
+    def test_cambio_en_la_consulta_renueva_la_receta(self):
+        self._receta()
+        self.consulta.diagnostico = 'Otitis'
+        self.consulta.save()
+
+        self.assertEqual(self._receta()['diagnostico'], 'Otitis')
+
+    def test_cambios_en_los_tratamientos_renuevan_la_receta(self):
+        self._receta()
+        self.linea.cantidad = 3
+        self.linea.save()
+        self.assertEqual([t['cantidad'] for t in self._receta()['tratamientos']], [3])
+
+        otra = prescribir(self.consulta, 'Meloxicam')
+        self.assertEqual([t['nombre'] for t in self._receta()['tratamientos']], ['Amoxicilina', 'Meloxicam'])
+
+        # La baja de una línea cambia la cantidad aunque no sea la última modificada
+        ConsultaTratamiento.objects.filter(pk=otra.pk).update(estado=False)
+        self.assertEqual([t['nombre'] for t in self._receta()['tratamientos']], ['Amoxicilina'])
+
+    def test_consulta_inactiva_o_sin_tratamientos(self):
+        ConsultaTratamiento.objects.filter(pk=self.linea.pk).update(estado=False)
+        with self.assertRaisesMessage(ValueError, 'sin tratamientos'):
+            self._receta()
+
+        Consulta.objects.filter(pk=self.consulta.pk).update(estado=False)
+        with self.assertRaisesMessage(ValueError, 'inexistentes o inactivas'):
+            self._receta()
+
+
+class AuditoriaIndicesTests(TestCase):
+    def setUp(self):
+        self.salida = io.StringIO()
+
+    def _auditar(self):
+        call_command('auditar_indices', stdout=self.salida)
+        return self.salida.getvalue()
+
+    def test_las_consultas_frecuentes_usan_indices(self):
+        salida = self._auditar()
+
+        self.assertIn('Todas las consultas usan índices', salida)
+        self.assertNotIn('FALLA', salida)
+
+    def test_un_recorrido_completo_hace_fallar_el_comando(self):
+        # raza no tiene índice: SQLite recorre la tabla completa
+        consultas = AuditoriaIndicesService().consultas() + [
+            ('mascotas por raza', Mascota.objects.filter(raza='Beagle')),
+        ]
+        with mock.patch.object(AuditoriaIndicesService, 'consultas', return_value=consultas), \
+                self.assertRaisesMessage(CommandError, '1 consultas recorren tablas completas'):
+            self._auditar()
+
+        self.assertIn('FALLA  mascotas por raza: SCAN clinica_mascota', self.salida.getvalue())
+
+
+class ReservaConcurrenteTests(TransactionTestCase):
+    HILOS = 200
+
+    def setUp(self):
+        indice_disponibilidad.invalidar()
+        self.veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        self.mascotas = [
+            crear_mascota(crear_cliente(f'dueno{i}@correo.com'), f'Mascota {i}') for i in range(self.HILOS)
+        ]
+
+    def test_un_solo_hilo_obtiene_el_horario(self):
+        fecha, hora = proximo_dia_habil(), time(10)
+        barrera = threading.Barrier(self.HILOS)
+        resultados = []
+
+        def reservar(mascota):
+            try:
+                barrera.wait()
+                CitaService().reservar_horario(mascota.pk, self.veterinario.pk, fecha, hora)
+                resultados.append('reservada')
+            except HorarioOcupadoError:
+                resultados.append('ocupado')
+            except Exception as e:
+                resultados.append(repr(e))
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=reservar, args=(m,)) for m in self.mascotas]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(sorted(resultados), ['ocupado'] * (self.HILOS - 1) + ['reservada'])
+        self.assertEqual(Cita.objects.filter(fecha_cita=fecha, hora_cita=hora).count(), 1)
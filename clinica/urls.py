@@ -0,0 +1,16 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    MascotaViewSet, CitaViewSet, ConsultaViewSet, TratamientoViewSet, SincronizacionViewSet
+)
+
+router = DefaultRouter()
+router.register(r'mascotas', MascotaViewSet, basename='mascota')
+router.register(r'citas', CitaViewSet)
+router.register(r'consultas', ConsultaViewSet)
+router.register(r'tratamientos', TratamientoViewSet)
+router.register(r'sincronizacion', SincronizacionViewSet, basename='sincronizacion')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,5 @@
+from .mascota_views import MascotaViewSet
+from .cita_views import CitaViewSet
+from .consulta_views import ConsultaViewSet
+from .tratamiento_views import TratamientoViewSet
+from .sincronizacion_views import SincronizacionViewSet
@@ -1,17 +1,72 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import IntegrityError
 from django.utils import timezone
 from datetime import datetime, timedelta
 from ..models import Cita, Mascota
 from ..serializers import CitaSerializer
 from ..services import CitaService
+from ..services.cita_service import HorarioOcupadoError
+from GestionVeterinaria.condicional import GetCondicionalMixin
 
-class CitaViewSet(viewsets.ModelViewSet):
+class CitaViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Cita.objects.all()
     serializer_class = CitaSerializer
+    orden_paginacion = ('-fecha_cita', '-hora_cita', '-id_cita')
     cita_service = CitaService()
 
+    # Alta y modificación pasan por las mismas validaciones que la acción reservar
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        veterinario = datos.get('veterinario')
+        return self._respuesta_reserva(
+            lambda: self.cita_service.reservar_horario(
+                datos['mascota'].pk, veterinario and veterinario.pk, datos['fecha_cita'], datos['hora_cita'],
+                usuario=request.user if request.user.is_authenticated else None
+            ),
+            status.HTTP_201_CREATED
+        )
+
+    def update(self, request, *args, **kwargs):
+        cita = self.get_object()
+        serializer = self.get_serializer(cita, data=request.data, partial=kwargs.pop('partial', False))
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        mascota = datos.get('mascota', cita.mascota)
+        veterinario = datos['veterinario'] if 'veterinario' in datos else cita.veterinario
+        return self._respuesta_reserva(
+            lambda: self.cita_service.reprogramar(
+                cita, mascota.pk, veterinario and veterinario.pk,
+                datos.get('fecha_cita', cita.fecha_cita), datos.get('hora_cita', cita.hora_cita),
+                usuario=request.user if request.user.is_authenticated else None
+            ),
+            status.HTTP_200_OK
+        )
+
+    def _respuesta_reserva(self, reservar, estado_http):
+        try:
+            cita = reservar()
+        except HorarioOcupadoError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_409_CONFLICT
+            )
+        except IntegrityError:
+            # Por si una restricción de la base de datos se adelanta a las validaciones
+            return Response(
+                {'error': 'El horario ya fue reservado'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(self.get_serializer(cita).data, status=estado_http)
+
     # ✅ LÓGICA DE NEGOCIO: Horarios disponibles
     @action(detail=False, methods=['get'])
     def horarios_disponibles(self, request):
@@ -24,11 +79,46 @@ class CitaViewSet(viewsets.ModelViewSet):
 
         try:
             fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
-            horarios = self.cita_service.obtener_horarios_disponibles(fecha)
+            veterinario_id = request.query_params.get('veterinario')
+            horarios = self.cita_service.obtener_horarios_disponibles(fecha, veterinario_id and int(veterinario_id))
             return Response(horarios)
         except ValueError:
             return Response(
-                {'error': 'Formato de fecha inválido'}, 
+                {'error': 'Formato de fecha o veterinario inválido'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    # ✅ LÓGICA DE NEGOCIO: Calendario de disponibilidad por rango de fechas
+    @action(detail=False, methods=['get'])
+    def calendario_disponibilidad(self, request):
+        fecha_desde_str = request.query_params.get('fecha_desde')
+        fecha_hasta_str = request.query_params.get('fecha_hasta')
+        
+        if not fecha_desde_str or not fecha_hasta_str:
+            return Response(
+                {'error': 'Parámetros fecha_desde y fecha_hasta son requeridos'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            fecha_desde = datetime.strptime(fecha_desde_str, '%Y-%m-%d').date()
+            fecha_hasta = datetime.strptime(fecha_hasta_str, '%Y-%m-%d').date()
+            veterinarios_str = request.query_params.get('veterinarios', '')
+            veterinarios = [int(v) for v in veterinarios_str.split(',') if v.strip()]
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha o veterinarios inválido'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            calendario = self.cita_service.obtener_calendario_disponibilidad(
+                fecha_desde, fecha_hasta, veterinarios
+            )
+            return Response(calendario)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
@@ -45,7 +135,10 @@ class CitaViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            disponible = self.cita_service.validar_horario_disponible(fecha_str, hora_str)
+            veterinario_id = request.query_params.get('veterinario')
+            disponible = self.cita_service.validar_horario_disponible(
+                fecha_str, hora_str, veterinario_id and int(veterinario_id)
+            )
             return Response({'disponible': disponible})
         except ValueError as e:
             return Response(
@@ -53,6 +146,37 @@ class CitaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    # ✅ LÓGICA DE NEGOCIO: Reservar horario (atómico frente a reservas concurrentes)
+    @action(detail=False, methods=['post'])
+    def reservar(self, request):
+        mascota_id = request.data.get('mascota')
+        veterinario_id = request.data.get('veterinario')
+        fecha_str = request.data.get('fecha')
+        hora_str = request.data.get('hora')
+        
+        if not all([mascota_id, veterinario_id, fecha_str, hora_str]):
+            return Response(
+                {'error': 'Parámetros mascota, veterinario, fecha y hora son requeridos'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+            hora = datetime.strptime(hora_str, '%H:%M').time()
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha u hora inválido'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return self._respuesta_reserva(
+            lambda: self.cita_service.reservar_horario(
+                mascota_id, veterinario_id, fecha, hora,
+                usuario=request.user if request.user.is_authenticated else None
+            ),
+            status.HTTP_201_CREATED
+        )
+
     # ✅ LÓGICA DE NEGOCIO: Cambiar estado de cita
     @action(detail=True, methods=['patch'])
     def cambiar_estado(self, request, pk=None):
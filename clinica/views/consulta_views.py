@@ -1,14 +1,22 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
 from django.db.models import Count, Sum, Q
+from django.http import HttpResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from ..models import Consulta, Mascota
 from ..serializers import ConsultaSerializer, ConsultaConDetallesSerializer, MascotaConConsultasSerializer
 from ..services import ConsultaService
+from ..services.exportacion_service import ExportacionCSVService
+from ..services.receta_service import RecetaService
+from GestionVeterinaria.db_router import LecturaReplicaMixin, lectura_replica
+from GestionVeterinaria.condicional import GetCondicionalMixin
+from usuarios.permissions import HasRole
 
-class ConsultaViewSet(viewsets.ModelViewSet):
+class ConsultaViewSet(LecturaReplicaMixin, GetCondicionalMixin, viewsets.ModelViewSet):
+    orden_paginacion = ('-fecha_consulta', '-id_consulta')
     queryset = Consulta.objects.all()
     consulta_service = ConsultaService()
 
@@ -18,7 +26,7 @@ class ConsultaViewSet(viewsets.ModelViewSet):
         return ConsultaSerializer
 
     def get_queryset(self):
-        return Consulta.objects.select_related('mascota', 'veterinario').all()
+        return Consulta.objects.select_related('mascota__dueño__persona__usuario', 'veterinario').all()
 
     @action(detail=False, methods=['get'])
     def por_mascota(self, request, mascota_id=None):
@@ -34,6 +42,7 @@ class ConsultaViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=False, methods=['get'])
+    @lectura_replica
     def mascotas_con_historial(self, request):
         """Obtiene mascotas con su historial de consultas"""
         try:
@@ -60,13 +69,58 @@ class ConsultaViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def generar_receta(self, request, pk=None):
-        """Genera una receta médica para la consulta"""
+        """Genera una receta médica para la consulta (?formato=pdf para imprimirla)"""
         consulta = self.get_object()
         try:
+            if request.query_params.get('formato') == 'pdf':
+                return self._respuesta_pdf(RecetaService().pdf([consulta.pk]), f'receta-{consulta.pk}.pdf')
             receta = self.consulta_service.generar_receta_medica(consulta)
             return Response(receta)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, HasRole('Administrador', 'Veterinario')])
+    def recetas_lote(self, request):
+        """Un solo PDF con las recetas de varias consultas: {"consultas": [ids]}"""
+        consultas = request.data.get('consultas') or []
+        if not isinstance(consultas, list) or not consultas:
+            return Response(
+                {'error': 'Debe indicar la lista de consultas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            return self._respuesta_pdf(RecetaService().pdf(consultas), 'recetas.pdf')
+        except (ValueError, TypeError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    @staticmethod
+    def _respuesta_pdf(contenido, nombre_archivo):
+        respuesta = HttpResponse(contenido, content_type='application/pdf')
+        respuesta['Content-Disposition'] = f'inline; filename="{nombre_archivo}"'
+        return respuesta
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, HasRole('Administrador')])
+    def exportar(self, request):
+        """Exporta consultas en CSV (streaming)"""
+        try:
+            fecha_desde = request.query_params.get('fecha_desde')
+            fecha_hasta = request.query_params.get('fecha_hasta')
+            estado = request.query_params.get('estado')
+            consultas, columnas = self.consulta_service.obtener_exportacion(
+                fecha_desde=datetime.strptime(fecha_desde, '%Y-%m-%d').date() if fecha_desde else None,
+                fecha_hasta=datetime.strptime(fecha_hasta, '%Y-%m-%d').date() if fecha_hasta else None,
+                estado=estado.lower() in ['true', '1', 'activo'] if estado else None
+            )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return ExportacionCSVService().respuesta(consultas, columnas, f'consultas_{timezone.now():%Y%m%d}')
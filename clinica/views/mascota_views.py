@@ -3,20 +3,29 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
-from .models import Mascota
-from .serializers import (
+from ..models import Mascota
+from ..serializers import (
     MascotaSerializer,
     MascotaCreateSerializer,
     MascotaUpdateSerializer,
-    MascotaListSerializer
+    MascotaListSerializer,
+    MascotaBasicSerializer
 )
-from .services import MascotaService
+from ..services import MascotaService
+from GestionVeterinaria.db_router import LecturaReplicaMixin
+from GestionVeterinaria.cache import respuesta_en_cache
+from GestionVeterinaria.condicional import GetCondicionalMixin
 
-class MascotaViewSet(viewsets.ModelViewSet):
+class MascotaViewSet(LecturaReplicaMixin, GetCondicionalMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    # Las respuestas incluyen el nombre, teléfono y correo del dueño
+    condicional_campos = (
+        'fecha_modificacion', 'dueño__persona__fecha_modificacion', 'dueño__persona__usuario__fecha_modificacion'
+    )
     
     def get_queryset(self):
-        queryset = Mascota.objects.all().select_related('usuario')
+        # Los serializers muestran los datos del dueño: Cliente -> Persona -> Usuario
+        queryset = Mascota.objects.all().select_related('dueño__persona__usuario')
         
         # Filtrar por búsqueda
         search_term = self.request.query_params.get('search', '')
@@ -29,6 +38,12 @@ class MascotaViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(estado=estado)
         
         return queryset
+
+    def get_orden_paginacion(self):
+        # Los resultados de búsqueda se paginan conservando el orden por relevancia
+        if self.request.query_params.get('search', ''):
+            return ('-coincide_nombre', '-relevancia', 'nombre', 'id_mascota')
+        return ('-id_mascota',)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -178,7 +193,25 @@ class MascotaViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['get'])
+    def sugerencias(self, request):
+        """Autocompletado de mascotas por prefijo (resultados acotados)"""
+        termino = request.query_params.get('q', '')
+        if not termino.strip():
+            return Response([])
+        
+        try:
+            mascotas = MascotaService.sugerir_mascotas(termino, request.query_params.get('limite'))
+            serializer = MascotaBasicSerializer(mascotas, many=True)
+            return Response(serializer.data)
+        except ValueError:
+            return Response(
+                {'error': 'El límite debe ser un número entero'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    @action(detail=False, methods=['get'])
+    @respuesta_en_cache([Mascota])
     def especies(self, request):
-        """Obtener lista de especies disponibles"""
-        especies = [choice[0] for choice in Mascota.ESPECIE_CHOICES]
-        return Response(especies)
\ No newline at end of file
+        """Obtener lista de especies registradas"""
+        especies = Mascota.objects.order_by('especie').values_list('especie', flat=True).distinct()
+        return Response(list(especies))
\ No newline at end of file
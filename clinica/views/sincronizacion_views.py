@@ -0,0 +1,29 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from ..services.sincronizacion_service import SincronizacionService
+
+
+class SincronizacionViewSet(viewsets.ViewSet):
+    """Sincronización incremental de mascotas, citas, consultas y tratamientos"""
+    permission_classes = [IsAuthenticated]
+    sincronizacion_service = SincronizacionService()
+    # Una consulta por modelo sincronizado, más la sesión y el usuario
+    presupuesto_consultas = {'changes_since': len(SincronizacionService.MODELOS) + 2}
+
+    @action(detail=False, methods=['get'])
+    def changes_since(self, request):
+        """Filas modificadas después del cursor; repetir con el cursor devuelto mientras hay_mas"""
+        modelos = request.query_params.get('modelos')
+        limite = request.query_params.get('limite')
+        try:
+            resultado = self.sincronizacion_service.cambios_desde(
+                cursor=request.query_params.get('cursor'),
+                modelos=modelos.split(',') if modelos else None,
+                limite=int(limite) if limite else None
+            )
+        except ValueError as e:
+            # Incluye CursorInvalidoError, modelos desconocidos y límites no numéricos
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
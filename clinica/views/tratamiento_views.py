@@ -0,0 +1,21 @@
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+from ..models import Tratamiento
+from ..serializers import TratamientoSerializer
+from GestionVeterinaria.cache import RespuestaCacheMixin
+from GestionVeterinaria.condicional import GetCondicionalMixin
+
+
+class TratamientoViewSet(GetCondicionalMixin, RespuestaCacheMixin, viewsets.ModelViewSet):
+    """Catálogo de tratamientos; list y retrieve se sirven desde caché"""
+    queryset = Tratamiento.objects.all().order_by('nombre')
+    serializer_class = TratamientoSerializer
+    orden_paginacion = ('nombre', 'id_tratamiento')
+    presupuesto_consultas = {'list': 4, 'retrieve': 4}
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        serializer.save(usuario_creacion=self.request.user)
+
+    def perform_update(self, serializer):
+        serializer.save(usuario_modificacion=self.request.user)
@@ -0,0 +1,32 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from facturacion.services.facturacion_lote_service import FacturacionLoteService
+
+
+class Command(BaseCommand):
+    help = 'Factura en lote las consultas que todavía no tienen factura'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha de consulta inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha de consulta final (YYYY-MM-DD)')
+        parser.add_argument('--veterinario', type=int, help='Id del veterinario')
+        parser.add_argument('--tamano-lote', type=int, default=FacturacionLoteService.TAMANO_LOTE)
+        parser.add_argument('--simulacion', action='store_true', help='Calcula sin crear facturas')
+
+    def handle(self, *args, **options):
+        try:
+            desde = datetime.strptime(options['desde'], '%Y-%m-%d').date() if options['desde'] else None
+            hasta = datetime.strptime(options['hasta'], '%Y-%m-%d').date() if options['hasta'] else None
+        except ValueError:
+            raise CommandError('Formato de fecha inválido, use YYYY-MM-DD')
+
+        resultado = FacturacionLoteService(tamano_lote=options['tamano_lote']).facturar(
+            fecha_desde=desde,
+            fecha_hasta=hasta,
+            veterinario_id=options['veterinario'],
+            simulacion=options['simulacion']
+        )
+        accion = 'Se facturarían' if resultado['simulacion'] else 'Facturadas'
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {resultado['cantidad_facturas']} consultas por un total de {resultado['total']}"
+        ))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from facturacion.services.documento_service import DocumentoFacturaService
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de PDFs de facturas (una vez, o en bucle con --continuo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='Sigue esperando trabajos nuevos')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre revisiones de la cola')
+        parser.add_argument('--limite', type=int, help='Máximo de trabajos por revisión')
+
+    def handle(self, *args, **options):
+        servicio = DocumentoFacturaService()
+        while True:
+            completados = servicio.procesar_pendientes(options['limite'])
+            if completados:
+                self.stdout.write(self.style.SUCCESS(f'PDFs generados: {completados}'))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,22 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from facturacion.services.resumen_service import ResumenFacturacionService
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de resumen diario de facturación a partir de las facturas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha final (YYYY-MM-DD)')
+        parser.add_argument('--tamano-lote', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            desde = datetime.strptime(options['desde'], '%Y-%m-%d').date() if options['desde'] else None
+            hasta = datetime.strptime(options['hasta'], '%Y-%m-%d').date() if options['hasta'] else None
+        except ValueError:
+            raise CommandError('Formato de fecha inválido, use YYYY-MM-DD')
+
+        filas = ResumenFacturacionService().reconstruir(desde, hasta, options['tamano_lote'])
+        self.stdout.write(self.style.SUCCESS(f'Resumen reconstruido: {filas} grupos'))
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetalleFactura',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_detalle_factura', models.AutoField(primary_key=True, serialize=False)),
+                ('descripcion', models.CharField(max_length=255, verbose_name='Descripción del Ítem')),
+                ('cantidad', models.IntegerField()),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'verbose_name': 'Detalle de Factura',
+                'verbose_name_plural': 'Detalles de Facturas',
+            },
+        ),
+        migrations.CreateModel(
+            name='Factura',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_factura', models.AutoField(primary_key=True, serialize=False)),
+                ('numero_factura', models.CharField(max_length=100, unique=True, verbose_name='Número de Factura')),
+                ('fecha_emision', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('estado_pago', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Pagada', 'Pagada'), ('Anulada', 'Anulada')], default='Pendiente', max_length=20, verbose_name='Estado de Pago')),
+            ],
+            options={
+                'verbose_name': 'Factura',
+                'verbose_name_plural': 'Facturas',
+                'ordering': ['-fecha_emision'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Pago',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_pago', models.AutoField(primary_key=True, serialize=False)),
+                ('metodo_pago', models.CharField(choices=[('Efectivo', 'Efectivo'), ('Tarjeta Débito', 'Tarjeta Débito'), ('Tarjeta Crédito', 'Tarjeta Crédito'), ('Transferencia', 'Transferencia')], max_length=50, verbose_name='Método de Pago')),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fecha_pago', models.DateField()),
+                ('estado_pago', models.CharField(choices=[('Completado', 'Completado'), ('Rechazado', 'Rechazado')], default='Completado', max_length=20, verbose_name='Estado del Pago')),
+            ],
+            options={
+                'verbose_name': 'Pago',
+                'verbose_name_plural': 'Pagos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenFacturacionDiario',
+            fields=[
+                ('id_resumen', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField(verbose_name='Fecha de Emisión')),
+                ('estado_pago', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Pagada', 'Pagada'), ('Anulada', 'Anulada')], max_length=20, verbose_name='Estado de Pago')),
+                ('metodo_pago', models.CharField(blank=True, default='', max_length=50, verbose_name='Método de Pago')),
+                ('cantidad_facturas', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Facturación',
+                'verbose_name_plural': 'Resúmenes Diarios de Facturación',
+            },
+        ),
+        migrations.CreateModel(
+            name='SecuenciaFactura',
+            fields=[
+                ('nombre', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('ultimo_numero', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Facturas',
+                'verbose_name_plural': 'Secuencias de Facturas',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrabajoPDF',
+            fields=[
+                ('id_trabajo', models.AutoField(primary_key=True, serialize=False)),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Procesando', 'Procesando'), ('Completado', 'Completado'), ('Error', 'Error')], default='Pendiente', max_length=20)),
+                ('hash_contenido', models.CharField(max_length=64)),
+                ('archivo', models.CharField(blank=True, default='', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo de PDF',
+                'verbose_name_plural': 'Trabajos de PDF',
+            },
+        ),
+    ]
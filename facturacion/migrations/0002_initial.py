@@ -0,0 +1,117 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('clinica', '0002_initial'),
+        ('facturacion', '0001_initial'),
+        ('usuarios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detallefactura',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='detallesfactura_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='detallefactura',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='detallesfactura_modificados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='cliente',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='facturas', to='usuarios.cliente', verbose_name='Cliente'),
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='consulta',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='factura_generada', to='clinica.consulta', verbose_name='Consulta Asociada'),
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='facturas_creadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='facturas_modificadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='detallefactura',
+            name='factura',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='facturacion.factura'),
+        ),
+        migrations.AddField(
+            model_name='pago',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pagos_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='pago',
+            name='usuario_modificacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pagos_modificados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='pago',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='facturas_pagadas', to='facturacion.pago', verbose_name='Transacción de Pago'),
+        ),
+        migrations.AddField(
+            model_name='resumenfacturaciondiario',
+            name='veterinario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_facturacion', to=settings.AUTH_USER_MODEL, verbose_name='Veterinario'),
+        ),
+        migrations.AddField(
+            model_name='trabajopdf',
+            name='factura',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_pdf', to='facturacion.factura'),
+        ),
+        migrations.AddField(
+            model_name='trabajopdf',
+            name='usuario_creacion',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_pdf_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='detallefactura',
+            unique_together={('factura', 'descripcion')},
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['estado_pago', 'fecha_pago'], name='pago_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['-fecha_emision', '-id_factura'], name='factura_emision_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['estado_pago', 'fecha_emision'], name='factura_estado_emision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['cliente', 'fecha_emision'], name='factura_cliente_emision_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumenfacturaciondiario',
+            unique_together={('fecha', 'estado_pago', 'metodo_pago', 'veterinario')},
+        ),
+        migrations.AddIndex(
+            model_name='trabajopdf',
+            index=models.Index(fields=['estado', 'id_trabajo'], name='trabajo_pdf_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajopdf',
+            index=models.Index(fields=['factura', 'hash_contenido'], name='trabajo_pdf_factura_hash_idx'),
+        ),
+    ]
@@ -30,6 +30,9 @@ class Pago(AuditoriaMixin):
     class Meta:
         verbose_name = "Pago"
         verbose_name_plural = "Pagos"
+        indexes = [
+            models.Index(fields=['estado_pago', 'fecha_pago'], name='pago_estado_fecha_idx'),
+        ]
 
 
 class Factura(AuditoriaMixin):
@@ -79,6 +82,12 @@ class Factura(AuditoriaMixin):
         verbose_name = "Factura"
         verbose_name_plural = "Facturas"
         ordering = ['-fecha_emision']
+        indexes = [
+            models.Index(fields=['-fecha_emision', '-id_factura'], name='factura_emision_id_idx'),
+            # Facturas pendientes/vencidas por fecha y facturas de un cliente
+            models.Index(fields=['estado_pago', 'fecha_emision'], name='factura_estado_emision_idx'),
+            models.Index(fields=['cliente', 'fecha_emision'], name='factura_cliente_emision_idx'),
+        ]
 
 
 class DetalleFactura(AuditoriaMixin):
@@ -97,4 +106,76 @@ class DetalleFactura(AuditoriaMixin):
     class Meta:
         verbose_name = "Detalle de Factura"
         verbose_name_plural = "Detalles de Facturas"
-        unique_together = ('factura', 'descripcion')
\ No newline at end of file
+        unique_together = ('factura', 'descripcion')
+
+class ResumenFacturacionDiario(models.Model):
+    """Totales de facturación precalculados por día, estado, método de pago y veterinario"""
+    id_resumen = models.AutoField(primary_key=True)
+    fecha = models.DateField(verbose_name="Fecha de Emisión")
+    estado_pago = models.CharField(max_length=20, choices=Factura.ESTADO_CHOICES, verbose_name="Estado de Pago")
+    # Cadena vacía cuando la factura aún no tiene un pago asociado
+    metodo_pago = models.CharField(max_length=50, blank=True, default='', verbose_name="Método de Pago")
+    veterinario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='resumenes_facturacion',
+        verbose_name="Veterinario"
+    )
+    cantidad_facturas = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.fecha} - {self.estado_pago} - {self.total}"
+
+    class Meta:
+        verbose_name = "Resumen Diario de Facturación"
+        verbose_name_plural = "Resúmenes Diarios de Facturación"
+        unique_together = ('fecha', 'estado_pago', 'metodo_pago', 'veterinario')
+
+
+class SecuenciaFactura(models.Model):
+    """Contador de numeración de facturas; se reservan bloques con SELECT ... FOR UPDATE"""
+    nombre = models.CharField(max_length=50, primary_key=True)
+    ultimo_numero = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.nombre}: {self.ultimo_numero}"
+
+    class Meta:
+        verbose_name = "Secuencia de Facturas"
+        verbose_name_plural = "Secuencias de Facturas"
+
+
+class TrabajoPDF(models.Model):
+    """Cola de generación de PDFs de facturas (procesada por facturacion.services.documento_service)"""
+    id_trabajo = models.AutoField(primary_key=True)
+    factura = models.ForeignKey(Factura, on_delete=models.CASCADE, related_name='trabajos_pdf')
+
+    ESTADO_CHOICES = [
+        ('Pendiente', 'Pendiente'),
+        ('Procesando', 'Procesando'),
+        ('Completado', 'Completado'),
+        ('Error', 'Error'),
+    ]
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='Pendiente')
+    # Hash del contenido de la factura al encolar: identifica el archivo generado
+    hash_contenido = models.CharField(max_length=64)
+    archivo = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    intentos = models.PositiveSmallIntegerField(default=0)
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    usuario_creacion = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='trabajos_pdf_creados')
+
+    def __str__(self):
+        return f"Trabajo PDF {self.id_trabajo} - {self.factura_id} - {self.estado}"
+
+    class Meta:
+        verbose_name = "Trabajo de PDF"
+        verbose_name_plural = "Trabajos de PDF"
+        indexes = [
+            models.Index(fields=['estado', 'id_trabajo'], name='trabajo_pdf_estado_idx'),
+            models.Index(fields=['factura', 'hash_contenido'], name='trabajo_pdf_factura_hash_idx'),
+        ]
@@ -2,24 +2,42 @@ from rest_framework import serializers
 from .models import Factura
 from clinica.models import Consulta
 
+class FacturaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Factura
+        fields = [
+            'id_factura', 'numero_factura', 'cliente', 'consulta', 'pago',
+            'fecha_emision', 'total', 'estado_pago'
+        ]
+        read_only_fields = ['id_factura']
+
 class FacturaConDetallesSerializer(serializers.ModelSerializer):
+    # Todas las relaciones que se leen aquí deben venir en el select_related de
+    # FacturaViewSet.get_queryset para no generar consultas por factura
     cliente_nombre = serializers.SerializerMethodField()
     mascota_nombre = serializers.SerializerMethodField()
     consulta_motivo = serializers.SerializerMethodField()
     veterinario_nombre = serializers.SerializerMethodField()
+    metodo_pago = serializers.SerializerMethodField()
+    fecha_pago = serializers.SerializerMethodField()
 
     class Meta:
         model = Factura
         fields = [
-            'id', 'numero_factura', 'cliente_id', 'consulta_id', 
-            'fecha_emision', 'fecha_vencimiento', 'fecha_pago',
-            'subtotal', 'iva', 'total', 'estado', 'metodo_pago',
-            'observaciones', 'cliente_nombre', 'mascota_nombre',
-            'consulta_motivo', 'veterinario_nombre'
+            'id_factura', 'numero_factura', 'cliente_id', 'consulta_id', 'pago_id',
+            'fecha_emision', 'fecha_pago', 'total', 'estado_pago', 'metodo_pago',
+            'cliente_nombre', 'mascota_nombre', 'consulta_motivo', 'veterinario_nombre'
         ]
 
     def get_cliente_nombre(self, obj):
-        return f"{obj.cliente.nombre} {obj.cliente.apellido}"
+        usuario = obj.cliente.persona.usuario
+        return usuario.get_full_name() if usuario else str(obj.cliente.persona)
+
+    def get_metodo_pago(self, obj):
+        return obj.pago.metodo_pago if obj.pago else None
+
+    def get_fecha_pago(self, obj):
+        return obj.pago.fecha_pago if obj.pago else None
 
     def get_mascota_nombre(self, obj):
         return obj.consulta.mascota.nombre if obj.consulta else 'N/A'
@@ -0,0 +1 @@
+from .factura_service import FacturaService
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from ..models import Factura, DetalleFactura, TrabajoPDF
+from .pdf_service import generar_pdf
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'FACTURAS_PDF_WORKERS', 2),
+                thread_name_prefix='facturas-pdf'
+            )
+        return _pool
+
+
+class DocumentoFacturaService:
+    """Generación de PDFs de facturas en segundo plano con caché en disco.
+
+    Los trabajos se guardan en TrabajoPDF (la base de datos hace de cola, sin broker)
+    y los procesa un pool de hilos local o el comando procesar_pdfs_facturas. Cada
+    archivo se nombra con el número de factura y el hash de su contenido: pedir de
+    nuevo una factura que no cambió devuelve el archivo existente sin renderizar.
+    """
+
+    # Cambiarla invalida todos los archivos generados con el formato anterior
+    VERSION_FORMATO = 1
+    MAX_INTENTOS = 3
+    # Un trabajo en proceso más tiempo que esto se considera abandonado (worker caído)
+    SEGUNDOS_ABANDONO = 300
+    SEGUNDOS_ENTRE_REINTENTOS = 2
+
+    @property
+    def directorio(self):
+        return Path(getattr(settings, 'FACTURAS_PDF_DIR', settings.BASE_DIR / 'media' / 'facturas'))
+
+    def cargar(self, factura_id):
+        """Factura con todo lo que se imprime y sus detalles: dos consultas"""
+        factura = Factura.objects.select_related(
+            'cliente__persona__usuario', 'consulta__mascota', 'consulta__veterinario', 'pago'
+        ).get(pk=factura_id)
+        detalles = list(DetalleFactura.objects.filter(factura_id=factura_id).order_by('pk'))
+        return factura, detalles
+
+    def lineas(self, factura, detalles):
+        """Texto de la factura, una línea por renglón del PDF"""
+        usuario = factura.cliente.persona.usuario
+        consulta = factura.consulta
+        lineas = [
+            f"FACTURA {factura.numero_factura}",
+            '',
+            f"Fecha de emisión: {factura.fecha_emision:%d/%m/%Y}",
+            f"Cliente: {usuario.get_full_name() if usuario else factura.cliente}",
+            f"Mascota: {consulta.mascota.nombre}",
+            f"Veterinario: {consulta.veterinario.nombre} {consulta.veterinario.apellido}",
+            f"Motivo: {consulta.motivo}",
+            '',
+            f"{'Descripción':<50}{'Cant.':>6}{'P. Unit.':>12}{'Subtotal':>12}",
+        ]
+        for detalle in detalles:
+            lineas.append(
+                f"{detalle.descripcion[:50]:<50}{detalle.cantidad:>6}"
+                f"{detalle.precio_unitario:>12}{detalle.subtotal:>12}"
+            )
+        lineas += [
+            '',
+            f"{'TOTAL':<68}{factura.total:>12}",
+            f"Estado: {factura.estado_pago}",
+        ]
+        if factura.pago:
+            lineas.append(f"Pago: {factura.pago.metodo_pago} el {factura.pago.fecha_pago:%d/%m/%Y}")
+        return lineas
+
+    def hash_contenido(self, lineas):
+        texto = '\n'.join([str(self.VERSION_FORMATO)] + lineas)
+        return hashlib.sha256(texto.encode()).hexdigest()
+
+    def ruta(self, numero_factura, hash_contenido):
+        nombre = re.sub(r'[^A-Za-z0-9_-]', '_', numero_factura)
+        return self.directorio / f"{nombre}-{hash_contenido[:16]}.pdf"
+
+    def encolar(self, factura_id, usuario=None):
+        """Devuelve el trabajo del PDF actual de la factura, creándolo si hace falta"""
+        factura, detalles = self.cargar(factura_id)
+        hash_contenido = self.hash_contenido(self.lineas(factura, detalles))
+        ruta = self.ruta(factura.numero_factura, hash_contenido)
+
+        existente = TrabajoPDF.objects.filter(
+            factura_id=factura_id,
+            hash_contenido=hash_contenido,
+            estado__in=['Pendiente', 'Procesando', 'Completado']
+        ).order_by('-id_trabajo').first()
+        if existente and existente.estado != 'Completado':
+            # Puede haber quedado pendiente tras un fallo o un reinicio: se vuelve a lanzar
+            transaction.on_commit(self.lanzar)
+            return existente
+        if existente and ruta.exists():
+            return existente
+
+        if ruta.exists():
+            # Archivo ya generado (p. ej. por otro trabajo): se registra sin renderizar
+            return TrabajoPDF.objects.create(
+                factura_id=factura_id, hash_contenido=hash_contenido, estado='Completado',
+                archivo=ruta.name, fecha_fin=timezone.now(), usuario_creacion=usuario
+            )
+
+        trabajo = TrabajoPDF.objects.create(
+            factura_id=factura_id, hash_contenido=hash_contenido, usuario_creacion=usuario
+        )
+        transaction.on_commit(self.lanzar)
+        return trabajo
+
+    def archivo_actual(self, factura_id):
+        """Ruta del PDF vigente de la factura, o None si aún no se generó"""
+        factura, detalles = self.cargar(factura_id)
+        ruta = self.ruta(factura.numero_factura, self.hash_contenido(self.lineas(factura, detalles)))
+        return ruta if ruta.exists() else None
+
+    def _tomar(self, trabajo_id):
+        """Marca el trabajo como en proceso; falla si otro worker lo tomó antes"""
+        return TrabajoPDF.objects.filter(pk=trabajo_id, estado='Pendiente').update(
+            estado='Procesando', fecha_inicio=timezone.now(), intentos=F('intentos') + 1
+        ) == 1
+
+    def procesar(self, trabajo_id):
+        """Renderiza un trabajo pendiente; devuelve False si ya lo tomó otro worker"""
+        if not self._tomar(trabajo_id):
+            return False
+        trabajo = TrabajoPDF.objects.get(pk=trabajo_id)
+        try:
+            factura, detalles = self.cargar(trabajo.factura_id)
+            lineas = self.lineas(factura, detalles)
+            # La factura pudo cambiar desde que se encoló: el archivo refleja el contenido actual
+            trabajo.hash_contenido = self.hash_contenido(lineas)
+            ruta = self.ruta(factura.numero_factura, trabajo.hash_contenido)
+            if not ruta.exists():
+                ruta.parent.mkdir(parents=True, exist_ok=True)
+                temporal = ruta.with_suffix(f'.{trabajo_id}.tmp')
+                temporal.write_bytes(generar_pdf(lineas, titulo=f"Factura {factura.numero_factura}"))
+                os.replace(temporal, ruta)
+            trabajo.estado = 'Completado'
+            trabajo.archivo = ruta.name
+            trabajo.error = ''
+        except Exception as e:
+            trabajo.estado = 'Error' if trabajo.intentos >= self.MAX_INTENTOS else 'Pendiente'
+            trabajo.error = str(e)
+        trabajo.fecha_fin = timezone.now()
+        trabajo.save(update_fields=['estado', 'hash_contenido', 'archivo', 'error', 'fecha_fin'])
+        return trabajo.estado == 'Completado'
+
+    def liberar_abandonados(self):
+        """Devuelve a la cola los trabajos de workers que murieron a mitad de proceso"""
+        limite = timezone.now() - timedelta(seconds=self.SEGUNDOS_ABANDONO)
+        return TrabajoPDF.objects.filter(estado='Procesando', fecha_inicio__lt=limite).update(estado='Pendiente')
+
+    def procesar_pendientes(self, limite=None):
+        """Procesa la cola hasta vaciarla (o hasta `limite` trabajos); devuelve cuántos completó.
+
+        Un trabajo que falla vuelve a Pendiente: tras cada pasada por la cola se hace
+        otra, después de SEGUNDOS_ENTRE_REINTENTOS, mientras alguno haya vuelto.
+        """
+        self.liberar_abandonados()
+        completados = procesados = 0
+        while True:
+            reintentar = False
+            ultimo = 0
+            while limite is None or procesados < limite:
+                siguiente = TrabajoPDF.objects.filter(
+                    estado='Pendiente', id_trabajo__gt=ultimo
+                ).order_by('id_trabajo').values_list('id_trabajo', flat=True).first()
+                if siguiente is None:
+                    break
+                ultimo = siguiente
+                if self.procesar(siguiente):
+                    completados += 1
+                else:
+                    reintentar = reintentar or TrabajoPDF.objects.filter(pk=siguiente, estado='Pendiente').exists()
+                procesados += 1
+            if not reintentar or (limite is not None and procesados >= limite):
+                return completados
+            time.sleep(self.SEGUNDOS_ENTRE_REINTENTOS)
+
+    def _drenar(self):
+        try:
+            self.procesar_pendientes()
+        finally:
+            # Las conexiones son por hilo: se cierran al terminar para no dejarlas abiertas
+            connections.close_all()
+
+    def lanzar(self):
+        """Procesa la cola en el pool local (desactivado con FACTURAS_PDF_WORKERS = 0)"""
+        if getattr(settings, 'FACTURAS_PDF_WORKERS', 2) > 0:
+            _obtener_pool().submit(self._drenar)
+
+    @staticmethod
+    def informacion(trabajo):
+        return {
+            'id_trabajo': trabajo.id_trabajo,
+            'factura': trabajo.factura_id,
+            'estado': trabajo.estado,
+            'intentos': trabajo.intentos,
+            'error': trabajo.error or None,
+            'fecha_creacion': trabajo.fecha_creacion,
+            'fecha_fin': trabajo.fecha_fin,
+        }
@@ -1,23 +1,75 @@
+from django.db import transaction
 from django.db.models import Sum, Count, Q
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
 from django.utils import timezone
 from datetime import datetime, timedelta
-import random
-from ..models import Factura, Consulta
+from decimal import Decimal
+from ..models import Factura, Consulta, ResumenFacturacionDiario, DetalleFactura, Pago, SecuenciaFactura
 
 class FacturaService:
     IVA_PORCENTAJE = 0.13
+    # tipo -> (modelo, campo de fecha, campo de estado, columnas (campo, título))
+    EXPORTACIONES = {
+        'facturas': (Factura, 'fecha_emision', 'estado_pago', [
+            ('numero_factura', 'Número'),
+            ('fecha_emision', 'Fecha de Emisión'),
+            ('cliente__persona__usuario__nombre', 'Nombre Cliente'),
+            ('cliente__persona__usuario__apellido', 'Apellido Cliente'),
+            ('consulta_id', 'Consulta'),
+            ('total', 'Total'),
+            ('estado_pago', 'Estado de Pago'),
+            ('pago__metodo_pago', 'Método de Pago'),
+        ]),
+        'detalles': (DetalleFactura, 'factura__fecha_emision', 'factura__estado_pago', [
+            ('factura__numero_factura', 'Número de Factura'),
+            ('factura__fecha_emision', 'Fecha de Emisión'),
+            ('descripcion', 'Descripción'),
+            ('cantidad', 'Cantidad'),
+            ('precio_unitario', 'Precio Unitario'),
+            ('subtotal', 'Subtotal'),
+        ]),
+        'pagos': (Pago, 'fecha_pago', 'estado_pago', [
+            ('id_pago', 'Pago'),
+            ('fecha_pago', 'Fecha de Pago'),
+            ('metodo_pago', 'Método de Pago'),
+            ('monto', 'Monto'),
+            ('estado_pago', 'Estado del Pago'),
+        ]),
+    }
+    DIAS_VENCIMIENTO = 30
+    AGRUPACIONES = {
+        'dia': TruncDay,
+        'semana': TruncWeek,
+        'mes': TruncMonth,
+    }
+
+    SECUENCIA = 'factura'
+    PREFIJO_NUMERO = 'FACT'
+
+    def reservar_numeros_factura(self, cantidad):
+        """Reserva un bloque de números consecutivos sin colisiones entre procesos.
+
+        Dentro de una transacción mayor la fila de la secuencia queda bloqueada hasta
+        que esta termina: las facturaciones concurrentes se serializan y un rollback
+        devuelve también los números, sin dejar huecos.
+        """
+        with transaction.atomic():
+            SecuenciaFactura.objects.get_or_create(nombre=self.SECUENCIA)
+            secuencia = SecuenciaFactura.objects.select_for_update().get(nombre=self.SECUENCIA)
+            inicio = secuencia.ultimo_numero + 1
+            secuencia.ultimo_numero += cantidad
+            secuencia.save(update_fields=['ultimo_numero'])
+        return [f"{self.PREFIJO_NUMERO}-{numero:08d}" for numero in range(inicio, inicio + cantidad)]
 
     def generar_numero_factura(self):
         """Genera un número de factura único"""
-        timestamp = int(timezone.now().timestamp())
-        random_num = random.randint(1000, 9999)
-        return f"FACT-{timestamp}-{random_num}"
+        return self.reservar_numeros_factura(1)[0]
 
     def calcular_totales(self, costo_base):
         """Calcula subtotal, IVA y total"""
-        subtotal = costo_base
-        iva = round(subtotal * self.IVA_PORCENTAJE, 2)
-        total = round(subtotal + iva, 2)
+        subtotal = Decimal(costo_base)
+        iva = (subtotal * Decimal(str(self.IVA_PORCENTAJE))).quantize(Decimal('0.01'))
+        total = subtotal + iva
         return subtotal, iva, total
 
     def obtener_consultas_para_facturar(self):
@@ -132,47 +184,113 @@ class FacturaService:
         
         return {'puede_anular': True}
 
-    def obtener_estadisticas(self):
-        """Calcula estadísticas de facturación"""
+    def generar_pdf(self, factura, usuario=None):
+        """Encola el PDF de la factura; devuelve el estado del trabajo"""
+        from .documento_service import DocumentoFacturaService
+        documentos = DocumentoFacturaService()
+        return documentos.informacion(documentos.encolar(factura.pk, usuario=usuario))
+
+    def _periodos(self, fecha_desde, fecha_hasta, agrupacion):
+        """Lista los inicios de periodo (día, semana o mes calendario) dentro del rango"""
+        if agrupacion == 'mes':
+            actual = fecha_desde.replace(day=1)
+        elif agrupacion == 'semana':
+            actual = fecha_desde - timedelta(days=fecha_desde.weekday())
+        else:
+            actual = fecha_desde
+        
+        periodos = []
+        while actual <= fecha_hasta:
+            periodos.append(actual)
+            if agrupacion == 'mes':
+                actual = (actual.replace(day=28) + timedelta(days=4)).replace(day=1)
+            elif agrupacion == 'semana':
+                actual += timedelta(days=7)
+            else:
+                actual += timedelta(days=1)
+        return periodos
+
+    def obtener_estadisticas(self, fecha_desde=None, fecha_hasta=None, agrupacion='mes'):
+        """Calcula estadísticas de facturación desde el resumen diario: totales y serie por periodo"""
+        if agrupacion not in self.AGRUPACIONES:
+            raise ValueError(f'Agrupación {agrupacion} no permitida')
+        
         hoy = timezone.now().date()
-        inicio_mes = hoy.replace(day=1)
-        
-        # Totales por estado
-        total_facturado = Factura.objects.aggregate(
-            total=Sum('total')
-        )['total'] or 0
-        
-        total_pagado = Factura.objects.filter(estado='Pagada').aggregate(
-            total=Sum('total')
-        )['total'] or 0
-        
-        total_pendiente = Factura.objects.filter(estado='Pendiente').aggregate(
-            total=Sum('total')
-        )['total'] or 0
-        
-        facturas_vencidas = Factura.objects.filter(
-            estado='Pendiente',
-            fecha_vencimiento__lt=hoy
-        ).count()
-        
-        # Facturas por mes (últimos 6 meses)
-        facturas_por_mes = []
-        for i in range(6):
-            mes = hoy.replace(day=1) - timedelta(days=30*i)
-            total_mes = Factura.objects.filter(
-                fecha_emision__year=mes.year,
-                fecha_emision__month=mes.month
-            ).aggregate(total=Sum('total'))['total'] or 0
-            
-            facturas_por_mes.append({
-                'mes': mes.strftime('%Y-%m'),
-                'total': float(total_mes)
+        
+        # Se lee del resumen diario precalculado en lugar de recorrer Factura
+        resumen = ResumenFacturacionDiario.objects.all()
+        if fecha_desde:
+            resumen = resumen.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            resumen = resumen.filter(fecha__lte=fecha_hasta)
+        
+        # Totales por estado en una sola consulta (agregación condicional)
+        totales = resumen.aggregate(
+            total_facturado=Sum('total'),
+            total_pagado=Sum('total', filter=Q(estado_pago='Pagada')),
+            total_pendiente=Sum('total', filter=Q(estado_pago='Pendiente')),
+            facturas_vencidas=Sum('cantidad_facturas', filter=Q(
+                estado_pago='Pendiente',
+                fecha__lt=hoy - timedelta(days=self.DIAS_VENCIMIENTO)
+            )),
+        )
+        
+        # Serie por periodo: por defecto los últimos 6 meses calendario
+        serie_hasta = fecha_hasta or hoy
+        serie_desde = fecha_desde
+        if not serie_desde:
+            serie_desde = serie_hasta.replace(day=1)
+            for _ in range(5):
+                serie_desde = (serie_desde - timedelta(days=1)).replace(day=1)
+        
+        truncar = self.AGRUPACIONES[agrupacion]
+        filas = ResumenFacturacionDiario.objects.filter(
+            fecha__range=(serie_desde, serie_hasta)
+        ).annotate(
+            periodo=truncar('fecha')
+        ).values('periodo').annotate(
+            total=Sum('total'),
+            cantidad=Sum('cantidad_facturas')
+        ).order_by()
+        por_periodo = {fila['periodo']: fila for fila in filas}
+        
+        formato = '%Y-%m' if agrupacion == 'mes' else '%Y-%m-%d'
+        facturas_por_periodo = []
+        for periodo in reversed(self._periodos(serie_desde, serie_hasta, agrupacion)):
+            fila = por_periodo.get(periodo, {})
+            facturas_por_periodo.append({
+                'periodo': periodo.strftime(formato),
+                'total': float(fila.get('total') or 0),
+                'cantidad': fila.get('cantidad') or 0
             })
         
-        return {
-            'total_facturado': float(total_facturado),
-            'total_pagado': float(total_pagado),
-            'total_pendiente': float(total_pendiente),
-            'facturas_vencidas': facturas_vencidas,
-            'facturas_por_mes': facturas_por_mes
-        }
\ No newline at end of file
+        estadisticas = {
+            'total_facturado': float(totales['total_facturado'] or 0),
+            'total_pagado': float(totales['total_pagado'] or 0),
+            'total_pendiente': float(totales['total_pendiente'] or 0),
+            'facturas_vencidas': totales['facturas_vencidas'] or 0,
+            'agrupacion': agrupacion,
+            'facturas_por_periodo': facturas_por_periodo
+        }
+        if agrupacion == 'mes':
+            # Formato anterior, usado por el dashboard
+            estadisticas['facturas_por_mes'] = [
+                {'mes': p['periodo'], 'total': p['total']} for p in facturas_por_periodo
+            ]
+        return estadisticas
+
+    def obtener_exportacion(self, tipo, fecha_desde=None, fecha_hasta=None, estado=None):
+        """Devuelve el queryset filtrado y las columnas de una exportación"""
+        if tipo not in self.EXPORTACIONES:
+            raise ValueError(f'Tipo de exportación {tipo} no permitido')
+        
+        modelo, campo_fecha, campo_estado, columnas = self.EXPORTACIONES[tipo]
+        queryset = modelo.objects.all()
+        if fecha_desde:
+            queryset = queryset.filter(**{f'{campo_fecha}__gte': fecha_desde})
+        if fecha_hasta:
+            queryset = queryset.filter(**{f'{campo_fecha}__lte': fecha_hasta})
+        if estado:
+            queryset = queryset.filter(**{campo_estado: estado})
+        
+        return queryset, columnas
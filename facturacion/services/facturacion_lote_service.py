@@ -0,0 +1,163 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from clinica.models import Consulta, ConsultaTratamiento
+from ..models import Factura, DetalleFactura
+from .factura_service import FacturaService
+from .resumen_service import ResumenFacturacionService
+
+
+class FacturacionLoteService:
+    """Facturación en lote de las consultas sin factura (cierre del día).
+
+    Las consultas se recorren por lotes de clave primaria; cada lote es una
+    transacción con dos bulk_create (facturas y detalles) en lugar de dos INSERT
+    por factura y uno por detalle.
+    """
+
+    TAMANO_LOTE = 200
+    DESCRIPCION_CONSULTA = 'Consulta médica'
+
+    def __init__(self, tamano_lote=None, usuario=None):
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE
+        self.usuario = usuario
+        self.factura_service = FacturaService()
+        self.resumen_service = ResumenFacturacionService()
+
+    def consultas_pendientes(self, fecha_desde=None, fecha_hasta=None, veterinario_id=None):
+        """Consultas activas que todavía no tienen factura"""
+        consultas = Consulta.objects.filter(estado=True, factura_generada__isnull=True)
+        if fecha_desde:
+            consultas = consultas.filter(fecha_consulta__gte=fecha_desde)
+        if fecha_hasta:
+            consultas = consultas.filter(fecha_consulta__lte=fecha_hasta)
+        if veterinario_id:
+            consultas = consultas.filter(veterinario_id=veterinario_id)
+        return consultas
+
+    def _detalles(self, consultas):
+        """Líneas de detalle por consulta a partir de ConsultaTratamiento, con una sola consulta"""
+        lineas = defaultdict(dict)
+        tratamientos = ConsultaTratamiento.objects.filter(
+            consulta__in=consultas, estado=True
+        ).values_list(
+            'consulta_id', 'tratamiento_id', 'tratamiento__nombre', 'cantidad', 'costo_unitario'
+        ).order_by('pk')
+
+        for consulta_id, tratamiento_id, nombre, cantidad, costo_unitario in tratamientos:
+            # DetalleFactura es único por (factura, descripción): dos tratamientos
+            # homónimos se distinguen por su id
+            descripcion = nombre if nombre not in lineas[consulta_id] else f"{nombre} ({tratamiento_id})"
+            lineas[consulta_id][descripcion] = {
+                'descripcion': descripcion[:255],
+                'cantidad': cantidad,
+                'precio_unitario': costo_unitario,
+                'subtotal': costo_unitario * cantidad,
+            }
+
+        resultado = {}
+        for consulta in consultas:
+            detalles = list(lineas[consulta.id_consulta].values())
+            # El costo de la consulta incluye los tratamientos; lo que excede a las
+            # líneas se factura como honorarios de la consulta
+            suma = sum((d['subtotal'] for d in detalles), Decimal('0'))
+            if consulta.costo > suma or not detalles:
+                honorarios = consulta.costo - suma
+                detalles.insert(0, {
+                    'descripcion': self.DESCRIPCION_CONSULTA,
+                    'cantidad': 1,
+                    'precio_unitario': honorarios,
+                    'subtotal': honorarios,
+                })
+            resultado[consulta.id_consulta] = detalles
+        return resultado
+
+    def _preparar(self, consultas):
+        """Calcula facturas y detalles de un lote sin escribir nada"""
+        detalles = self._detalles(consultas)
+        preparadas = []
+        for consulta in consultas:
+            lineas = detalles[consulta.id_consulta]
+            subtotal, iva, total = self.factura_service.calcular_totales(
+                sum((d['subtotal'] for d in lineas), Decimal('0'))
+            )
+            preparadas.append({
+                'consulta': consulta,
+                'subtotal': subtotal,
+                'iva': iva,
+                'total': total,
+                'detalles': lineas,
+            })
+        return preparadas
+
+    def _crear(self, preparadas, fecha_emision):
+        """Inserta las facturas y sus detalles del lote; devuelve los números asignados"""
+        numeros = self.factura_service.reservar_numeros_factura(len(preparadas))
+        Factura.objects.bulk_create([
+            Factura(
+                numero_factura=numero,
+                cliente_id=item['consulta'].mascota.dueño_id,
+                consulta=item['consulta'],
+                fecha_emision=fecha_emision,
+                total=item['total'],
+                usuario_creacion=self.usuario,
+            )
+            for numero, item in zip(numeros, preparadas)
+        ])
+
+        # bulk_create no devuelve las claves en MySQL: se resuelven por número de factura
+        ids = dict(Factura.objects.filter(numero_factura__in=numeros).values_list('numero_factura', 'id_factura'))
+        DetalleFactura.objects.bulk_create([
+            DetalleFactura(factura_id=ids[numero], usuario_creacion=self.usuario, **detalle)
+            for numero, item in zip(numeros, preparadas)
+            for detalle in item['detalles']
+        ])
+
+        # bulk_create no emite post_save: el resumen diario se actualiza aquí
+        self.resumen_service.recalcular_al_confirmar(
+            self.resumen_service.claves(Factura.objects.filter(id_factura__in=ids.values()))
+        )
+        return numeros
+
+    def facturar(self, fecha_desde=None, fecha_hasta=None, veterinario_id=None,
+                 simulacion=False, fecha_emision=None):
+        """Factura todas las consultas pendientes del filtro.
+
+        Con simulacion=True solo calcula lo que se facturaría. Devuelve un resumen con
+        la cantidad de facturas, el total y los números asignados (o las consultas que
+        se facturarían, en simulación).
+        """
+        fecha_emision = fecha_emision or timezone.now().date()
+        pendientes = self.consultas_pendientes(fecha_desde, fecha_hasta, veterinario_id)
+
+        resumen = {
+            'simulacion': simulacion,
+            'cantidad_facturas': 0,
+            'total': Decimal('0'),
+            'facturas': [],
+        }
+        ultimo = 0
+        while True:
+            with transaction.atomic():
+                lote = pendientes.filter(id_consulta__gt=ultimo).order_by('id_consulta')
+                if not simulacion:
+                    # Bloquea el lote: otra facturación concurrente espera y luego ya no lo ve pendiente
+                    lote = lote.select_for_update(of=('self',))
+                lote = list(lote.select_related('mascota')[:self.tamano_lote])
+                if not lote:
+                    break
+                ultimo = lote[-1].id_consulta
+
+                preparadas = self._preparar(lote)
+                if simulacion:
+                    resumen['facturas'] += [
+                        {'consulta': item['consulta'].id_consulta, 'total': item['total']}
+                        for item in preparadas
+                    ]
+                else:
+                    resumen['facturas'] += self._crear(preparadas, fecha_emision)
+                resumen['cantidad_facturas'] += len(preparadas)
+                resumen['total'] += sum((item['total'] for item in preparadas), Decimal('0'))
+
+        return resumen
@@ -0,0 +1,82 @@
+"""
+Escritor PDF mínimo (texto en Helvetica, varias páginas A4) sin dependencias externas.
+
+Alcanza para documentos de texto tabulado como facturas y recetas; la fuente es
+una de las 14 estándar del formato, así que no se incrusta nada en el archivo.
+"""
+
+ANCHO_PAGINA = 595
+ALTO_PAGINA = 842
+MARGEN = 50
+TAMANO_FUENTE = 10
+INTERLINEADO = 14
+LINEAS_POR_PAGINA = (ALTO_PAGINA - 2 * MARGEN) // INTERLINEADO
+# Elemento de `lineas` que fuerza el comienzo de una página nueva
+SALTO_PAGINA = '\f'
+
+
+def _escapar(texto):
+    # WinAnsiEncoding coincide con cp1252 (tildes, ñ, €); lo demás se reemplaza por '?'
+    datos = texto.encode('cp1252', errors='replace')
+    return datos.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _contenido_pagina(lineas):
+    partes = [b'BT', f'/F1 {TAMANO_FUENTE} Tf {INTERLINEADO} TL'.encode(),
+              f'{MARGEN} {ALTO_PAGINA - MARGEN} Td'.encode()]
+    for linea in lineas:
+        partes.append(b'(' + _escapar(linea) + b") '")
+    partes.append(b'ET')
+    return b'\n'.join(partes)
+
+
+def _paginar(lineas):
+    paginas = [[]]
+    for linea in lineas:
+        if linea == SALTO_PAGINA:
+            paginas.append([])
+            continue
+        if len(paginas[-1]) == LINEAS_POR_PAGINA:
+            paginas.append([])
+        paginas[-1].append(linea)
+    return paginas
+
+
+def generar_pdf(lineas, titulo=''):
+    """Devuelve los bytes de un PDF con una línea de texto por elemento de `lineas`"""
+    paginas = _paginar(lineas)
+
+    # Objetos: 1 catálogo, 2 árbol de páginas, 3 fuente, 4 info; luego página y contenido
+    objetos = {}
+    ids_paginas = []
+    for indice, lineas_pagina in enumerate(paginas):
+        id_pagina, id_contenido = 5 + 2 * indice, 6 + 2 * indice
+        ids_paginas.append(id_pagina)
+        contenido = _contenido_pagina(lineas_pagina)
+        objetos[id_pagina] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ANCHO_PAGINA} {ALTO_PAGINA}] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {id_contenido} 0 R >>'
+        ).encode()
+        objetos[id_contenido] = (
+            f'<< /Length {len(contenido)} >>\nstream\n'.encode() + contenido + b'\nendstream'
+        )
+    objetos[1] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objetos[2] = (
+        f'<< /Type /Pages /Kids [{" ".join(f"{i} 0 R" for i in ids_paginas)}] /Count {len(ids_paginas)} >>'
+    ).encode()
+    objetos[3] = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'
+    objetos[4] = b'<< /Title (' + _escapar(titulo) + b') /Producer (GestionVeterinaria) >>'
+
+    salida = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    posiciones = {}
+    for numero in sorted(objetos):
+        posiciones[numero] = len(salida)
+        salida += f'{numero} 0 obj\n'.encode() + objetos[numero] + b'\nendobj\n'
+
+    inicio_xref = len(salida)
+    total = max(objetos) + 1
+    salida += f'xref\n0 {total}\n0000000000 65535 f \n'.encode()
+    for numero in range(1, total):
+        salida += f'{posiciones[numero]:010d} 00000 n \n'.encode()
+    salida += f'trailer\n<< /Size {total} /Root 1 0 R /Info 4 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n'.encode()
+    return bytes(salida)
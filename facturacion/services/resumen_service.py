@@ -0,0 +1,103 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count, Value
+from django.db.models.functions import Coalesce
+from ..models import Factura, ResumenFacturacionDiario
+
+
+class ResumenFacturacionService:
+    """Mantiene la tabla ResumenFacturacionDiario a partir de Factura y Pago"""
+
+    CAMPOS_CLAVE = ('fecha_emision', 'estado_pago', 'metodo', 'consulta__veterinario_id')
+
+    def _facturas_con_clave(self, facturas):
+        return facturas.annotate(
+            metodo=Coalesce('pago__metodo_pago', Value(''))
+        )
+
+    def claves(self, facturas):
+        """Obtiene las claves (fecha, estado, método, veterinario) de un queryset de facturas"""
+        return set(self._facturas_con_clave(facturas).values_list(*self.CAMPOS_CLAVE))
+
+    def recalcular(self, claves):
+        """Recalcula solo los grupos afectados por un cambio"""
+        for fecha, estado_pago, metodo_pago, veterinario_id in claves:
+            filtro = {
+                'fecha_emision': fecha,
+                'estado_pago': estado_pago,
+                'consulta__veterinario_id': veterinario_id,
+            }
+            if metodo_pago:
+                filtro['pago__metodo_pago'] = metodo_pago
+            else:
+                filtro['pago__isnull'] = True
+            clave = {
+                'fecha': fecha,
+                'estado_pago': estado_pago,
+                'metodo_pago': metodo_pago,
+                'veterinario_id': veterinario_id,
+            }
+
+            with transaction.atomic():
+                # Con la fila bloqueada, un recálculo concurrente del mismo grupo espera y
+                # luego agrega con los datos ya confirmados: no pisa el total con uno viejo
+                self._bloquear(clave)
+                agregado = Factura.objects.filter(**filtro).aggregate(
+                    cantidad=Count('id_factura'),
+                    total=Sum('total')
+                )
+                if agregado['cantidad']:
+                    ResumenFacturacionDiario.objects.filter(**clave).update(
+                        cantidad_facturas=agregado['cantidad'],
+                        total=agregado['total'] or Decimal('0'),
+                    )
+                else:
+                    ResumenFacturacionDiario.objects.filter(**clave).delete()
+
+    def _bloquear(self, clave):
+        """Bloquea la fila del grupo; si no existe la crea vacía, que también la bloquea"""
+        if ResumenFacturacionDiario.objects.select_for_update().filter(**clave).first():
+            return
+        try:
+            with transaction.atomic():
+                ResumenFacturacionDiario.objects.create(**clave)
+        except IntegrityError:
+            # Otro proceso la creó primero: se espera a su bloqueo
+            ResumenFacturacionDiario.objects.select_for_update().filter(**clave).first()
+
+    def recalcular_al_confirmar(self, claves):
+        """Programa el recálculo para cuando la transacción actual se confirme"""
+        if claves:
+            transaction.on_commit(lambda: self.recalcular(claves))
+
+    @transaction.atomic
+    def reconstruir(self, fecha_desde=None, fecha_hasta=None, tamano_lote=1000):
+        """Reconstruye el resumen completo (o un rango de fechas) con un único GROUP BY"""
+        facturas = Factura.objects.all()
+        resumen = ResumenFacturacionDiario.objects.all()
+        if fecha_desde:
+            facturas = facturas.filter(fecha_emision__gte=fecha_desde)
+            resumen = resumen.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            facturas = facturas.filter(fecha_emision__lte=fecha_hasta)
+            resumen = resumen.filter(fecha__lte=fecha_hasta)
+
+        resumen.delete()
+        grupos = self._facturas_con_clave(facturas).values(*self.CAMPOS_CLAVE).annotate(
+            cantidad=Count('id_factura'),
+            suma=Sum('total')
+        ).order_by()
+
+        filas = [
+            ResumenFacturacionDiario(
+                fecha=grupo['fecha_emision'],
+                estado_pago=grupo['estado_pago'],
+                metodo_pago=grupo['metodo'],
+                veterinario_id=grupo['consulta__veterinario_id'],
+                cantidad_facturas=grupo['cantidad'],
+                total=grupo['suma'] or Decimal('0'),
+            )
+            for grupo in grupos
+        ]
+        ResumenFacturacionDiario.objects.bulk_create(filas, batch_size=tamano_lote)
+        return len(filas)
@@ -0,0 +1,78 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from clinica.models import Consulta
+from .models import Factura, Pago
+from .services.resumen_service import ResumenFacturacionService
+
+resumen_service = ResumenFacturacionService()
+
+
+@receiver(pre_save, sender=Factura)
+def guardar_clave_previa_factura(sender, instance, **kwargs):
+    """Recuerda el grupo del resumen al que pertenecía la factura antes del cambio"""
+    instance._claves_resumen = (
+        resumen_service.claves(Factura.objects.filter(pk=instance.pk)) if instance.pk else set()
+    )
+
+
+@receiver(post_save, sender=Factura)
+def actualizar_resumen_factura(sender, instance, **kwargs):
+    claves = getattr(instance, '_claves_resumen', set())
+    claves |= resumen_service.claves(Factura.objects.filter(pk=instance.pk))
+    resumen_service.recalcular_al_confirmar(claves)
+
+
+@receiver(pre_delete, sender=Factura)
+def guardar_clave_factura_eliminada(sender, instance, **kwargs):
+    instance._claves_resumen = resumen_service.claves(Factura.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Factura)
+def actualizar_resumen_factura_eliminada(sender, instance, **kwargs):
+    resumen_service.recalcular_al_confirmar(getattr(instance, '_claves_resumen', set()))
+
+
+@receiver(pre_save, sender=Pago)
+def guardar_claves_previas_pago(sender, instance, **kwargs):
+    """Un cambio de método de pago mueve todas sus facturas de grupo"""
+    instance._claves_resumen = (
+        resumen_service.claves(Factura.objects.filter(pago_id=instance.pk)) if instance.pk else set()
+    )
+
+
+@receiver(post_save, sender=Pago)
+def actualizar_resumen_pago(sender, instance, **kwargs):
+    claves = getattr(instance, '_claves_resumen', set())
+    claves |= resumen_service.claves(Factura.objects.filter(pago_id=instance.pk))
+    resumen_service.recalcular_al_confirmar(claves)
+
+
+@receiver(pre_delete, sender=Pago)
+def guardar_claves_pago_eliminado(sender, instance, **kwargs):
+    # Al eliminar el pago sus facturas quedan sin método (SET_NULL sin señales)
+    claves = resumen_service.claves(Factura.objects.filter(pago_id=instance.pk))
+    instance._claves_resumen = claves | {(f, e, '', v) for f, e, _, v in claves}
+
+
+@receiver(post_delete, sender=Pago)
+def actualizar_resumen_pago_eliminado(sender, instance, **kwargs):
+    resumen_service.recalcular_al_confirmar(getattr(instance, '_claves_resumen', set()))
+
+
+@receiver(pre_save, sender=Consulta)
+def guardar_claves_previas_consulta(sender, instance, raw=False, **kwargs):
+    """Cambiar el veterinario de la consulta mueve su factura de grupo"""
+    instance._claves_resumen_facturacion = (
+        resumen_service.claves(Factura.objects.filter(consulta_id=instance.pk))
+        if instance.pk and not raw else set()
+    )
+
+
+@receiver(post_save, sender=Consulta)
+def actualizar_resumen_consulta_facturada(sender, instance, raw=False, **kwargs):
+    claves = getattr(instance, '_claves_resumen_facturacion', set())
+    if raw or not claves:
+        return
+    # Solo importa el veterinario: los demás campos de la clave son de la factura
+    claves |= {(f, e, m, instance.veterinario_id) for f, e, m, _ in claves}
+    resumen_service.recalcular_al_confirmar(claves)
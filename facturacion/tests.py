@@ -1,3 +1,307 @@
+import shutil
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
+from django.db.models import Count, Q, Sum
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from clinica.tests import crear_cliente, crear_consulta, crear_mascota, crear_usuario, prescribir
+from .models import DetalleFactura, Factura, Pago, ResumenFacturacionDiario, SecuenciaFactura, TrabajoPDF
+from .services.resumen_service import ResumenFacturacionService
+from .services.factura_service import FacturaService
+from .services.facturacion_lote_service import FacturacionLoteService
+from .services.documento_service import DocumentoFacturaService
 
-# Create your tests here.
+
+def crear_facturas(cantidad, veterinario=None, cliente=None, inicio=0):
+    """Facturas (la mitad pagadas) de consultas nuevas, una por día hacia atrás"""
+    veterinario = veterinario or crear_usuario(f'vet{inicio}@clinica.com', roles=['Veterinario'])
+    cliente = cliente or crear_cliente(f'dueno{inicio}@correo.com')
+    mascota = crear_mascota(cliente)
+    hoy = timezone.now().date()
+    facturas = []
+    for i in range(inicio, inicio + cantidad):
+        consulta = crear_consulta(mascota, veterinario, '100.00')
+        pago = None
+        if i % 2:
+            pago = Pago.objects.create(metodo_pago='Efectivo', monto='113.00', fecha_pago=hoy)
+        facturas.append(Factura.objects.create(
+            numero_factura=f'FACT-{i:08d}', cliente=cliente, consulta=consulta, pago=pago,
+            fecha_emision=hoy - timedelta(days=i), total='113.00',
+            estado_pago='Pagada' if pago else 'Pendiente'
+        ))
+    return facturas
+
+
+class FacturaConsultasTests(TestCase):
+    """list y retrieve cuestan lo mismo con cualquier cantidad de facturas: la versión
+    condicional (ETag) y una página con todo el grafo del serializer en un JOIN"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('caja@clinica.com', roles=['Recepcionista']))
+
+    def test_list_no_depende_de_la_cantidad_de_facturas(self):
+        crear_facturas(3)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/facturacion/facturas/')
+        self.assertEqual(len(response.data['results']), 3)
+
+        crear_facturas(12, inicio=3)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/facturacion/facturas/')
+        self.assertEqual(len(response.data['results']), 15)
+        self.assertEqual(response.data['results'][1]['metodo_pago'], 'Efectivo')
+
+    def test_retrieve(self):
+        factura = crear_facturas(2)[1]
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/facturacion/facturas/{factura.pk}/')
+        self.assertEqual(response.data['numero_factura'], factura.numero_factura)
+        self.assertEqual(response.data['veterinario_nombre'], 'Ana Pérez')
+
+    def test_no_modificado_no_serializa(self):
+        crear_facturas(3)
+        etag = self.client.get('/api/facturacion/facturas/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/facturacion/facturas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class ExportacionFacturasTests(TestCase):
+    URL = '/api/facturacion/facturas/exportar/'
+
+    def setUp(self):
+        crear_facturas(2)
+        self.client = APIClient()
+
+    def test_solo_administradores(self):
+        self.assertIn(self.client.get(self.URL).status_code, (401, 403))
+
+        self.client.force_authenticate(crear_usuario('caja@clinica.com', roles=['Recepcionista']))
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+
+        self.client.force_authenticate(crear_usuario('admin@clinica.com', roles=['Administrador']))
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), 3)
+
+
+class FacturacionLoteTests(TestCase):
+    URL = '/api/facturacion/facturas/facturar_lote/'
+
+    def setUp(self):
+        # Una consulta ya facturada y dos pendientes, una con tratamiento prescrito
+        self.facturada = crear_facturas(1)[0]
+        veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        mascota = crear_mascota(crear_cliente('dueno@correo.com'))
+        self.con_tratamiento = crear_consulta(mascota, veterinario, '100.00')
+        prescribir(self.con_tratamiento, cantidad=2)
+        self.sin_tratamiento = crear_consulta(mascota, veterinario, '80.00')
+
+    def _detalles(self, consulta):
+        return list(DetalleFactura.objects.filter(factura__consulta=consulta).order_by('pk').values_list(
+            'descripcion', 'cantidad', 'precio_unitario', 'subtotal'
+        ))
+
+    def test_simulacion_no_escribe(self):
+        resultado = FacturacionLoteService().facturar(simulacion=True)
+
+        self.assertEqual(resultado['cantidad_facturas'], 2)
+        self.assertEqual(resultado['total'], Decimal('203.40'))
+        self.assertEqual(
+            [f['consulta'] for f in resultado['facturas']],
+            [self.con_tratamiento.pk, self.sin_tratamiento.pk]
+        )
+        self.assertEqual(Factura.objects.count(), 1)
+        self.assertFalse(DetalleFactura.objects.exists())
+        self.assertFalse(SecuenciaFactura.objects.exists())
+
+    def test_numera_en_secuencia_y_detalla_cada_consulta(self):
+        resultado = FacturacionLoteService().facturar()
+
+        self.assertEqual(resultado['facturas'], ['FACT-00000001', 'FACT-00000002'])
+        self.assertEqual(SecuenciaFactura.objects.get().ultimo_numero, 2)
+        factura = Factura.objects.get(consulta=self.con_tratamiento)
+        self.assertEqual((factura.numero_factura, factura.total), ('FACT-00000001', Decimal('113.00')))
+        self.assertEqual(factura.cliente_id, self.con_tratamiento.mascota.dueño_id)
+        self.assertEqual(self._detalles(self.con_tratamiento), [
+            ('Consulta médica', 1, Decimal('50.00'), Decimal('50.00')),
+            ('Amoxicilina', 2, Decimal('25.00'), Decimal('50.00')),
+        ])
+        self.assertEqual(self._detalles(self.sin_tratamiento), [
+            ('Consulta médica', 1, Decimal('80.00'), Decimal('80.00')),
+        ])
+
+    def test_segunda_corrida_omite_las_facturadas(self):
+        FacturacionLoteService().facturar()
+        self.assertEqual(FacturacionLoteService().facturar()['cantidad_facturas'], 0)
+
+        nueva = crear_consulta(self.con_tratamiento.mascota, self.con_tratamiento.veterinario, '60.00')
+        resultado = FacturacionLoteService().facturar()
+
+        self.assertEqual(resultado['facturas'], ['FACT-00000003'])
+        self.assertEqual(Factura.objects.get(numero_factura='FACT-00000003').consulta, nueva)
+        self.assertEqual(Factura.objects.count(), 4)
+
+    def test_requiere_administrador_o_recepcionista(self):
+        client = APIClient()
+        self.assertIn(client.post(self.URL).status_code, (401, 403))
+
+        client.force_authenticate(self.con_tratamiento.veterinario)
+        self.assertEqual(client.post(self.URL).status_code, 403)
+
+        caja = crear_usuario('caja@clinica.com', roles=['Recepcionista'])
+        client.force_authenticate(caja)
+        self.assertEqual(client.post(self.URL, {'simulacion': 'true'}).status_code, 200)
+        self.assertEqual(client.post(self.URL).status_code, 201)
+        self.assertEqual(
+            set(Factura.objects.exclude(pk=self.facturada.pk).values_list('usuario_creacion', flat=True)), {caja.pk}
+        )
+
+
+class ResumenFacturacionTests(TestCase):
+    def setUp(self):
+        self.veterinarios = [crear_usuario(f'vet{i}@clinica.com', roles=['Veterinario']) for i in range(2)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.facturas = crear_facturas(2, veterinario=self.veterinarios[0])
+
+    def _resumen(self):
+        return sorted(ResumenFacturacionDiario.objects.values_list(
+            'fecha', 'estado_pago', 'metodo_pago', 'veterinario_id', 'cantidad_facturas', 'total'
+        ))
+
+    def _reconstruido(self):
+        ResumenFacturacionService().reconstruir()
+        return self._resumen()
+
+    def test_cambiar_el_veterinario_de_la_consulta_mueve_la_factura(self):
+        consulta = self.facturas[0].consulta
+        with self.captureOnCommitCallbacks(execute=True):
+            consulta.veterinario = self.veterinarios[1]
+            consulta.save()
+
+        resumen = self._resumen()
+        self.assertEqual({fila[3] for fila in resumen}, {v.pk for v in self.veterinarios})
+        self.assertEqual(resumen, self._reconstruido())
+
+    def test_recalcular_un_grupo_sin_fila_la_crea_y_uno_vacio_la_borra(self):
+        ResumenFacturacionDiario.objects.all().delete()
+        claves = ResumenFacturacionService().claves(Factura.objects.all())
+        ResumenFacturacionService().recalcular(claves)
+        esperado = self._resumen()
+
+        Factura.objects.filter(pk=self.facturas[0].pk).update(estado_pago='Anulada')
+        ResumenFacturacionService().recalcular(claves)
+
+        self.assertEqual(len(esperado), 2)
+        self.assertEqual(self._resumen(), [fila for fila in esperado if fila[1] != 'Pendiente'])
+
+
+class EstadisticasFacturacionTests(TestCase):
+    """obtener_estadisticas lee el resumen diario: debe coincidir con agregar Factura directamente"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.facturas = crear_facturas(40) + crear_facturas(5, inicio=100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.facturas[1].pago.metodo_pago = 'Tarjeta'
+            self.facturas[1].pago.save()
+            self.facturas[2].estado_pago = 'Anulada'
+            self.facturas[2].save()
+            self.facturas[3].delete()
+
+    def _directo(self, facturas):
+        vencimiento = timezone.now().date() - timedelta(days=FacturaService.DIAS_VENCIMIENTO)
+        totales = facturas.aggregate(
+            total_facturado=Sum('total'),
+            total_pagado=Sum('total', filter=Q(estado_pago='Pagada')),
+            total_pendiente=Sum('total', filter=Q(estado_pago='Pendiente')),
+            facturas_vencidas=Count('pk', filter=Q(estado_pago='Pendiente', fecha_emision__lt=vencimiento)),
+        )
+        return {clave: float(valor) if isinstance(valor, Decimal) else valor for clave, valor in totales.items()}
+
+    def test_totales_coinciden_con_el_agregado_directo(self):
+        estadisticas = FacturaService().obtener_estadisticas()
+
+        directo = self._directo(Factura.objects.all())
+        self.assertEqual({clave: estadisticas[clave] for clave in directo}, directo)
+        self.assertGreater(directo['facturas_vencidas'], 0)
+
+    def test_serie_diaria_coincide_con_el_agregado_directo(self):
+        hasta = timezone.now().date()
+        desde = hasta - timedelta(days=9)
+
+        estadisticas = FacturaService().obtener_estadisticas(desde, hasta, agrupacion='dia')
+
+        facturas = Factura.objects.filter(fecha_emision__range=(desde, hasta))
+        por_dia = {
+            fila['fecha_emision'].isoformat(): (float(fila['suma']), fila['cantidad'])
+            for fila in facturas.values('fecha_emision').annotate(suma=Sum('total'), cantidad=Count('pk'))
+        }
+        self.assertEqual(
+            {p['periodo']: (p['total'], p['cantidad']) for p in estadisticas['facturas_por_periodo'] if p['cantidad']},
+            por_dia
+        )
+        self.assertEqual(len(estadisticas['facturas_por_periodo']), 10)
+        directo = self._directo(facturas)
+        self.assertEqual({clave: estadisticas[clave] for clave in directo}, directo)
+
+
+class FacturaPDFTests(TestCase):
+    def setUp(self):
+        shutil.rmtree(settings.FACTURAS_PDF_DIR, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, settings.FACTURAS_PDF_DIR, True)
+        self.factura = crear_facturas(1)[0]
+        self.url = f'/api/facturacion/facturas/{self.factura.pk}/'
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('caja@clinica.com', roles=['Recepcionista']))
+
+    def test_generar_pdf_requiere_autenticacion(self):
+        self.assertIn(APIClient().post(f'{self.url}generar_pdf/').status_code, (401, 403))
+        self.assertFalse(TrabajoPDF.objects.exists())
+
+    def test_un_fallo_se_reintenta_en_el_mismo_drenado(self):
+        trabajo = DocumentoFacturaService().encolar(self.factura.pk)
+        renderizar = mock.Mock(side_effect=[OSError('disco lleno'), b'%PDF-1.4'])
+        with mock.patch('facturacion.services.documento_service.generar_pdf', renderizar), \
+                mock.patch.object(DocumentoFacturaService, 'SEGUNDOS_ENTRE_REINTENTOS', 0):
+            self.assertEqual(DocumentoFacturaService().procesar_pendientes(), 1)
+
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.intentos, trabajo.error), ('Completado', 2, ''))
+
+    def test_volver_a_pedir_un_trabajo_pendiente_lo_relanza(self):
+        trabajo = DocumentoFacturaService().encolar(self.factura.pk)
+        with mock.patch.object(DocumentoFacturaService, 'lanzar') as lanzar:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'{self.url}generar_pdf/')
+
+        self.assertEqual((response.status_code, response.data['id_trabajo']), (202, trabajo.pk))
+        lanzar.assert_called_once()
+
+    def test_generar_pdf_solo_acepta_post(self):
+        self.assertEqual(self.client.get(f'{self.url}generar_pdf/').status_code, 405)
+        self.assertFalse(TrabajoPDF.objects.exists())
+
+    def test_encolar_consultar_y_descargar(self):
+        self.assertEqual(self.client.get(f'{self.url}descargar_pdf/').status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{self.url}generar_pdf/')
+        self.assertEqual(response.status_code, 202)
+        estado = f"/api/facturacion/facturas/trabajos_pdf/{response.data['id_trabajo']}/"
+        self.assertEqual(self.client.get(estado).data['estado'], 'Pendiente')
+
+        # FACTURAS_PDF_WORKERS = 0 en tests: la cola se procesa como lo hace el comando
+        DocumentoFacturaService().procesar_pendientes()
+
+        self.assertEqual(self.client.get(estado).data['estado'], 'Completado')
+        # El contenido no cambió: se sirve el archivo existente sin un trabajo nuevo
+        self.assertEqual(self.client.post(f'{self.url}generar_pdf/').status_code, 200)
+        self.assertEqual(TrabajoPDF.objects.count(), 1)
+        descarga = self.client.get(f'{self.url}descargar_pdf/')
+        self.assertEqual(descarga.status_code, 200)
+        self.assertTrue(b''.join(descarga.streaming_content).startswith(b'%PDF'))
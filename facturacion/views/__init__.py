@@ -0,0 +1 @@
+from .factura_views import FacturaViewSet
@@ -1,16 +1,28 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
 from django.db.models import Sum, Count, Q
+from django.http import FileResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
-from ..models import Factura, Consulta
+from ..models import Factura, Consulta, TrabajoPDF
 from ..serializers import FacturaSerializer, FacturaConDetallesSerializer, ConsultaParaFacturarSerializer
 from ..services import FacturaService
+from ..services.facturacion_lote_service import FacturacionLoteService
+from ..services.documento_service import DocumentoFacturaService
+from clinica.services.exportacion_service import ExportacionCSVService
+from GestionVeterinaria.db_router import LecturaReplicaMixin
+from GestionVeterinaria.condicional import GetCondicionalMixin
+from usuarios.permissions import HasRole
 
-class FacturaViewSet(viewsets.ModelViewSet):
+class FacturaViewSet(LecturaReplicaMixin, GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Factura.objects.all()
+    condicional_campos = ('fecha_modificacion', 'pago__fecha_modificacion')
     factura_service = FacturaService()
+    orden_paginacion = ('-fecha_emision', '-id_factura')
+    # Versión condicional + una página en un solo JOIN; más indica un N+1 en el serializer
+    presupuesto_consultas = {'list': 4, 'retrieve': 4}
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
@@ -18,7 +30,13 @@ class FacturaViewSet(viewsets.ModelViewSet):
         return FacturaSerializer
 
     def get_queryset(self):
-        return Factura.objects.select_related('consulta', 'cliente').all()
+        # Todo el grafo que usa FacturaConDetallesSerializer en un solo JOIN
+        return Factura.objects.select_related(
+            'consulta__mascota',
+            'consulta__veterinario',
+            'cliente__persona__usuario',
+            'pago'
+        ).all()
 
     @action(detail=False, methods=['get'])
     def consultas_pendientes(self, request):
@@ -91,7 +109,13 @@ class FacturaViewSet(viewsets.ModelViewSet):
     def estadisticas(self, request):
         """Obtiene estadísticas de facturación"""
         try:
-            estadisticas = self.factura_service.obtener_estadisticas()
+            fecha_desde = request.query_params.get('fecha_desde')
+            fecha_hasta = request.query_params.get('fecha_hasta')
+            estadisticas = self.factura_service.obtener_estadisticas(
+                fecha_desde=datetime.strptime(fecha_desde, '%Y-%m-%d').date() if fecha_desde else None,
+                fecha_hasta=datetime.strptime(fecha_hasta, '%Y-%m-%d').date() if fecha_hasta else None,
+                agrupacion=request.query_params.get('agrupacion', 'mes')
+            )
             return Response(estadisticas)
         except Exception as e:
             return Response(
@@ -99,15 +123,95 @@ class FacturaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    @action(detail=True, methods=['get'])
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, HasRole('Administrador', 'Recepcionista')])
+    def facturar_lote(self, request):
+        """Factura en lote las consultas pendientes (filtros: fechas y veterinario)"""
+        try:
+            fecha_desde = request.data.get('fecha_desde')
+            fecha_hasta = request.data.get('fecha_hasta')
+            resultado = FacturacionLoteService(
+                usuario=request.user if request.user.is_authenticated else None
+            ).facturar(
+                fecha_desde=datetime.strptime(fecha_desde, '%Y-%m-%d').date() if fecha_desde else None,
+                fecha_hasta=datetime.strptime(fecha_hasta, '%Y-%m-%d').date() if fecha_hasta else None,
+                veterinario_id=request.data.get('veterinario'),
+                simulacion=str(request.data.get('simulacion', '')).lower() in ('1', 'true')
+            )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        codigo = status.HTTP_200_OK if resultado['simulacion'] else status.HTTP_201_CREATED
+        return Response(resultado, status=codigo)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def generar_pdf(self, request, pk=None):
-        """Genera PDF de la factura"""
+        """Encola el PDF de la factura; 200 si ya está generado, 202 si queda en cola.
+
+        Solo POST: crea un trabajo. El estado se consulta con GET trabajos_pdf/<id> y
+        el archivo con GET descargar_pdf.
+        """
         factura = self.get_object()
         try:
-            pdf_info = self.factura_service.generar_pdf(factura)
-            return Response(pdf_info)
+            pdf_info = self.factura_service.generar_pdf(
+                factura, usuario=request.user if request.user.is_authenticated else None
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+        codigo = status.HTTP_200_OK if pdf_info['estado'] == 'Completado' else status.HTTP_202_ACCEPTED
+        return Response(pdf_info, status=codigo)
+
+    @action(detail=False, methods=['get'], url_path=r'trabajos_pdf/(?P<id_trabajo>\d+)',
+            permission_classes=[IsAuthenticated])
+    def trabajo_pdf(self, request, id_trabajo=None):
+        """Estado de un trabajo de generación de PDF"""
+        try:
+            trabajo = TrabajoPDF.objects.get(pk=id_trabajo)
+        except TrabajoPDF.DoesNotExist:
+            return Response(
+                {'error': 'Trabajo no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(DocumentoFacturaService.informacion(trabajo))
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def descargar_pdf(self, request, pk=None):
+        """Descarga el PDF vigente de la factura si ya fue generado"""
+        factura = self.get_object()
+        ruta = DocumentoFacturaService().archivo_actual(factura.pk)
+        if ruta is None:
+            return Response(
+                {'error': 'El PDF no está generado; solicítelo con generar_pdf'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return FileResponse(
+            open(ruta, 'rb'),
+            as_attachment=True,
+            filename=f"{factura.numero_factura}.pdf",
+            content_type='application/pdf'
+        )
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, HasRole('Administrador')])
+    def exportar(self, request):
+        """Exporta facturas, detalles o pagos en CSV (streaming)"""
+        tipo = request.query_params.get('tipo', 'facturas')
+        try:
+            fecha_desde = request.query_params.get('fecha_desde')
+            fecha_hasta = request.query_params.get('fecha_hasta')
+            queryset, columnas = self.factura_service.obtener_exportacion(
+                tipo,
+                fecha_desde=datetime.strptime(fecha_desde, '%Y-%m-%d').date() if fecha_desde else None,
+                fecha_hasta=datetime.strptime(fecha_hasta, '%Y-%m-%d').date() if fecha_hasta else None,
+                estado=request.query_params.get('estado')
+            )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return ExportacionCSVService().respuesta(queryset, columnas, f'{tipo}_{timezone.now():%Y%m%d}')
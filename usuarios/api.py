@@ -4,12 +4,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import login, logout
 from .backends import EmailBackend
-from .models import UsuarioPersonalizado, Rol
-from .serializers import UsuarioSerializer, UsuarioCreateSerializer, RolSerializer
-import jwt
-import datetime
-from django.conf import settings
+from .models import Usuario, Rol
+from .serializers import UsuarioSerializer, RolSerializer
+from .roles import tiene_rol
+from .tokens import generar_token, decodificar_token, revocar_token, usuario_desde_token
+from .throttling import limitador_login
 from django.views.decorators.csrf import csrf_exempt
+from GestionVeterinaria.cache import respuesta_en_cache
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
@@ -24,22 +25,22 @@ def login_api(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    # Se rechaza antes de calcular ningún hash
+    espera = limitador_login.bloqueado(request, correo)
+    if espera:
+        return Response(
+            {'error': 'Demasiados intentos fallidos, intente más tarde'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(espera)}
+        )
+    
     backend = EmailBackend()
     user = backend.authenticate(request, username=correo, password=password)
     
     if user is not None:
+        limitador_login.registrar_exito(request, correo)
         # Crear token JWT
-        payload = {
-            'id': user.id,
-            'correo': user.correo,
-            'nombres': user.nombres,
-            'apellidos': user.apellidos,
-            'rol': user.idRol.nombreRol if user.idRol else None,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24),
-            'iat': datetime.datetime.utcnow()
-        }
-        
-        token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
+        token = generar_token(user)
         
         # Hacer login en sesión Django (opcional)
         login(request, user, backend='usuarios.backends.EmailBackend')
@@ -47,14 +48,15 @@ def login_api(request):
         return Response({
             'token': token,
             'usuario': {
-                'id': user.id,
-                'nombres': user.nombres,
-                'apellidos': user.apellidos,
-                'correo': user.correo,
-                'rol': user.idRol.nombreRol if user.idRol else None,
+                'id': user.pk,
+                'nombres': user.nombre,
+                'apellidos': user.apellido,
+                'correo': user.email,
+                'roles': [rol.nombre for rol in user.roles.all()],
             }
         })
     
+    limitador_login.registrar_fallo(request, correo)
     return Response(
         {'error': 'Correo o contraseña incorrectos'}, 
         status=status.HTTP_401_UNAUTHORIZED
@@ -62,6 +64,11 @@ def login_api(request):
 
 @api_view(['POST'])
 def logout_api(request):
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        payload = decodificar_token(auth_header.split(' ')[1])
+        if payload:
+            revocar_token(payload)
     logout(request)
     return Response({'message': 'Sesión cerrada correctamente'})
 
@@ -74,39 +81,32 @@ def perfil_usuario(request):
 @api_view(['GET'])
 def lista_usuarios_api(request):
     """Listar todos los usuarios (solo admin/superuser)"""
-    if not (request.user.is_superuser or (request.user.idRol and request.user.idRol.nombreRol == 'Administrador')):
+    if not (request.user.is_superuser or tiene_rol(request.user, 'Administrador')):
         return Response(
             {'error': 'No tienes permisos para acceder a esta sección'}, 
             status=status.HTTP_403_FORBIDDEN
         )
     
-    usuarios = UsuarioPersonalizado.objects.all()
+    usuarios = Usuario.objects.prefetch_related('roles')
     serializer = UsuarioSerializer(usuarios, many=True)
     return Response(serializer.data)
 
 @api_view(['POST'])
 def crear_usuario_api(request):
     """Crear nuevo usuario (solo admin/superuser)"""
-    if not (request.user.is_superuser or (request.user.idRol and request.user.idRol.nombreRol == 'Administrador')):
+    if not (request.user.is_superuser or tiene_rol(request.user, 'Administrador')):
         return Response(
             {'error': 'No tienes permisos para esta acción'}, 
             status=status.HTTP_403_FORBIDDEN
         )
     
-    serializer = UsuarioCreateSerializer(data=request.data)
+    serializer = UsuarioSerializer(data=request.data)
     
     if serializer.is_valid():
         try:
-            # Verificar si el correo ya existe
-            if UsuarioPersonalizado.objects.filter(correo=serializer.validated_data['correo']).exists():
-                return Response(
-                    {'error': 'Este correo electrónico ya está registrado'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
             usuario = serializer.save()
             return Response(
-                {'message': f'Usuario {usuario.nombres} {usuario.apellidos} registrado exitosamente'},
+                {'message': f'Usuario {usuario.nombre} {usuario.apellido} registrado exitosamente'},
                 status=status.HTTP_201_CREATED
             )
         except Exception as e:
@@ -118,6 +118,7 @@ def crear_usuario_api(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
+@respuesta_en_cache([Rol])
 def lista_roles_api(request):
     """Listar todos los roles"""
     roles = Rol.objects.all()
@@ -126,6 +127,10 @@ def lista_roles_api(request):
 
 # Middleware para autenticación JWT
 class JWTAuthenticationMiddleware:
+    """Autentica con el token sin consultar la base de datos (ver usuarios.tokens).
+
+    Debe ir después de AuthenticationMiddleware para que no sobrescriba request.user.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
@@ -138,12 +143,10 @@ class JWTAuthenticationMiddleware:
         
         if auth_header and auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
-            
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                user = UsuarioPersonalizado.objects.get(id=payload['id'])
+            user = usuario_desde_token(token)
+            if user is not None:
                 request.user = user
-            except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, UsuarioPersonalizado.DoesNotExist):
-                pass
+                # JWTAuthentication (DRF) lo reutiliza sin volver a validar el token
+                request._usuario_jwt = (token, user)
         
-        return self.get_response(request)
\ No newline at end of file
+        return self.get_response(request)
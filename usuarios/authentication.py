@@ -0,0 +1,32 @@
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from .tokens import usuario_desde_token
+
+
+class JWTAuthentication(BaseAuthentication):
+    """Autenticación DRF con los tokens de usuarios.tokens (y los de simplejwt).
+
+    Reutiliza el usuario que JWTAuthenticationMiddleware ya resolvió para la misma
+    solicitud; sin el middleware valida el token aquí, con el mismo caché de usuarios.
+    """
+    palabra_clave = b'bearer'
+
+    def authenticate(self, request):
+        partes = get_authorization_header(request).split()
+        if not partes or partes[0].lower() != self.palabra_clave:
+            return None
+        if len(partes) != 2:
+            raise AuthenticationFailed('Encabezado Authorization inválido')
+
+        token = partes[1].decode('latin-1')
+        resuelto = getattr(request._request, '_usuario_jwt', None)
+        if resuelto is not None and resuelto[0] == token:
+            usuario = resuelto[1]
+        else:
+            usuario = usuario_desde_token(token)
+        if usuario is None:
+            raise AuthenticationFailed('Token inválido, expirado o revocado')
+        return usuario, token
+
+    def authenticate_header(self, request):
+        return 'Bearer'
@@ -1,23 +1,26 @@
 from django.contrib.auth.backends import BaseBackend
-from .models import UsuarioPersonalizado
+from .models import Usuario
 
 class EmailBackend(BaseBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = UsuarioPersonalizado.objects.get(correo=username)
-            if user.check_password(password): 
-                return user
-            else: 
-                return None  
-        except UsuarioPersonalizado.DoesNotExist:
+        if not username or password is None:
             return None
-        except Exception as e:
+        try:
+            user = Usuario.objects.get(email__iexact=username)
+        except Usuario.DoesNotExist:
+            # Hash de relleno: un correo inexistente tarda lo mismo que uno existente
+            Usuario().set_password(password)
             return None
+        # check_password regenera el hash con el hasher preferido si está desactualizado
+        if user.check_password(password) and user.is_active and user.estado:
+            return user
+        return None
+
     def get_user(self, user_id):
         try:
             if isinstance(user_id, str):
                 user_id = int(user_id)  
-            user = UsuarioPersonalizado.objects.get(id=user_id)
+            user = Usuario.objects.get(pk=user_id)
             return user
-        except (UsuarioPersonalizado.DoesNotExist, ValueError, TypeError) as e:
-            return None
\ No newline at end of file
+        except (Usuario.DoesNotExist, ValueError, TypeError) as e:
+            return None
@@ -0,0 +1,188 @@
+import datetime
+import uuid
+from unittest import mock
+import jwt
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient, APIRequestFactory
+from GestionVeterinaria.rendimiento import medir, reportar
+from clinica.models import Mascota
+from clinica.tests import crear_usuario
+from .api import login_api
+from .models import Usuario, Persona, Cliente, Rol
+from .roles import cache_roles
+from .throttling import AlmacenMemoria, LimitadorLogin
+from .tokens import cache_usuarios, generar_token, version_token
+from .views import ClienteViewSet
+
+
+class BenchmarkAutenticacionJWT(TestCase):
+    """Solicitudes por segundo de un endpoint con permiso por rol, con y sin el caché
+    de usuarios. "Sin caché" reproduce la autenticación anterior: el token solo trae el
+    id y cada solicitud consulta el usuario y sus roles."""
+
+    def setUp(self):
+        cache.clear()
+        cache_usuarios.limpiar()
+        cache_roles.invalidar()
+        self.admin = crear_usuario('admin@clinica.com', roles=['Administrador'])
+        self.url = f'/api/usuarios/{self.admin.pk}/'
+
+    def _token_sin_roles(self):
+        ahora = datetime.datetime.now(datetime.timezone.utc)
+        return jwt.encode({
+            'id': self.admin.pk, 'ver': version_token(self.admin.pk), 'jti': uuid.uuid4().hex,
+            'exp': ahora + datetime.timedelta(hours=1), 'iat': ahora,
+        }, settings.SECRET_KEY, algorithm='HS256')
+
+    def _solicitud(self, token):
+        def solicitud():
+            response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+            assert response.status_code == 200, response.status_code
+        return solicitud
+
+    def test_solicitudes_por_segundo(self):
+        ttl_usuarios, ttl_roles = cache_usuarios.ttl, cache_roles.ttl
+        cache_usuarios.ttl = cache_roles.ttl = 0
+        try:
+            sin_cache = medir(self._solicitud(self._token_sin_roles()), repeticiones=300)
+        finally:
+            cache_usuarios.ttl, cache_roles.ttl = ttl_usuarios, ttl_roles
+        con_cache = medir(self._solicitud(generar_token(self.admin)), repeticiones=300)
+
+        reportar('GET /api/usuarios/<id>/ (IsAdminOnly)', {
+            'sin caché (antes)': sin_cache,
+            'caché de usuarios (después)': con_cache,
+        })
+        # La autenticación deja de consultar la base: solo queda el retrieve
+        self.assertEqual(sin_cache.consultas_por_repeticion - con_cache.consultas_por_repeticion, 2)
+
+
+def sembrar_clientes(cantidad, mascotas_por_cliente=2):
+    """Crea `cantidad` clientes con sus mascotas usando bulk_create"""
+    rol = Rol.objects.get_or_create(nombre='Cliente')[0]
+    Usuario.objects.bulk_create([
+        Usuario(email=f'cliente{i}@correo.com', username=f'cliente{i}@correo.com',
+                nombre=f'Cliente {i}', apellido='Benchmark', password='!')
+        for i in range(cantidad)
+    ], batch_size=500)
+    usuarios = list(Usuario.objects.filter(apellido='Benchmark').order_by('pk'))
+    Usuario.roles.through.objects.bulk_create(
+        [Usuario.roles.through(usuario=u, rol=rol) for u in usuarios], batch_size=500
+    )
+    Persona.objects.bulk_create([Persona(usuario=u, telefono='555-0000') for u in usuarios], batch_size=500)
+    personas = Persona.objects.filter(usuario__in=usuarios)
+    Cliente.objects.bulk_create([Cliente(persona=p) for p in personas], batch_size=500)
+    Mascota.objects.bulk_create([
+        Mascota(nombre=f'Mascota {j}', especie='Perro', raza='Mestizo', edad=3, sexo='M', dueño=c)
+        for c in Cliente.objects.all() for j in range(mascotas_por_cliente)
+    ], batch_size=500)
+
+
+class BenchmarkListadoClientes(TestCase):
+    """Una página de /api/clientes/ sobre miles de clientes: con el annotate y los
+    prefetch de ClienteViewSet frente al mismo serializer sobre el queryset plano"""
+    CLIENTES = 3000
+    TAMANO_PAGINA = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        sembrar_clientes(cls.CLIENTES)
+        cls.usuario = crear_usuario('recepcion@clinica.com', roles=['Recepcionista'])
+
+    def _pagina(self):
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+
+        def pagina():
+            response = client.get('/api/clientes/', {'page_size': self.TAMANO_PAGINA})
+            assert len(response.data['results']) == self.TAMANO_PAGINA
+        return pagina
+
+    def test_pagina_de_clientes(self):
+        with mock.patch.object(ClienteViewSet, 'get_queryset', lambda vista: Cliente.objects.all()), \
+                self.settings(PRESUPUESTO_CONSULTAS_ESTRICTO=False), \
+                self.assertLogs('GestionVeterinaria.metricas', 'WARNING'):
+            sin_prefetch = medir(self._pagina(), repeticiones=5, calentamiento=1)
+        con_prefetch = medir(self._pagina(), repeticiones=30)
+
+        reportar(f'GET /api/clientes/ ({self.CLIENTES} clientes, página de {self.TAMANO_PAGINA})', {
+            'queryset plano (antes)': sin_prefetch,
+            'annotate + prefetch (después)': con_prefetch,
+        })
+        self.assertEqual(con_prefetch.consultas_por_repeticion, 4)
+
+
+class BenchmarkLogin(TestCase):
+    """Carga sobre login_api con el hasher real (PBKDF2 ajustable): intentos por segundo y
+    CPU por intento. Un correo inexistente cuesta lo mismo que una contraseña incorrecta y
+    un intento bloqueado por el limitador no calcula ningún hash."""
+    ITERACIONES = 100_000
+    RAFAGA = 60
+
+    def setUp(self):
+        self.usuario = crear_usuario('ana@clinica.com', roles=['Cliente'])
+        # Sin límite por cuenta: los escenarios repiten la misma cuenta desde IPs distintas
+        self.limitador = LimitadorLogin(almacen=AlmacenMemoria(), MAX_POR_CUENTA=10 ** 6)
+        ajustes = self.settings(
+            PASSWORD_HASHERS=['usuarios.hashers.PBKDF2PasswordHasherAjustable'],
+            PASSWORD_PBKDF2_ITERACIONES=self.ITERACIONES,
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.usuario.set_password('clave-correcta')
+        self.usuario.save()
+        limitador = mock.patch('usuarios.api.limitador_login', self.limitador)
+        limitador.start()
+        self.addCleanup(limitador.stop)
+        self.fabrica = APIRequestFactory()
+        self.ips = (f'10.0.{i // 250}.{i % 250}' for i in range(10 ** 6))
+
+    def _intento(self, correo, password, ip=None):
+        request = self.fabrica.post(
+            '/api/usuarios/login/', {'correo': correo, 'password': password}, format='json',
+            REMOTE_ADDR=ip or next(self.ips)
+        )
+        request.session = SessionStore()
+        return login_api(request).status_code
+
+    def _escenario(self, correo, password, estado, ip=None):
+        def intento():
+            resultado = self._intento(correo, password, ip)
+            assert resultado == estado, resultado
+        return intento
+
+    def test_intentos_de_login(self):
+        for _ in range(self.limitador.max_por_ip):
+            self._intento('x@correo.com', 'x', ip='10.9.9.9')
+
+        reportar(f'POST login_api (PBKDF2, {self.ITERACIONES} iteraciones)', {
+            'login correcto': medir(self._escenario('ana@clinica.com', 'clave-correcta', 200), 20, 2),
+            'contraseña incorrecta': medir(self._escenario('ana@clinica.com', 'otra', 401), 20, 2),
+            'correo inexistente': medir(self._escenario('nadie@correo.com', 'otra', 401), 20, 2),
+            'IP bloqueada (429)': medir(self._escenario('ana@clinica.com', 'otra', 429, '10.9.9.9'), 200),
+        })
+
+    def test_rafaga_desde_una_ip(self):
+        """Relleno de credenciales: RAFAGA correos distintos desde la misma IP"""
+        def rafaga(limitador):
+            with mock.patch('usuarios.api.limitador_login', limitador):
+                estados = []
+                medicion = medir(lambda: estados.append(
+                    self._intento(f'victima{len(estados)}@correo.com', 'x', ip='10.8.8.8')
+                ), repeticiones=self.RAFAGA, calentamiento=0)
+            return medicion, estados
+
+        sin_limite, estados_sin_limite = rafaga(LimitadorLogin(almacen=AlmacenMemoria(), MAX_POR_IP=10 ** 6))
+        con_limite, estados_con_limite = rafaga(LimitadorLogin(almacen=AlmacenMemoria()))
+
+        reportar(f'Ráfaga de {self.RAFAGA} intentos desde una IP', {
+            'sin limitador': sin_limite,
+            f'limitador ({self.limitador.max_por_ip} por IP)': con_limite,
+        })
+        print(f'  CPU total: {sin_limite.cpu:.2f} s sin limitador, {con_limite.cpu:.2f} s con limitador')
+        self.assertEqual(estados_sin_limite.count(429), 0)
+        self.assertEqual(estados_con_limite.count(401), self.limitador.max_por_ip)
+        self.assertEqual(estados_con_limite.count(429), self.RAFAGA - self.limitador.max_por_ip)
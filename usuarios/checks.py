@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def cache_compartido_para_tokens(app_configs, **kwargs):
+    """La revocación de tokens (logout) y el límite de login viven en el caché de
+    Django; con un caché por proceso cada worker tiene su propia lista y un reinicio
+    la borra. Fuera de DEBUG se exige un backend compartido (CACHE_URL)."""
+    if settings.DEBUG or not isinstance(caches['default'], (LocMemCache, DummyCache)):
+        return []
+    return [Error(
+        'El caché por defecto es local al proceso: los tokens revocados con logout '
+        'volverían a ser válidos en otros workers o tras un reinicio, y cada worker '
+        'contaría por separado los intentos fallidos de login.',
+        hint='Configure CACHE_URL con un Redis compartido por todos los workers.',
+        id='usuarios.E001',
+    )]
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2PasswordHasherAjustable(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 con iteraciones configurables (PASSWORD_PBKDF2_ITERACIONES).
+
+    Conserva el algoritmo 'pbkdf2_sha256', así verifica los hashes existentes y
+    Django los regenera en el siguiente login correcto cuando cambian las iteraciones.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERACIONES', PBKDF2PasswordHasher.iterations)
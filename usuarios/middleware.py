@@ -1,6 +0,0 @@
-class DebugAuthMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-    def __call__(self, request):
-        response = self.get_response(request)
-        return response
\ No newline at end of file
@@ -1,6 +1,10 @@
-# Generated by Django 5.2.7 on 2025-10-05 22:35
+# Generated by Django 5.2.7 on 2026-10-18 13:28
 
+import django.contrib.auth.models
+import django.contrib.auth.validators
 import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
 from django.db import migrations, models
 
 
@@ -9,35 +13,113 @@ class Migration(migrations.Migration):
     initial = True
 
     dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
     ]
 
     operations = [
         migrations.CreateModel(
             name='Rol',
             fields=[
-                ('id', models.AutoField(db_column='idRol', primary_key=True, serialize=False)),
-                ('nombreRol', models.CharField(db_column='nombreRol', max_length=50)),
-                ('descripcion', models.TextField(blank=True, db_column='descripcion', null=True)),
-                ('estado', models.BooleanField(db_column='estado', default=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_rol', models.AutoField(primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Nombre del Rol')),
+                ('descripcion', models.CharField(blank=True, max_length=255, null=True)),
             ],
             options={
-                'db_table': 'Rol',
-                'managed': True,
+                'verbose_name': 'Rol',
+                'verbose_name_plural': 'Roles',
+                'ordering': ['nombre'],
             },
         ),
         migrations.CreateModel(
-            name='UsuarioPersonalizado',
+            name='Usuario',
             fields=[
-                ('id', models.AutoField(db_column='idUsuario', primary_key=True, serialize=False)),
-                ('nombres', models.CharField(db_column='nombres', max_length=100)),
-                ('apellidos', models.CharField(db_column='apellidos', max_length=100)),
-                ('correo', models.EmailField(db_column='correo', max_length=254, unique=True)),
-                ('contrasena', models.CharField(db_column='contraseña', max_length=255)),
-                ('idRol', models.ForeignKey(blank=True, db_column='idRol', null=True, on_delete=django.db.models.deletion.SET_NULL, to='usuarios.rol')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_usuario', models.AutoField(primary_key=True, serialize=False)),
+                ('email', models.EmailField(max_length=254, unique=True, verbose_name='Correo Electrónico')),
+                ('nombre', models.CharField(max_length=150, verbose_name='Nombre')),
+                ('apellido', models.CharField(max_length=150, verbose_name='Apellido')),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
             ],
             options={
-                'db_table': 'Usuario',
-                'managed': True,
+                'verbose_name': 'Usuario',
+                'verbose_name_plural': 'Usuarios',
             },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Persona',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_persona', models.AutoField(primary_key=True, serialize=False)),
+                ('telefono', models.CharField(blank=True, max_length=20, null=True, verbose_name='Teléfono')),
+                ('direccion', models.CharField(blank=True, max_length=255, null=True, verbose_name='Dirección')),
+                ('usuario', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='persona_info', to=settings.AUTH_USER_MODEL, verbose_name='Cuenta de Usuario')),
+                ('usuario_creacion', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='personas_creadas', to=settings.AUTH_USER_MODEL)),
+                ('usuario_modificacion', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='personas_modificadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Persona',
+                'verbose_name_plural': 'Personas',
+            },
+        ),
+        migrations.CreateModel(
+            name='Cliente',
+            fields=[
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado Activo')),
+                ('id_cliente', models.AutoField(primary_key=True, serialize=False)),
+                ('usuario_creacion', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clientes_creados', to=settings.AUTH_USER_MODEL)),
+                ('usuario_modificacion', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clientes_modificados', to=settings.AUTH_USER_MODEL)),
+                ('persona', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cliente_info', to='usuarios.persona', verbose_name='Datos Personales del Cliente')),
+            ],
+            options={
+                'verbose_name': 'Cliente',
+                'verbose_name_plural': 'Clientes',
+            },
+        ),
+        migrations.CreateModel(
+            name='UsuarioRol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rol', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='usuarios.rol')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Rol de Usuario',
+                'verbose_name_plural': 'Roles de Usuarios',
+            },
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='roles',
+            field=models.ManyToManyField(related_name='usuarios', through='usuarios.UsuarioRol', to='usuarios.rol', verbose_name='Roles del Usuario'),
+        ),
+        migrations.AddIndex(
+            model_name='usuariorol',
+            index=models.Index(fields=['rol', 'usuario'], name='usuariorol_rol_usuario_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='usuariorol',
+            unique_together={('usuario', 'rol')},
         ),
     ]
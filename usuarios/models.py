@@ -35,12 +35,21 @@ class Usuario(AbstractUser, AuditoriaMixin):
 
     nombre = models.CharField(max_length=150, verbose_name="Nombre")
     apellido = models.CharField(max_length=150, verbose_name="Apellido")
+    # Versión de los tokens emitidos: incrementarla los revoca (ver usuarios.tokens)
+    version_token = models.PositiveIntegerField(default=0, editable=False)
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['nombre', 'apellido']
 
     def save(self, *args, **kwargs):
         if not self.username:
             self.username = self.email 
+        # version_token solo se modifica con UPDATE ... + 1 (incrementar_version_token):
+        # guardar una instancia cargada antes de una revocación no debe deshacerla
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'version_token'
+            ]
         super().save(*args, **kwargs)
 
     def get_full_name(self):
@@ -61,6 +70,10 @@ class UsuarioRol(models.Model):
         unique_together = ('usuario', 'rol')
         verbose_name = "Rol de Usuario"
         verbose_name_plural = "Roles de Usuarios"
+        indexes = [
+            # Usuarios de un rol (p. ej. el listado de clientes); la única cubre (usuario, rol)
+            models.Index(fields=['rol', 'usuario'], name='usuariorol_rol_usuario_idx'),
+        ]
 
 class Persona(AuditoriaMixin):
     id_persona = models.AutoField(primary_key=True)
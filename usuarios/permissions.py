@@ -1,15 +1,33 @@
 # usuarios/permissions.py
 
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from .roles import tiene_rol
+
+
+class HasRole(BasePermission):
+    """Permite el acceso a usuarios con alguno de los roles indicados.
+
+    Uso: permission_classes = [IsAuthenticated, HasRole('Administrador', 'Veterinario')]
+    """
+    def __init__(self, *roles):
+        self.roles = roles
+
+    def __call__(self):
+        # DRF instancia cada elemento de permission_classes; la instancia ya está configurada
+        return self
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and tiene_rol(request.user, *self.roles)
+
 
 class IsAdminOnly(BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and \
-               request.user.roles.filter(nombre="Administrador").exists()
+               tiene_rol(request.user, "Administrador")
 
 
 class IsAdminOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         if request.method in SAFE_METHODS:
             return request.user.is_authenticated
-        return request.user.roles.filter(nombre="Administrador").exists()
+        return request.user.is_authenticated and tiene_rol(request.user, "Administrador")
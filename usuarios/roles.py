@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from .models import Rol
+
+
+class CacheRoles:
+    """Caché LRU por proceso de los nombres de rol de cada usuario, con expiración"""
+
+    def __init__(self, max_entradas=1000, ttl=300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, usuario_id):
+        with self._lock:
+            entrada = self._datos.get(usuario_id)
+            if entrada is None:
+                return None
+            roles, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[usuario_id]
+                return None
+            self._datos.move_to_end(usuario_id)
+            return roles
+
+    def guardar(self, usuario_id, roles):
+        with self._lock:
+            self._datos[usuario_id] = (roles, time.monotonic() + self.ttl)
+            self._datos.move_to_end(usuario_id)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, usuario_id=None):
+        with self._lock:
+            if usuario_id is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(usuario_id, None)
+
+
+cache_roles = CacheRoles(
+    max_entradas=getattr(settings, 'ROLES_CACHE_MAX', 1000),
+    ttl=getattr(settings, 'ROLES_CACHE_TTL', 300)
+)
+
+
+def obtener_roles(usuario):
+    """Nombres de rol del usuario: memo en la instancia, luego caché del proceso, luego BD"""
+    if not usuario or not usuario.is_authenticated:
+        return frozenset()
+
+    # Memo por solicitud (la instancia de request.user vive lo que dura la solicitud)
+    roles = getattr(usuario, '_roles_cache', None)
+    if roles is not None:
+        return roles
+
+    roles = cache_roles.obtener(usuario.pk)
+    if roles is None:
+        roles = frozenset(
+            Rol.objects.filter(usuarios=usuario).values_list('nombre', flat=True)
+        )
+        cache_roles.guardar(usuario.pk, roles)
+
+    usuario._roles_cache = roles
+    return roles
+
+
+def tiene_rol(usuario, *roles):
+    return not obtener_roles(usuario).isdisjoint(roles)
@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.db import transaction
 from .models import Usuario, Rol, Persona, Cliente, UsuarioRol
+from .tokens import version_token
+from .services.cliente_service import ClienteService
 from django.contrib.auth import get_user_model
-from clinica.models import Mascota
 User = get_user_model()
 
 
@@ -30,6 +33,42 @@ class UsuarioSerializer(serializers.ModelSerializer):
         return user
 
 
+class LoginSerializer(TokenObtainPairSerializer):
+    """Login con email y contraseña; el token lleva los roles del usuario"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['roles'] = [rol.nombre for rol in user.roles.all()]
+        # Misma versión que generar_token: un cambio de contraseña o de roles lo revoca
+        token['ver'] = version_token(user.pk)
+        return token
+
+
+class RegistroSerializer(serializers.ModelSerializer):
+    """Crea el usuario, sus datos personales y el rol Cliente"""
+    password = serializers.CharField(write_only=True, min_length=8)
+    telefono = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    direccion = serializers.CharField(write_only=True, required=False, allow_blank=True)
+
+    class Meta:
+        model = User
+        fields = ['id_usuario', 'email', 'nombre', 'apellido', 'password', 'telefono', 'direccion']
+        read_only_fields = ['id_usuario']
+
+    @transaction.atomic
+    def create(self, validated_data):
+        telefono = validated_data.pop('telefono', None)
+        direccion = validated_data.pop('direccion', None)
+        password = validated_data.pop('password')
+        user = User(**validated_data)
+        user.set_password(password)
+        user.save()
+        Persona.objects.create(usuario=user, telefono=telefono, direccion=direccion)
+        ClienteService().asignar_rol_cliente([user.pk])
+        return user
+
+
 class UsuarioRolSerializer(serializers.ModelSerializer):
     class Meta:
         model = UsuarioRol
@@ -59,24 +98,19 @@ class ClienteSerializer(serializers.ModelSerializer):
 
 
 
-class ClienteConMascotasSerializer(serializers.ModelSerializer):
+class ClienteConMascotasSerializer(ClienteSerializer):
+    # mascotas_count y las mascotas precargadas vienen de ClienteViewSet.get_queryset;
+    # sin ellas se recurre a una consulta por cliente
     mascotas_count = serializers.SerializerMethodField()
     mascotas_names = serializers.SerializerMethodField()
-    tipo_cliente = serializers.SerializerMethodField()
 
-    class Meta:
-        model = Usuario
-        fields = [
-            'id', 'nombre', 'apellido', 'correo', 'telefono', 'direccion',
-            'estado', 'fechaRegistro', 'mascotas_count', 'mascotas_names', 'tipo_cliente'
-        ]
+    class Meta(ClienteSerializer.Meta):
+        fields = ClienteSerializer.Meta.fields + ['mascotas_count', 'mascotas_names']
 
     def get_mascotas_count(self, obj):
-        return Mascota.objects.filter(usuario_id=obj.id).count()
+        if hasattr(obj, 'mascotas_count'):
+            return obj.mascotas_count
+        return obj.mascotas.count()
 
     def get_mascotas_names(self, obj):
-        mascotas = Mascota.objects.filter(usuario_id=obj.id)
-        return [m.nombre for m in mascotas]
-
-    def get_tipo_cliente(self, obj):
-        return 'Usuario Web' if obj.correo else 'Cliente Directo'
\ No newline at end of file
+        return [m.nombre for m in obj.mascotas.all()]
@@ -1,6 +1,15 @@
-from ..models import Usuario, Mascota
+from clinica.models import Mascota
+from ..models import Usuario, Rol, UsuarioRol
 
 class ClienteService:
+
+    def asignar_rol_cliente(self, usuarios_ids):
+        """Asigna el rol Cliente a los usuarios indicados (registro e importación masiva)"""
+        rol, _ = Rol.objects.get_or_create(nombre='Cliente')
+        UsuarioRol.objects.bulk_create(
+            [UsuarioRol(usuario_id=usuario_id, rol=rol) for usuario_id in usuarios_ids],
+            ignore_conflicts=True
+        )
     
     def validar_eliminacion(self, cliente: Usuario):
         """Valida si un cliente puede ser eliminado"""
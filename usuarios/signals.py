@@ -0,0 +1,74 @@
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Usuario, UsuarioRol, Rol
+from .tokens import cache_usuarios, incrementar_version_token
+from .roles import cache_roles
+
+
+CAMPOS_CREDENCIALES = {'password', 'estado', 'is_active'}
+
+
+@receiver(pre_save, sender=Usuario)
+def detectar_cambio_credenciales(sender, instance, update_fields=None, **kwargs):
+    """Un cambio de contraseña o la desactivación revoca los tokens emitidos"""
+    instance._revocar_tokens = False
+    # save(update_fields=['last_login']) en cada login: no puede cambiar credenciales
+    if update_fields is not None and CAMPOS_CREDENCIALES.isdisjoint(update_fields):
+        return
+    if instance.pk:
+        anterior = Usuario.objects.filter(pk=instance.pk).values('password', 'estado', 'is_active').first()
+        if anterior and (
+            anterior['password'] != instance.password
+            or (anterior['estado'] and not instance.estado)
+            or (anterior['is_active'] and not instance.is_active)
+        ):
+            instance._revocar_tokens = True
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_usuario_en_cache(sender, instance, **kwargs):
+    if getattr(instance, '_revocar_tokens', False):
+        incrementar_version_token(instance.pk)
+    else:
+        cache_usuarios.invalidar_usuario(instance.pk)
+
+
+@receiver(post_delete, sender=Usuario)
+def revocar_tokens_usuario_eliminado(sender, instance, **kwargs):
+    incrementar_version_token(instance.pk)
+
+
+@receiver(post_save, sender=UsuarioRol)
+@receiver(post_delete, sender=UsuarioRol)
+def invalidar_roles_en_cache(sender, instance, **kwargs):
+    # Los roles viajan en el token: se revocan para que se emita uno nuevo
+    incrementar_version_token(instance.usuario_id)
+    cache_roles.invalidar(instance.usuario_id)
+
+
+@receiver(m2m_changed, sender=Usuario.roles.through)
+def invalidar_roles_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """usuario.roles.add()/remove() no emiten post_save de UsuarioRol"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        incrementar_version_token(instance.pk)
+        cache_roles.invalidar(instance.pk)
+    elif pk_set:
+        for usuario_id in pk_set:
+            incrementar_version_token(usuario_id)
+            cache_roles.invalidar(usuario_id)
+    else:
+        # rol.usuarios.clear(): no se conocen los usuarios afectados
+        cache_usuarios.limpiar()
+        cache_roles.invalidar()
+
+
+@receiver(post_save, sender=Rol)
+def invalidar_cache_roles(sender, instance, created=False, **kwargs):
+    """Renombrar un rol cambia los roles de todos sus usuarios (y los de sus tokens)"""
+    if created:
+        return
+    for usuario_id in instance.usuarios.values_list('pk', flat=True):
+        incrementar_version_token(usuario_id)
+    cache_roles.invalidar()
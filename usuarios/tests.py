@@ -1,3 +1,271 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db.models import F
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from clinica.tests import crear_cliente, crear_mascota, crear_usuario
+from .api import login_api
+from .checks import cache_compartido_para_tokens
+from .models import Rol, Usuario, UsuarioRol
+from .permissions import HasRole
+from .roles import CacheRoles, cache_roles, obtener_roles
+from .serializers import LoginSerializer
+from .throttling import AlmacenCache, AlmacenMemoria, LimitadorLogin
+from .tokens import (
+    cache_usuarios, decodificar_token, generar_token, incrementar_version_token, usuario_desde_token,
+    version_token
+)
 
-# Create your tests here.
+
+class AutenticacionJWTTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_usuarios.limpiar()
+        self.admin = crear_usuario('admin@clinica.com', roles=['Administrador'])
+        self.recepcion = crear_usuario('recepcion@clinica.com', roles=['Recepcionista'])
+
+    def _get(self, url, token=None):
+        encabezados = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        return self.client.get(url, **encabezados)
+
+    def test_drf_autentica_con_el_token(self):
+        self.assertEqual(self._get('/api/personas/', generar_token(self.recepcion)).status_code, 200)
+
+    def test_sin_token_o_con_token_invalido(self):
+        self.assertEqual(self._get('/api/personas/').status_code, 401)
+        self.assertEqual(self._get('/api/personas/', 'no.es.un-token').status_code, 401)
+
+    def test_permisos_por_rol_ven_al_usuario_del_token(self):
+        self.assertEqual(self._get('/api/usuarios/', generar_token(self.recepcion)).status_code, 403)
+        self.assertEqual(self._get('/api/usuarios/', generar_token(self.admin)).status_code, 200)
+
+    def test_token_de_simplejwt(self):
+        refresh = LoginSerializer.get_token(self.admin)
+
+        self.assertEqual(self._get('/api/usuarios/', str(refresh.access_token)).status_code, 200)
+        # El refresh no autentica solicitudes
+        self.assertEqual(self._get('/api/usuarios/', str(refresh)).status_code, 401)
+
+    def test_token_sin_identificador_se_rechaza(self):
+        token = jwt.encode({'correo': 'x@x.com', 'roles': ['Administrador']}, settings.SECRET_KEY, algorithm='HS256')
+
+        self.assertIsNone(decodificar_token(token))
+        self.assertEqual(self._get('/api/usuarios/', token).status_code, 401)
+
+    def test_cambio_de_version_revoca_el_token(self):
+        token = generar_token(self.admin)
+        incrementar_version_token(self.admin.pk)
+
+        self.assertEqual(self._get('/api/usuarios/', token).status_code, 401)
+
+    def test_la_version_persiste_en_la_base(self):
+        token = generar_token(self.admin)
+        version = version_token(self.admin.pk)
+        incrementar_version_token(self.admin.pk)
+        # Otro worker o un reinicio: sin caché de Django ni de usuarios
+        cache.clear()
+        cache_usuarios.limpiar()
+
+        self.assertEqual(Usuario.objects.get(pk=self.admin.pk).version_token, version + 1)
+        self.assertIsNone(usuario_desde_token(token))
+
+    def test_guardar_una_instancia_vieja_no_deshace_la_revocacion(self):
+        usuario = Usuario.objects.get(pk=self.admin.pk)
+        incrementar_version_token(usuario.pk)
+        usuario.nombre = 'Otro'
+        usuario.save()
+
+        self.assertEqual(Usuario.objects.get(pk=usuario.pk).version_token, usuario.version_token + 1)
+
+    def test_otro_worker_rechaza_el_token_al_vencer_su_cache(self):
+        token = generar_token(self.admin)
+        self.assertIsNotNone(usuario_desde_token(token))
+        # Incremento hecho por otro proceso: este conserva al usuario en su caché
+        Usuario.objects.filter(pk=self.admin.pk).update(version_token=F('version_token') + 1)
+        self.assertIsNotNone(usuario_desde_token(token))
+
+        cache_usuarios.limpiar()
+        self.assertIsNone(usuario_desde_token(token))
+
+    def test_quitar_un_rol_revoca_el_token_con_ese_rol(self):
+        token = generar_token(self.admin)
+        self.admin.roles.remove(Rol.objects.get(nombre='Administrador'))
+
+        self.assertEqual(self._get('/api/usuarios/', token).status_code, 401)
+        self.assertEqual(self._get('/api/usuarios/', generar_token(self.admin)).status_code, 403)
+
+    def test_produccion_exige_un_cache_compartido(self):
+        with override_settings(DEBUG=False):
+            self.assertEqual([e.id for e in cache_compartido_para_tokens(None)], ['usuarios.E001'])
+        with override_settings(DEBUG=False, CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0',
+        }}):
+            self.assertEqual(cache_compartido_para_tokens(None), [])
+
+    def test_usuario_en_cache_no_consulta_la_base(self):
+        token = generar_token(self.recepcion)
+        with self.assertNumQueries(1):
+            usuario_desde_token(token)
+        with self.assertNumQueries(0):
+            usuario = usuario_desde_token(token)
+        self.assertEqual(usuario.pk, self.recepcion.pk)
+
+
+class RolesTests(TestCase):
+    def setUp(self):
+        cache_roles.invalidar()
+        self.veterinario = crear_usuario('vet@clinica.com', roles=['Veterinario'])
+        self.admin = Rol.objects.create(nombre='Administrador')
+
+    def _roles(self):
+        # Instancia nueva: sin el memo por solicitud de la anterior
+        return obtener_roles(Usuario.objects.get(pk=self.veterinario.pk))
+
+    def _permitido(self, usuario, *roles):
+        return HasRole(*roles)().has_permission(SimpleNamespace(user=usuario), None)
+
+    def test_has_role(self):
+        self.assertTrue(self._permitido(self.veterinario, 'Administrador', 'Veterinario'))
+        self.assertFalse(self._permitido(self.veterinario, 'Administrador'))
+        self.assertFalse(self._permitido(AnonymousUser(), 'Veterinario'))
+
+    def test_roles_en_cache_no_consultan_la_base(self):
+        self._roles()
+        usuario = Usuario.objects.get(pk=self.veterinario.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(obtener_roles(usuario), {'Veterinario'})
+
+    def test_cambios_en_usuario_rol_invalidan_el_cache(self):
+        self.assertEqual(self._roles(), {'Veterinario'})
+
+        asignacion = UsuarioRol.objects.create(usuario=self.veterinario, rol=self.admin)
+        self.assertEqual(self._roles(), {'Veterinario', 'Administrador'})
+
+        asignacion.delete()
+        self.assertEqual(self._roles(), {'Veterinario'})
+
+    def test_cambios_por_la_relacion_invalidan_el_cache(self):
+        self._roles()
+        self.admin.usuarios.add(self.veterinario)
+        self.assertEqual(self._roles(), {'Veterinario', 'Administrador'})
+
+        self.admin.usuarios.clear()
+        self.assertEqual(self._roles(), {'Veterinario'})
+
+    def test_desaloja_el_usado_hace_mas_tiempo(self):
+        roles = CacheRoles(max_entradas=2)
+        roles.guardar(1, frozenset({'Cliente'}))
+        roles.guardar(2, frozenset({'Cliente'}))
+        roles.obtener(1)
+        roles.guardar(3, frozenset({'Cliente'}))
+
+        self.assertIsNotNone(roles.obtener(1))
+        self.assertIsNone(roles.obtener(2))
+        self.assertIsNotNone(roles.obtener(3))
+
+
+class LimitadorLoginTests(TestCase):
+    def setUp(self):
+        self.limitador = LimitadorLogin(almacen=AlmacenMemoria(), MAX_POR_IP=4, MAX_POR_CUENTA=2)
+        self.fabrica = RequestFactory()
+
+    def _request(self, ip='10.0.0.1', **encabezados):
+        return self.fabrica.post('/api/usuarios/login/', REMOTE_ADDR=ip, **encabezados)
+
+    def _fallos(self, cantidad, cuenta, ip='10.0.0.1'):
+        for _ in range(cantidad):
+            self.limitador.registrar_fallo(self._request(ip), cuenta)
+
+    def test_bloquea_la_cuenta_desde_cualquier_ip(self):
+        self._fallos(1, 'ana@clinica.com')
+        self.assertEqual(self.limitador.bloqueado(self._request(), 'ana@clinica.com'), 0)
+
+        self._fallos(1, 'ANA@clinica.com ', ip='10.0.0.2')
+
+        self.assertEqual(self.limitador.bloqueado(self._request('10.0.0.3'), 'ana@clinica.com'), 300)
+        self.assertEqual(self.limitador.bloqueado(self._request('10.0.0.3'), 'otra@clinica.com'), 0)
+
+    def test_bloquea_la_ip_con_cualquier_cuenta(self):
+        for i in range(4):
+            self._fallos(1, f'cuenta{i}@correo.com')
+
+        self.assertTrue(self.limitador.bloqueado(self._request(), 'nueva@correo.com'))
+        self.assertFalse(self.limitador.bloqueado(self._request('10.0.0.2'), 'nueva@correo.com'))
+
+    def test_exito_reinicia_solo_la_cuenta(self):
+        self._fallos(1, 'ana@clinica.com')
+        self._fallos(2, 'otra@correo.com')
+        self.limitador.registrar_exito(self._request(), 'ana@clinica.com')
+        self._fallos(1, 'ana@clinica.com')
+
+        self.assertFalse(self.limitador.bloqueado(self._request('10.0.0.2'), 'ana@clinica.com'))
+        # La IP sigue acumulando: 4 fallos en total
+        self.assertTrue(self.limitador.bloqueado(self._request(), 'ana@clinica.com'))
+
+    def test_x_forwarded_for_solo_con_proxy_de_confianza(self):
+        request = self._request(HTTP_X_FORWARDED_FOR='203.0.113.7, 10.0.0.9')
+
+        self.assertEqual(self.limitador.ip_cliente(request), '10.0.0.1')
+        confiado = LimitadorLogin(almacen=AlmacenMemoria(), CONFIAR_X_FORWARDED_FOR=True)
+        self.assertEqual(confiado.ip_cliente(request), '203.0.113.7')
+
+    def test_almacen_cache_comparte_contadores_entre_instancias(self):
+        cache.clear()
+        LimitadorLogin(almacen=AlmacenCache(), MAX_POR_CUENTA=2).registrar_fallo(self._request(), 'ana@clinica.com')
+        otro = LimitadorLogin(almacen=AlmacenCache(), MAX_POR_CUENTA=2)
+        otro.registrar_fallo(self._request('10.0.0.2'), 'ana@clinica.com')
+
+        self.assertTrue(otro.bloqueado(self._request('10.0.0.3'), 'ana@clinica.com'))
+
+    def test_login_bloqueado_responde_429(self):
+        crear_usuario('ana@clinica.com')
+        fabrica = APIRequestFactory()
+
+        def intento():
+            request = fabrica.post(
+                '/api/usuarios/login/', {'correo': 'ana@clinica.com', 'password': 'x'}, format='json',
+                REMOTE_ADDR='10.0.0.1'
+            )
+            request.session = SessionStore()
+            return login_api(request)
+
+        with mock.patch('usuarios.api.limitador_login', self.limitador):
+            estados = [intento().status_code for _ in range(2)]
+            response = intento()
+
+        self.assertEqual(estados, [401, 401])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '300')
+
+
+class ClienteListadoTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario('recepcion@clinica.com', roles=['Recepcionista']))
+
+    def _clientes(self, cantidad, inicio=0):
+        for i in range(inicio, inicio + cantidad):
+            cliente = crear_cliente(f'dueno{i}@correo.com')
+            for nombre in ('Toby', 'Luna')[:i % 3]:
+                crear_mascota(cliente, nombre)
+
+    def test_listado_con_cantidad_fija_de_consultas(self):
+        self._clientes(3)
+        with self.assertNumQueries(4):
+            self.client.get('/api/clientes/')
+
+        self._clientes(10, inicio=3)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/clientes/')
+
+        self.assertEqual(len(response.data['results']), 13)
+        por_correo = {c['persona']['usuario']['email']: c for c in response.data['results']}
+        self.assertEqual(por_correo['dueno2@correo.com']['mascotas_count'], 2)
+        self.assertEqual(por_correo['dueno2@correo.com']['mascotas_names'], ['Luna', 'Toby'])
+        self.assertEqual(por_correo['dueno0@correo.com']['mascotas_names'], [])
+        self.assertEqual(por_correo['dueno0@correo.com']['persona']['usuario']['roles'][0]['nombre'], 'Cliente')
@@ -0,0 +1,105 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+class AlmacenMemoria:
+    """Contadores en memoria del proceso (pruebas y desarrollo)"""
+
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, clave, ventana):
+        ahora = time.monotonic()
+        with self._lock:
+            valor, expira = self._datos.get(clave, (0, ahora + ventana))
+            if expira <= ahora:
+                valor, expira = 0, ahora + ventana
+            self._datos[clave] = (valor + 1, expira)
+            return valor + 1
+
+    def obtener(self, clave):
+        valor, expira = self._datos.get(clave, (0, 0))
+        return valor if expira > time.monotonic() else 0
+
+    def eliminar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+
+class AlmacenCache:
+    """Contadores en el caché de Django, compartidos entre workers con un backend compartido.
+
+    Con el caché locmem (el que se usa sin CACHE_URL) cada worker cuenta por su cuenta:
+    el límite efectivo se multiplica por la cantidad de workers y un reinicio lo borra.
+    Fuera de DEBUG el chequeo usuarios.E001 exige un caché compartido.
+    """
+
+    def incrementar(self, clave, ventana):
+        cache.add(clave, 0, timeout=ventana)
+        try:
+            return cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=ventana)
+            return 1
+
+    def obtener(self, clave):
+        return cache.get(clave, 0)
+
+    def eliminar(self, clave):
+        cache.delete(clave)
+
+
+class LimitadorLogin:
+    """Limita intentos fallidos de inicio de sesión por IP y por cuenta (ventana fija)"""
+
+    CONFIGURACION = {
+        'ALMACEN': 'usuarios.throttling.AlmacenCache',
+        'MAX_POR_IP': 30,
+        'MAX_POR_CUENTA': 5,
+        'VENTANA': 300,  # segundos
+        'CONFIAR_X_FORWARDED_FOR': False,
+    }
+
+    def __init__(self, almacen=None, **opciones):
+        config = {**self.CONFIGURACION, **getattr(settings, 'LOGIN_THROTTLE', {}), **opciones}
+        self.almacen = almacen or import_string(config['ALMACEN'])()
+        self.max_por_ip = config['MAX_POR_IP']
+        self.max_por_cuenta = config['MAX_POR_CUENTA']
+        self.ventana = config['VENTANA']
+        self.confiar_x_forwarded_for = config['CONFIAR_X_FORWARDED_FOR']
+
+    def ip_cliente(self, request):
+        if self.confiar_x_forwarded_for:
+            reenviada = request.META.get('HTTP_X_FORWARDED_FOR')
+            if reenviada:
+                return reenviada.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR', '')
+
+    def _claves(self, request, cuenta):
+        return (
+            f'login:ip:{self.ip_cliente(request)}',
+            f'login:cuenta:{(cuenta or "").strip().lower()}'
+        )
+
+    def bloqueado(self, request, cuenta):
+        """Devuelve los segundos de espera si la IP o la cuenta superaron el límite, o 0"""
+        clave_ip, clave_cuenta = self._claves(request, cuenta)
+        if (self.almacen.obtener(clave_ip) >= self.max_por_ip
+                or self.almacen.obtener(clave_cuenta) >= self.max_por_cuenta):
+            return self.ventana
+        return 0
+
+    def registrar_fallo(self, request, cuenta):
+        for clave in self._claves(request, cuenta):
+            self.almacen.incrementar(clave, self.ventana)
+
+    def registrar_exito(self, request, cuenta):
+        # Solo se reinicia la cuenta: la IP sigue acumulando para frenar el relleno de credenciales
+        self.almacen.eliminar(self._claves(request, cuenta)[1])
+
+
+limitador_login = LimitadorLogin()
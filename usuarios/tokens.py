@@ -0,0 +1,151 @@
+import copy
+import datetime
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from .models import Usuario
+
+
+class CacheUsuarios:
+    """Caché LRU con expiración de usuarios autenticados, por proceso"""
+
+    def __init__(self, max_entradas=1000, ttl=300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar_usuario(self, usuario_id):
+        """Elimina todas las entradas del usuario (cualquier versión de token)"""
+        with self._lock:
+            for clave in [c for c in self._datos if c[0] == usuario_id]:
+                del self._datos[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+cache_usuarios = CacheUsuarios(
+    max_entradas=getattr(settings, 'JWT_CACHE_USUARIOS_MAX', 1000),
+    ttl=getattr(settings, 'JWT_CACHE_USUARIOS_TTL', 300)
+)
+
+
+# La versión de token vive en la base de datos (Usuario.version_token): sobrevive a
+# reinicios y la ven todos los workers. Se compara al cargar el usuario, así que un
+# worker que ya tiene al usuario en cache_usuarios acepta la versión anterior hasta
+# JWT_CACHE_USUARIOS_TTL segundos; el worker que la incrementa la rechaza de inmediato.
+#
+# La lista de revocación de tokens sueltos (logout) vive en el caché de Django:
+# requiere un backend compartido en producción (ver usuarios.checks).
+def _clave_revocado(jti):
+    return f'usuarios:token_revocado:{jti}'
+
+
+def version_token(usuario_id):
+    return Usuario.objects.filter(pk=usuario_id).values_list('version_token', flat=True).first() or 0
+
+
+def incrementar_version_token(usuario_id):
+    """Invalida todos los tokens emitidos hasta ahora para el usuario"""
+    Usuario.objects.filter(pk=usuario_id).update(version_token=F('version_token') + 1)
+    cache_usuarios.invalidar_usuario(usuario_id)
+
+
+def revocar_token(payload):
+    """Agrega el token a la lista de revocación hasta su expiración"""
+    restante = int(payload['exp'] - time.time())
+    if payload.get('jti') and restante > 0:
+        cache.set(_clave_revocado(payload['jti']), True, timeout=restante)
+
+
+def generar_token(usuario):
+    """Crea el JWT con los datos necesarios para autenticar sin consultar la base de datos"""
+    ahora = datetime.datetime.now(datetime.timezone.utc)
+    payload = {
+        'id': usuario.pk,
+        'correo': usuario.email,
+        'nombres': usuario.nombre,
+        'apellidos': usuario.apellido,
+        'roles': [rol.nombre for rol in usuario.roles.all()],
+        'estado': usuario.estado,
+        'ver': version_token(usuario.pk),
+        'jti': uuid.uuid4().hex,
+        'exp': ahora + datetime.timedelta(hours=getattr(settings, 'JWT_HORAS_VALIDEZ', 24)),
+        'iat': ahora
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
+
+
+def decodificar_token(token):
+    """Valida firma, expiración y revocación; devuelve el payload o None.
+
+    La versión del token se valida al cargar el usuario (usuario_desde_token).
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return None
+
+    # Los tokens de simplejwt (LoginSerializer) identifican al usuario con user_id
+    payload['id'] = payload.get('id') or payload.get('user_id')
+    if not payload['id']:
+        return None
+    # Un refresh de simplejwt solo sirve para pedir otro access, no para autenticar
+    if payload.get('token_type', 'access') != 'access':
+        return None
+    if not payload.get('estado', True):
+        return None
+    if payload.get('jti') and cache.get(_clave_revocado(payload['jti'])):
+        return None
+    return payload
+
+
+def usuario_desde_token(token):
+    """Obtiene el usuario del token; solo consulta la base de datos si no está en caché"""
+    payload = decodificar_token(token)
+    if payload is None:
+        return None
+
+    clave = (payload['id'], payload.get('ver', 0))
+    usuario = cache_usuarios.obtener(clave)
+    if usuario is None:
+        try:
+            usuario = Usuario.objects.get(
+                pk=payload['id'], estado=True, is_active=True, version_token=payload.get('ver', 0)
+            )
+        except Usuario.DoesNotExist:
+            return None
+        cache_usuarios.guardar(clave, usuario)
+    # Copia por solicitud: la instancia en caché se comparte entre hilos
+    usuario = copy.copy(usuario)
+    # Los roles del token son confiables: cualquier cambio de roles incrementa la
+    # versión, y la versión se validó contra la del usuario
+    if 'roles' in payload:
+        usuario._roles_cache = frozenset(payload['roles'])
+    return usuario
@@ -6,17 +6,24 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.db.models import Count, Prefetch
 
 from .models import Usuario, Rol, Persona, Cliente
+from clinica.models import Mascota
 from .serializers import (
     LoginSerializer,
     UsuarioSerializer,
     RegistroSerializer,
     PersonaSerializer,
     RolSerializer,
-    ClienteSerializer
+    ClienteSerializer,
+    ClienteConMascotasSerializer
 )
 from .permissions import IsAdminOnly, IsAdminOrReadOnly
+from .roles import obtener_roles
+from GestionVeterinaria.cache import RespuestaCacheMixin
+from GestionVeterinaria.condicional import GetCondicionalMixin
+from .throttling import limitador_login
 
 
 # =============================
@@ -25,6 +32,23 @@ from .permissions import IsAdminOnly, IsAdminOrReadOnly
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = LoginSerializer
 
+    def post(self, request, *args, **kwargs):
+        cuenta = request.data.get('email') or request.data.get('correo') or ''
+        espera = limitador_login.bloqueado(request, cuenta)
+        if espera:
+            return Response(
+                {'error': 'Demasiados intentos fallidos, intente más tarde'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(espera)}
+            )
+
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            limitador_login.registrar_exito(request, cuenta)
+        elif response.status_code == status.HTTP_401_UNAUTHORIZED:
+            limitador_login.registrar_fallo(request, cuenta)
+        return response
+
 
 # =============================
 # 2. PERFIL DE USUARIO AUTENTICADO
@@ -35,7 +59,7 @@ class UserProfileView(APIView):
     def get(self, request):
         usuario = request.user  # más seguro
         persona = getattr(usuario, 'persona', None)
-        roles_data = [rol.nombre for rol in usuario.roles.all()]
+        roles_data = sorted(obtener_roles(usuario))
 
         return Response({
             "usuario": UsuarioSerializer(usuario).data,
@@ -58,7 +82,7 @@ class RegisterView(generics.CreateAPIView):
 # =============================
 # 4. CRUD DE USUARIOS (ADMIN)
 # =============================
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Usuario.objects.all().prefetch_related("roles")
     serializer_class = UsuarioSerializer
     permission_classes = [IsAuthenticated, IsAdminOnly]
@@ -73,7 +97,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 # =============================
 # 5. CRUD DE ROLES (SOLO ADMIN EDITA)
 # =============================
-class RolViewSet(viewsets.ModelViewSet):
+class RolViewSet(GetCondicionalMixin, RespuestaCacheMixin, viewsets.ModelViewSet):
     queryset = Rol.objects.all()
     serializer_class = RolSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
@@ -82,7 +106,7 @@ class RolViewSet(viewsets.ModelViewSet):
 # =============================
 # 6. CRUD DE PERSONAS
 # =============================
-class PersonaViewSet(viewsets.ModelViewSet):
+class PersonaViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Persona.objects.all()
     serializer_class = PersonaSerializer
     permission_classes = [IsAuthenticated]
@@ -91,7 +115,35 @@ class PersonaViewSet(viewsets.ModelViewSet):
 # =============================
 # 7. CRUD DE CLIENTES
 # =============================
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
     permission_classes = [IsAuthenticated]
+    condicional_campos = (
+        'fecha_modificacion', 'persona__fecha_modificacion',
+        'persona__usuario__fecha_modificacion', 'mascotas__fecha_modificacion'
+    )
+    # Versión condicional, la página, los roles y las mascotas: 4 sin importar los clientes
+    presupuesto_consultas = {'list': 4, 'retrieve': 4}
+
+    def get_queryset(self):
+        queryset = Cliente.objects.all()
+        if self.action in ['list', 'retrieve']:
+            # Conteo y nombres de mascotas en bloque, no dos consultas por cliente
+            queryset = queryset.select_related(
+                'persona__usuario'
+            ).annotate(
+                mascotas_count=Count('mascotas')
+            ).prefetch_related(
+                'persona__usuario__roles',
+                Prefetch(
+                    'mascotas',
+                    queryset=Mascota.objects.only('id_mascota', 'nombre', 'dueño').order_by('nombre')
+                )
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ['list', 'retrieve']:
+            return ClienteConMascotasSerializer
+        return ClienteSerializer